@@ -3,6 +3,9 @@ from flask_cors import CORS
 from flask_session import Session
 from config import Config
 from database import db, init_db, get_connection, release_connection
+from utils.change_feed import start_listener
+from utils.status_rollover import start_rollover
+from utils.audit_partitions import start_partition_maintenance
 import models
 
 from routes import (
@@ -13,7 +16,9 @@ from routes import (
     admin_reservations,
     admin_blocks,
     admin_customers,
-    admin_other
+    admin_other,
+    admin_search,
+    admin_export
 )
 
 import os
@@ -26,6 +31,17 @@ def create_app():
     init_db(app) # Initialize SQLAlchemy
     Session(app) # Initialize Flask-Session
 
+    # Evict this worker's caches when any worker writes
+    if Config.CHANGE_FEED_ENABLED:
+        start_listener()
+
+    # Complete past confirmed reservations (only the leader worker does the work)
+    if Config.STATUS_ROLLOVER_ENABLED:
+        start_rollover()
+
+    # Keep the monthly audit_log partitions created ahead
+    start_partition_maintenance()
+
     # Get your local IP for development
     hostname = socket.gethostname()
     local_ip = socket.gethostbyname(hostname)
@@ -57,6 +73,8 @@ def create_app():
     app.register_blueprint(admin_blocks.bp, url_prefix=admin_prefix)
     app.register_blueprint(admin_customers.bp, url_prefix=admin_prefix)
     app.register_blueprint(admin_other.bp, url_prefix=admin_prefix)
+    app.register_blueprint(admin_search.bp, url_prefix=admin_prefix)
+    app.register_blueprint(admin_export.bp, url_prefix=admin_prefix)
 
     @app.route('/api/health', methods=['GET'])
     def health_check():
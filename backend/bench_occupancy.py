@@ -0,0 +1,259 @@
+# bench_occupancy.py
+"""
+Occupancy micro-benchmarks.
+
+Times the dashboard's per-room and per-location slot occupancy for one day
+computed several ways: the old nested loops over reservations, the interval
+index (utils/interval_index.py), the NumPy matrices the dashboard uses
+(utils/occupancy_matrix.py), and with --sql the per-slot SQL queries against
+the index and matrices loaded with one query. Results of every path are
+checked against each other.
+
+The in-memory paths use synthetic data. --sql seeds a scratch schema inside
+a transaction that is rolled back, like check_query_plans.py.
+
+Usage: python bench_occupancy.py [--reservations 50 500 5000] [--rooms 6] [--repeat 5] [--sql]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from utils.interval_index import DayIndex, load_day_index, slot_minutes
+from utils.occupancy_matrix import DayBookings, load_day_bookings, occupancy_matrices
+from utils.time_utils import generate_time_slots
+
+BENCH_DATE = date(2024, 6, 14)
+
+
+def synthetic_day(reservation_count, rooms, seed=42):
+    """Random confirmed bookings between 17:00 and 22:30 as (room_id, time, duration, party_size)."""
+    rng = random.Random(seed)
+    return [
+        (
+            rng.randint(1, rooms),
+            (datetime.min + timedelta(minutes=17 * 60 + 30 * rng.randint(0, 11))).time(),
+            rng.choice((60, 90, 120)),
+            rng.randint(1, 12)
+        )
+        for _ in range(reservation_count)
+    ]
+
+
+def nested_loop_occupancy(bookings, room_ids, time_slots, date_obj):
+    """The dashboard's original slots x rooms x reservations loops."""
+    room_result = {}
+    location_result = {}
+    for slot in time_slots:
+        slot_dt = datetime.strptime(slot, '%H:%M').time()
+        slot_start_dt = datetime.combine(date_obj, slot_dt)
+        slot_end_dt = slot_start_dt + timedelta(minutes=60)
+        for room_id in room_ids:
+            occupancy = reservation_count = 0
+            for res_room_id, res_time, duration, party_size in bookings:
+                if res_room_id != room_id:
+                    continue
+                res_start_dt = datetime.combine(date_obj, res_time)
+                res_end_dt = res_start_dt + timedelta(minutes=duration)
+                if res_start_dt < slot_end_dt and res_end_dt > slot_start_dt:
+                    occupancy += party_size
+                    reservation_count += 1
+            room_result[(room_id, slot)] = (occupancy, reservation_count)
+
+        total_guests = total_reservations = 0
+        for _, res_time, duration, party_size in bookings:
+            res_start_dt = datetime.combine(date_obj, res_time)
+            res_end_dt = res_start_dt + timedelta(minutes=duration)
+            if res_start_dt < slot_end_dt and res_end_dt > slot_start_dt:
+                total_guests += party_size
+                total_reservations += 1
+        location_result[slot] = (total_guests, total_reservations)
+    return room_result, location_result
+
+
+def index_occupancy(day_index, room_ids, time_slots):
+    """Dashboard occupancy answered from a DayIndex."""
+    room_result = {}
+    location_result = {}
+    for slot, slot_start in slot_minutes(time_slots):
+        for room_id in room_ids:
+            room_result[(room_id, slot)] = day_index.room_overlap(room_id, slot_start, slot_start + 60)
+        location_result[slot] = day_index.location_overlap(slot_start, slot_start + 60)
+    return room_result, location_result
+
+
+def matrix_occupancy(day_bookings, room_ids, time_slots):
+    """Dashboard occupancy from the NumPy matrices, converted like the route does."""
+    slots = slot_minutes(time_slots)
+    matrices = occupancy_matrices(day_bookings, room_ids, [minute for _, minute in slots])
+    room_guests = matrices['room_guests'].tolist()
+    room_reservations = matrices['room_reservations'].tolist()
+    location_guests = matrices['location_guests'].tolist()
+    location_reservations = matrices['location_reservations'].tolist()
+    room_result = {}
+    location_result = {}
+    for column, (slot, _) in enumerate(slots):
+        for row, room_id in enumerate(room_ids):
+            room_result[(room_id, slot)] = (room_guests[row][column], room_reservations[row][column])
+        location_result[slot] = (location_guests[column], location_reservations[column])
+    return room_result, location_result
+
+
+def day_bookings(bookings):
+    return DayBookings([
+        (room_id or 0, res_time.hour * 60 + res_time.minute,
+         res_time.hour * 60 + res_time.minute + duration, party_size)
+        for room_id, res_time, duration, party_size in bookings
+    ])
+
+
+def build_day_index(bookings):
+    reservations = []
+    for room_id, res_time, duration, party_size in bookings:
+        start = res_time.hour * 60 + res_time.minute
+        reservations.append((room_id, start, start + duration, party_size))
+    return DayIndex(1, BENCH_DATE.isoformat(), reservations=reservations)
+
+
+def timed(fn, repeat):
+    """Best wall time of repeat runs in milliseconds, and the last result."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_in_memory(sizes, rooms, repeat):
+    time_slots = generate_time_slots(BENCH_DATE)
+    room_ids = list(range(1, rooms + 1))
+    print(f"In-memory, {rooms} rooms, {len(time_slots)} slots (best of {repeat}, ms)")
+    print(f"{'reservations':>12} {'nested loops':>14} {'interval index':>16} {'numpy':>10}")
+    for size in sizes:
+        bookings = synthetic_day(size, rooms)
+        nested_ms, expected = timed(
+            lambda: nested_loop_occupancy(bookings, room_ids, time_slots, BENCH_DATE), repeat
+        )
+        index_ms, actual = timed(
+            lambda: index_occupancy(build_day_index(bookings), room_ids, time_slots), repeat
+        )
+        numpy_ms, vectorized = timed(
+            lambda: matrix_occupancy(day_bookings(bookings), room_ids, time_slots), repeat
+        )
+        if actual != expected or vectorized != expected:
+            print(f"MISMATCH at {size} reservations")
+            return False
+        print(f"{size:>12} {nested_ms:>14.2f} {index_ms:>16.2f} {numpy_ms:>10.2f}")
+    return True
+
+
+def bench_sql(sizes, rooms, repeat):
+    import psycopg2
+    from config import Config
+    from check_query_plans import SCRATCH_SCHEMA
+    from utils.room_assignment import calculate_location_occupancy, evaluate_rooms
+
+    conn = psycopg2.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        database=Config.DB_NAME,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD
+    )
+    time_slots = generate_time_slots(BENCH_DATE)
+    day = BENCH_DATE.isoformat()
+    ok = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+            for table in ('locations', 'rooms', 'customers', 'reservations', 'reservation_blocks', 'slot_occupancy'):
+                cursor.execute(f"CREATE TABLE {SCRATCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL)")
+            cursor.execute(f"SET LOCAL search_path TO {SCRATCH_SCHEMA}, public")
+            cursor.execute("""
+                INSERT INTO locations (id, code, name, timezone) VALUES (1, 'BEN', 'Bench', 'UTC')
+            """)
+            cursor.execute("""
+                INSERT INTO rooms (id, location_id, code, name, max_capacity)
+                SELECT n, 1, 'R' || n, 'Room ' || n, 1000 FROM generate_series(1, %s) n
+            """, (rooms,))
+            cursor.execute("""
+                INSERT INTO customers (id, name, email) VALUES (1, 'Bench', 'bench@example.com')
+            """)
+
+        print(f"SQL, {rooms} rooms, {len(time_slots)} slots (best of {repeat}, ms)")
+        print(f"{'reservations':>12} {'per-slot SQL':>14} {'one query + index':>18} {'one query + numpy':>18}")
+        for size in sizes:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM reservations")
+                cursor.execute("DELETE FROM slot_occupancy")
+                cursor.executemany("""
+                    INSERT INTO reservations (
+                        id, reservation_number, customer_id, location_id, room_id,
+                        date, time, duration_minutes, party_size, status
+                    ) VALUES (%s, %s, 1, 1, %s, %s, %s, %s, %s, 'confirmed')
+                """, [
+                    (n, f"BEN-{n}", room_id, BENCH_DATE, res_time, duration, party_size)
+                    for n, (room_id, res_time, duration, party_size)
+                    in enumerate(synthetic_day(size, rooms), start=1)
+                ])
+                # Triggers are not copied into the scratch schema, so fill the counters here
+                cursor.execute("""
+                    INSERT INTO slot_occupancy (location_id, date, slot_start, room_id, guests, reservations)
+                    SELECT r.location_id, s::date, s::time, COALESCE(r.room_id, 0), SUM(r.party_size), COUNT(*)
+                    FROM reservations r
+                    CROSS JOIN LATERAL reservation_slot_starts(r.period) s
+                    WHERE r.status = 'confirmed'
+                    GROUP BY 1, 2, 3, 4
+                """)
+                cursor.execute("ANALYZE reservations, slot_occupancy")
+
+            def per_slot_sql():
+                room_result = {}
+                location_result = {}
+                for slot in time_slots:
+                    for room in evaluate_rooms(conn, 1, day, slot, 60):
+                        room_result[(room['id'], slot)] = (room['current_occupancy'], room['reservation_count'])
+                    location_result[slot] = calculate_location_occupancy(conn, 1, day, slot, 60)
+                return room_result, location_result
+
+            sql_ms, expected = timed(per_slot_sql, repeat)
+            index_ms, actual = timed(
+                lambda: index_occupancy(load_day_index(conn, 1, day), list(range(1, rooms + 1)), time_slots),
+                repeat
+            )
+            numpy_ms, vectorized = timed(
+                lambda: matrix_occupancy(load_day_bookings(conn, 1, day), list(range(1, rooms + 1)), time_slots),
+                repeat
+            )
+            if actual != expected or vectorized != expected:
+                print(f"MISMATCH at {size} reservations")
+                ok = False
+                break
+            print(f"{size:>12} {sql_ms:>14.2f} {index_ms:>18.2f} {numpy_ms:>18.2f}")
+    finally:
+        conn.rollback()
+        conn.close()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reservations', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--rooms', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sql', action='store_true', help='also benchmark the SQL paths (needs the database)')
+    args = parser.parse_args()
+
+    ok = bench_in_memory(args.reservations, args.rooms, args.repeat)
+    if ok and args.sql:
+        print()
+        ok = bench_sql(args.reservations, args.rooms, args.repeat)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# check_query_plans.py
+"""
+Query plan regression check.
+
+Copies the schema into a scratch schema, seeds a large synthetic dataset,
+then runs the application's hot queries under EXPLAIN and fails if any of
+them falls back to a sequential scan on reservations, reservation_blocks or
+customers.
+Everything happens inside one transaction that is rolled back at the end,
+and rows are inserted with explicit ids, so the real tables and their
+sequences are never touched.
+
+Usage: python check_query_plans.py [--rows 1000000] [--blocks 50000]
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+
+import psycopg2
+from config import Config
+
+from utils.room_assignment import (
+    calculate_location_occupancy,
+    calculate_room_occupancy,
+    check_location_blocks,
+    check_room_blocks,
+    evaluate_rooms
+)
+from utils.availability import load_day_schedule
+from utils.occupancy_matrix import load_day_bookings
+from utils.search import search_customers, search_reservations
+
+SCRATCH_SCHEMA = 'plan_check'
+LARGE_TABLES = ('reservations', 'reservation_blocks', 'customers')
+
+
+class ExplainingCursor:
+    """Cursor wrapper that records an EXPLAIN plan before running each query."""
+
+    def __init__(self, cursor, plans, label):
+        self._cursor = cursor
+        self._plans = plans
+        self._label = label
+
+    def execute(self, query, params=None):
+        self._cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        self._plans.append((self._label, query, self._cursor.fetchone()[0][0]['Plan']))
+        return self._cursor.execute(query, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+class ExplainingConnection:
+    """Connection wrapper handed to the utils so their SQL is explained as it runs."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.plans = []
+        self.label = None
+
+    def cursor(self, *args, **kwargs):
+        return ExplainingCursor(self._conn.cursor(*args, **kwargs), self.plans, self.label)
+
+
+def seed(cursor, rows, blocks):
+    """Create scratch copies of the tables and fill them with synthetic data."""
+    cursor.execute(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+    for table in ('locations', 'rooms', 'customers', 'reservations', 'reservation_blocks'):
+        cursor.execute(f"CREATE TABLE {SCRATCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL)")
+    cursor.execute(f"SET LOCAL search_path TO {SCRATCH_SCHEMA}, public")
+
+    cursor.execute("""
+        INSERT INTO locations (id, code, name, timezone)
+        SELECT n, 'L' || n, 'Location ' || n, 'UTC' FROM generate_series(1, 3) n
+    """)
+    cursor.execute("""
+        INSERT INTO rooms (id, location_id, code, name, max_capacity)
+        SELECT n, (n - 1) / 6 + 1, 'R' || n, 'Room ' || n, 30 FROM generate_series(1, 18) n
+    """)
+    cursor.execute("""
+        INSERT INTO customers (id, name, email)
+        SELECT n, 'Customer ' || n, 'customer' || n || '@example.com'
+        FROM generate_series(1, %s) n
+    """, (max(rows // 10, 1),))
+
+    # Three years of bookings spread over every room, slot and status
+    cursor.execute("""
+        INSERT INTO reservations (
+            id, reservation_number, customer_id, location_id, room_id,
+            date, time, duration_minutes, party_size, status
+        )
+        SELECT
+            n,
+            'X-' || n,
+            (n %% %(customers)s) + 1,
+            ((n %% 18) / 6) + 1,
+            (n %% 18) + 1,
+            DATE '2023-01-01' + (n %% 1095),
+            TIME '17:00' + ((n / 1095) %% 12) * INTERVAL '30 minutes',
+            60 + (n %% 3) * 30,
+            (n %% 12) + 1,
+            (ARRAY['confirmed', 'confirmed', 'confirmed', 'completed', 'cancelled', 'no-show'])[(n %% 6) + 1]
+        FROM generate_series(1, %(rows)s) n
+    """, {'rows': rows, 'customers': max(rows // 10, 1)})
+
+    cursor.execute("""
+        INSERT INTO reservation_blocks (
+            id, location_id, room_id, start_date, end_date,
+            start_time, end_time, block_type
+        )
+        SELECT
+            n,
+            ((n %% 18) / 6) + 1,
+            CASE WHEN n %% 4 = 0 THEN NULL ELSE (n %% 18) + 1 END,
+            DATE '2023-01-01' + (n %% 1095),
+            DATE '2023-01-01' + (n %% 1095) + (n %% 3),
+            TIME '17:00',
+            TIME '19:00',
+            CASE WHEN n %% 2 = 0 THEN 'hard' ELSE 'soft' END
+        FROM generate_series(1, %s) n
+    """, (blocks,))
+
+    cursor.execute("ANALYZE locations, rooms, customers, reservations, reservation_blocks")
+
+
+def run_hot_queries(conn):
+    """Run every hot query through the utils (or as the routes issue it)."""
+    day = (date(2023, 1, 1) + timedelta(days=500)).isoformat()
+
+    conn.label = 'calculate_location_occupancy'
+    calculate_location_occupancy(conn, 1, day, '19:00', 60)
+    conn.label = 'calculate_location_occupancy (exclude_id)'
+    calculate_location_occupancy(conn, 1, day, '19:00', 60, exclude_id=42)
+    conn.label = 'calculate_room_occupancy'
+    calculate_room_occupancy(conn, 3, day, '19:00', 90)
+    conn.label = 'check_location_blocks'
+    check_location_blocks(conn, 1, day, '19:00', 60)
+    conn.label = 'check_room_blocks'
+    check_room_blocks(conn, 3, day, '19:00', 60, 'soft')
+    conn.label = 'evaluate_rooms'
+    evaluate_rooms(conn, 1, day, '19:00', 60)
+    conn.label = 'load_day_schedule'
+    load_day_schedule(conn, 1, day)
+
+    # Queries issued through the ORM, in the shape SQLAlchemy emits them
+    conn.label = 'dashboard day reservations'
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM reservations
+            WHERE location_id = %s AND date = %s
+            ORDER BY time
+        """, (1, day))
+    conn.label = 'admin reservations by location and date'
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM reservations
+            WHERE location_id = %s AND date = %s
+            ORDER BY date DESC, time DESC
+        """, (1, day))
+    conn.label = 'admin reservations keyset page'
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM reservations
+            WHERE (date, time, id) < (%s, %s, %s)
+            ORDER BY date DESC, time DESC, id DESC
+            LIMIT 51
+        """, (day, '19:00', 500000))
+    conn.label = 'admin reservations keyset page by location'
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM reservations
+            WHERE location_id = %s AND (date, time, id) < (%s, %s, %s)
+            ORDER BY date DESC, time DESC, id DESC
+            LIMIT 51
+        """, (1, day, '19:00', 500000))
+    conn.label = 'admin reservations keyset page by room'
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM reservations
+            WHERE room_id = %s AND (date, time, id) < (%s, %s, %s)
+            ORDER BY date DESC, time DESC, id DESC
+            LIMIT 51
+        """, (3, day, '19:00', 500000))
+    conn.label = 'load_day_bookings (dashboard)'
+    load_day_bookings(conn, 1, day)
+    conn.label = 'status rollover batch'
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT id FROM reservations
+            WHERE status = 'confirmed' AND date < %s
+            ORDER BY date, time, id
+            LIMIT 500
+            FOR UPDATE SKIP LOCKED
+        """, (day,))
+    conn.label = 'search_reservations (partial number)'
+    search_reservations(conn, 'X-4242', 20)
+    conn.label = 'search_reservations (partial email)'
+    search_reservations(conn, 'customer4242@exa', 20)
+    conn.label = 'search_customers'
+    search_customers(conn, 'Customer 4242', 20)
+    conn.label = 'admin blocks by location'
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM reservation_blocks
+            WHERE location_id = %s
+            ORDER BY start_date DESC, start_time DESC
+            LIMIT 100
+        """, (1,))
+
+
+def find_seq_scans(plan, tables=LARGE_TABLES):
+    """Return the relations that a plan tree reads with a sequential scan."""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in tables:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found.extend(find_seq_scans(child, tables))
+    return found
+
+
+def index_names(plan):
+    """Return every index a plan tree uses."""
+    names = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        names.extend(index_names(child))
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='synthetic reservations to seed')
+    parser.add_argument('--blocks', type=int, default=50_000, help='synthetic blocks to seed')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        database=Config.DB_NAME,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD
+    )
+    try:
+        with conn.cursor() as cursor:
+            print(f"Seeding {args.rows} reservations and {args.blocks} blocks...")
+            seed(cursor, args.rows, args.blocks)
+
+        explaining = ExplainingConnection(conn)
+        run_hot_queries(explaining)
+
+        failures = 0
+        for label, _, plan in explaining.plans:
+            seq_scans = find_seq_scans(plan)
+            status = 'FAIL' if seq_scans else 'ok'
+            detail = f"seq scan on {', '.join(seq_scans)}" if seq_scans else ', '.join(index_names(plan)) or '-'
+            print(f"[{status}] {label}: {detail}")
+            failures += bool(seq_scans)
+
+        if failures:
+            print(f"{failures} query plan(s) fell back to sequential scans.")
+        else:
+            print("All hot queries use indexes.")
+        return 0 if not failures else 1
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
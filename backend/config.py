@@ -26,6 +26,61 @@ class Config:
     }
     # ------------------------------------
 
+    # In-process availability cache (per worker)
+    AVAILABILITY_CACHE_SIZE = int(os.environ.get('AVAILABILITY_CACHE_SIZE', 512))
+    AVAILABILITY_CACHE_TTL = int(os.environ.get('AVAILABILITY_CACHE_TTL', 60)) # Seconds
+
+    # Cross-worker cache invalidation via LISTEN/NOTIFY (see migrations/001_change_notifications.sql)
+    CHANGE_FEED_ENABLED = os.environ.get('CHANGE_FEED_ENABLED', 'true').lower() == 'true'
+
+    # Per-(location, date) booking locks (see utils/locking.py)
+    BOOKING_LOCK_TIMEOUT_MS = int(os.environ.get('BOOKING_LOCK_TIMEOUT_MS', 2000))
+    BOOKING_LOCK_RETRIES = int(os.environ.get('BOOKING_LOCK_RETRIES', 2))
+
+    # Reservation number allocator (see utils/reservation_numbers.py).
+    # Never change the key once numbers have been issued: a different key is a
+    # different permutation and can hand out suffixes that are already taken.
+    RESERVATION_NUMBER_KEY = os.environ.get('RESERVATION_NUMBER_KEY', 'efp-reservation-numbers')
+    RESERVATION_NUMBER_BLOCK_SIZE = int(os.environ.get('RESERVATION_NUMBER_BLOCK_SIZE', 1000))
+
+    # Live dashboard streams (see utils/dashboard_events.py). Each open stream
+    # holds a worker thread: run gunicorn with --worker-class gthread (see
+    # README), or turn streams off and the dashboard polls instead.
+    DASHBOARD_STREAM_ENABLED = os.environ.get('DASHBOARD_STREAM_ENABLED', 'true').lower() == 'true'
+    DASHBOARD_STREAM_COALESCE_MS = int(os.environ.get('DASHBOARD_STREAM_COALESCE_MS', 500)) # Batch bursts of changes
+    DASHBOARD_STREAM_KEEPALIVE_SECONDS = int(os.environ.get('DASHBOARD_STREAM_KEEPALIVE_SECONDS', 15))
+    DASHBOARD_STREAM_RETRY_MS = int(os.environ.get('DASHBOARD_STREAM_RETRY_MS', 3000)) # Client reconnect delay
+
+    # Stored dashboards for dates more than N days in the past (see utils/dashboard_snapshots.py)
+    DASHBOARD_SNAPSHOTS_ENABLED = os.environ.get('DASHBOARD_SNAPSHOTS_ENABLED', 'true').lower() == 'true'
+    DASHBOARD_SNAPSHOT_AFTER_DAYS = int(os.environ.get('DASHBOARD_SNAPSHOT_AFTER_DAYS', 2))
+
+    # Rows accepted by one bulk reservation import (see utils/bulk_import.py)
+    BULK_IMPORT_MAX_ROWS = int(os.environ.get('BULK_IMPORT_MAX_ROWS', 20000))
+
+    # Past confirmed reservations -> completed, run by one leader worker (see utils/status_rollover.py)
+    STATUS_ROLLOVER_ENABLED = os.environ.get('STATUS_ROLLOVER_ENABLED', 'true').lower() == 'true'
+    STATUS_ROLLOVER_INTERVAL_SECONDS = int(os.environ.get('STATUS_ROLLOVER_INTERVAL_SECONDS', 300))
+    STATUS_ROLLOVER_BATCH_SIZE = int(os.environ.get('STATUS_ROLLOVER_BATCH_SIZE', 500))
+
+    # Audit log writes (see utils/audit.py). 'async' queues entries for a batched
+    # writer thread after the request commits; 'sync' writes them in the request
+    # transaction. AUDIT_SYNC_ACTIONS are always written synchronously.
+    AUDIT_MODE = os.environ.get('AUDIT_MODE', 'async').lower()
+    AUDIT_SYNC_ACTIONS = frozenset(
+        action.strip()
+        for action in os.environ.get(
+            'AUDIT_SYNC_ACTIONS', 'delete_reservation,delete_block,import_reservations'
+        ).split(',')
+        if action.strip()
+    )
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+    AUDIT_FLUSH_MS = int(os.environ.get('AUDIT_FLUSH_MS', 500)) # Longest wait to fill a batch
+    AUDIT_ENQUEUE_TIMEOUT_MS = int(os.environ.get('AUDIT_ENQUEUE_TIMEOUT_MS', 500)) # Then write inline
+    AUDIT_LOG_PARTITIONS_AHEAD = int(os.environ.get('AUDIT_LOG_PARTITIONS_AHEAD', 3)) # Months created in advance
+    AUDIT_LOG_PARTITION_CHECK_SECONDS = int(os.environ.get('AUDIT_LOG_PARTITION_CHECK_SECONDS', 3600))
+
 # Make sure SESSION_FILE_DIR exists
 if not os.path.exists(Config.SESSION_FILE_DIR):
     os.makedirs(Config.SESSION_FILE_DIR)
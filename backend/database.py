@@ -40,10 +40,10 @@ def get_connection():
             print(f"Failed to create fallback psycopg2 connection: {e}")
             raise # Re-raise the exception if connection fails
 
-def release_connection(connection):
-    """Releases a connection back to the psycopg2 pool."""
+def release_connection(connection, close=False):
+    """Releases a connection back to the psycopg2 pool (close=True discards it instead)."""
     if connection_pool:
-        connection_pool.putconn(connection)
+        connection_pool.putconn(connection, close=close)
     else:
         # Close connection if pool doesn't exist
         if connection:
@@ -0,0 +1,82 @@
+# import_reservations.py
+"""
+Bulk-load reservations from a CSV or NDJSON file (e.g. a legacy booking
+book), with the same validation and room assignment as the admin import.
+
+Usage: python import_reservations.py FILE [--format csv|ndjson] [--dry-run]
+                                          [--no-soft-block-override] [--report PATH]
+
+Running app workers only drop their cached availability for the imported
+days through the change feed (CHANGE_FEED_ENABLED).
+"""
+import argparse
+import json
+import sys
+
+import psycopg2
+from config import Config
+
+from utils.bulk_import import FORMATS, ImportFormatError, booking_days, import_reservations, parse_rows, prepare_rows
+from utils.locking import acquire_booking_locks
+
+def run_import(path, import_format, dry_run=False, allow_soft_block=True, report_path=None):
+    conn = None
+    try:
+        with open(path, encoding='utf-8-sig') as f:
+            raw_rows = parse_rows(f.read(), import_format)
+        if not raw_rows:
+            print("The file contains no rows.")
+            return -1
+
+        conn = psycopg2.connect(
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            database=Config.DB_NAME,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD
+        )
+
+        prepared = prepare_rows(conn, raw_rows)
+        acquire_booking_locks(conn, booking_days(prepared), Config.BOOKING_LOCK_TIMEOUT_MS)
+        report = import_reservations(conn, prepared, allow_soft_block=allow_soft_block, dry_run=dry_run)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        del report['days']
+
+        verb = "Would import" if dry_run else "Imported"
+        print(f"{verb} {report['imported']} of {report['total']} reservation(s); {report['failed']} failed.")
+        for result in report['results']:
+            if not result['ok']:
+                print(f"  row {result['row']}: {result['error']}")
+
+        if report_path:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {report_path}")
+        return report['failed']
+    except (OSError, ImportFormatError) as e:
+        print(f"Error: {e}")
+        return -1
+    except Exception as e:
+        print(f"Error: {e}")
+        if conn:
+            conn.rollback()
+        return -1
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import reservations from CSV or NDJSON.")
+    parser.add_argument('file', help='file to import')
+    parser.add_argument('--format', choices=FORMATS, default='csv', help='file format (default: csv)')
+    parser.add_argument('--dry-run', action='store_true', help='validate and assign rooms without saving')
+    parser.add_argument('--no-soft-block-override', action='store_true',
+                        help='reject rows that fall on soft-blocked rooms or times')
+    parser.add_argument('--report', metavar='PATH', help='write the per-row report as JSON')
+    args = parser.parse_args()
+    result = run_import(args.file, args.format, args.dry_run, not args.no_soft_block_override, args.report)
+    # Exit 1 on error, 2 when some rows failed, 0 otherwise
+    sys.exit(1 if result < 0 else (2 if result else 0))
@@ -1,6 +1,7 @@
 from database import db
 from datetime import datetime
 import json
+from sqlalchemy.dialects.postgresql import JSONB
 
 # Helper function for serialization
 def _datetime_handler(x):
@@ -208,8 +209,9 @@ class AuditLog(db.Model):
     action = db.Column(db.String(50), nullable=False)
     entity_type = db.Column(db.String(50), nullable=False)
     entity_id = db.Column(db.Integer)
-    details = db.Column(db.JSON) # Use JSON type if your DB supports it
-    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.current_timestamp())
+    details = db.Column(JSONB) # GIN-indexed for containment filters (migrations/011)
+    # Partition key of the monthly partitions; part of the table's primary key
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.current_timestamp())
 
     admin = db.relationship('Admin', back_populates='audit_logs')
 
@@ -0,0 +1,62 @@
+# reconcile_occupancy.py
+"""
+Check the slot_occupancy counters against reservations and rebuild them.
+
+Usage: python reconcile_occupancy.py [--dry-run]
+"""
+import argparse
+import sys
+
+import psycopg2
+from config import Config
+
+from utils.slot_occupancy import find_drift, rebuild_slot_occupancy
+
+def reconcile(dry_run=False):
+    conn = None
+    try:
+        conn = psycopg2.connect(
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            database=Config.DB_NAME,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD
+        )
+
+        drifted, sample = find_drift(conn)
+        if drifted:
+            print(f"{drifted} counter row(s) drifted from reservations. First {len(sample)}:")
+            for row in sample:
+                print(
+                    f"  location {row['location_id']} room {row['room_id']} "
+                    f"{row['date']} {row['slot_start']}: "
+                    f"guests {row['guests']} (expected {row['expected_guests']}), "
+                    f"reservations {row['reservations']} (expected {row['expected_reservations']})"
+                )
+        else:
+            print("No drift found.")
+
+        if dry_run:
+            conn.rollback()
+            return drifted
+
+        rows = rebuild_slot_occupancy(conn)
+        conn.commit()
+        print(f"Rebuilt slot_occupancy ({rows} rows).")
+        return drifted
+    except Exception as e:
+        print(f"Error: {e}")
+        if conn:
+            conn.rollback()
+        return -1
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile slot_occupancy counters with reservations.")
+    parser.add_argument('--dry-run', action='store_true', help='report drift without rebuilding')
+    args = parser.parse_args()
+    result = reconcile(args.dry_run)
+    # Exit 1 on error, 2 when drift was found, 0 otherwise
+    sys.exit(1 if result < 0 else (2 if result else 0))
@@ -1,26 +1,14 @@
 from flask import Blueprint, jsonify, request, session
-from models import ReservationBlock, AuditLog 
+from models import ReservationBlock
 from database import db 
 import json
 from sqlalchemy.orm import joinedload # To eager load relationships
+from utils.availability import invalidate_availability
+from utils.audit import log_audit
+from utils.streaming import stream_json_array
 
 bp = Blueprint('admin_blocks', __name__)
 
-def log_audit(admin_id, action, entity_type, entity_id, details):
-    """Helper function to log actions."""
-    try:
-        log_entry = AuditLog(
-            admin_id=admin_id,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            details=details
-        )
-        db.session.add(log_entry)
-        # Commit happens in the main route
-    except Exception as e:
-        print(f"Error logging audit trail: {e}")
-
 @bp.route('/blocks', methods=['GET'])
 def get_blocks():
     """Get all reservation blocks using ORM."""
@@ -40,10 +28,7 @@ def get_blocks():
             query = query.filter(ReservationBlock.location_id == location_id)
 
         query = query.order_by(ReservationBlock.start_date.desc(), ReservationBlock.start_time.desc())
-        blocks = query.all()
-
-        result = [block.to_dict() for block in blocks] # Use model's to_dict
-        return jsonify(result)
+        return stream_json_array(query) # Rows are serialized with the model's to_dict
 
     except Exception as e:
         print(f"Error fetching blocks: {e}")
@@ -92,6 +77,7 @@ def create_block():
         )
 
         db.session.commit()
+        invalidate_availability(data['location_id'], data['start_date'], data['end_date'])
         return jsonify({'id': new_block.id, 'message': 'Block created successfully'}), 201
 
     except Exception as e:
@@ -111,6 +97,7 @@ def delete_block(block_id):
         if not block:
             return jsonify({'error': 'Block not found'}), 404
 
+        affected_range = (block.location_id, block.start_date, block.end_date)
         db.session.delete(block)
 
         # Log deletion
@@ -123,6 +110,7 @@ def delete_block(block_id):
         )
 
         db.session.commit()
+        invalidate_availability(*affected_range)
         return jsonify({'message': 'Block deleted successfully'})
 
     except Exception as e:
@@ -1,7 +1,9 @@
 from flask import Blueprint, jsonify, request, session
-from models import Customer, NewsletterSubscriber, AuditLog 
+from models import Customer, NewsletterSubscriber
 from database import db 
 from sqlalchemy import or_ # For searching multiple fields
+from utils.streaming import stream_json_array
+from utils.audit import changed_fields, log_audit
 
 bp = Blueprint('admin_customers', __name__)
 
@@ -12,10 +14,8 @@ def get_customers():
         return jsonify({'error': 'Unauthorized'}), 401
 
     try:
-        # Simple query for all customers, ordered by ID
-        customers = db.session.query(Customer).order_by(Customer.id).all()
-        result = [customer.to_dict() for customer in customers]
-        return jsonify(result)
+        # Simple query for all customers, ordered by ID, streamed in batches
+        return stream_json_array(db.session.query(Customer).order_by(Customer.id))
     except Exception as e:
         print(f"Error fetching customers: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
@@ -63,18 +63,19 @@ def update_customer(customer_id):
         customer.phone = phone
         customer.newsletter_signup = newsletter_signup
 
-        # Log the audit
-        log_entry = AuditLog(
+        # Log the audit (only the fields that changed)
+        log_audit(
             admin_id=session['admin_id'],
             action='update_customer',
             entity_type='customer',
             entity_id=customer_id,
-            details={
-                "old": old_details,
-                "new": data
-            }
+            details={"changes": changed_fields(old_details, {
+                "name": name,
+                "email": email,
+                "phone": phone,
+                "newsletter_signup": newsletter_signup
+            })}
         )
-        db.session.add(log_entry)
         db.session.commit()
 
         return jsonify({'message': 'Customer updated successfully'})
@@ -91,9 +92,7 @@ def get_subscribers():
         return jsonify({'error': 'Unauthorized'}), 401
 
     try:
-        subscribers = db.session.query(NewsletterSubscriber).order_by(NewsletterSubscriber.id).all()
-        result = [sub.to_dict() for sub in subscribers]
-        return jsonify(result)
+        return stream_json_array(db.session.query(NewsletterSubscriber).order_by(NewsletterSubscriber.id))
     except Exception as e:
         print(f"Error fetching subscribers: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
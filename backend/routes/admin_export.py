@@ -0,0 +1,77 @@
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
+from datetime import datetime
+import zlib
+
+from utils.export import DATASETS, FORMATS, CopyStream, export_filename
+
+bp = Blueprint('admin_export', __name__)
+
+
+@bp.route('/export/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    """
+    Stream reservations, customers or subscribers as CSV (default) or NDJSON,
+    straight from PostgreSQL COPY. Optional filters: location_id, start_date,
+    end_date; gzip=true compresses the download.
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if dataset not in DATASETS:
+        return jsonify({'error': f'Unknown export. Use one of: {", ".join(DATASETS)}'}), 404
+
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in FORMATS:
+        return jsonify({'error': f'format must be one of: {", ".join(FORMATS)}'}), 400
+    compressed = request.args.get('gzip', 'false').lower() == 'true'
+
+    try:
+        start_str = request.args.get('start_date')
+        end_str = request.args.get('end_date')
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else None
+        end_date = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    if start_date and end_date and end_date < start_date:
+        return jsonify({'error': 'end_date must not be before start_date'}), 400
+
+    location_id = request.args.get('location_id')
+    try:
+        location_id = int(location_id) if location_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid location_id format'}), 400
+
+    try:
+        select_sql, params = DATASETS[dataset](location_id, start_date, end_date)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def generate():
+        stream = CopyStream(select_sql, params, export_format)
+        compressor = zlib.compressobj(wbits=31) if compressed else None # gzip container
+        try:
+            for chunk in stream:
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+            if compressor:
+                yield compressor.flush()
+        except Exception as e:
+            # Headers are already sent, so the truncated body signals the failure
+            print(f"Error streaming {dataset} export: {e}")
+        finally:
+            stream.close()
+
+    filename = export_filename(dataset, export_format, [location_id, start_date, end_date], compressed)
+    if compressed:
+        mimetype = 'application/gzip'
+    elif export_format == 'csv':
+        mimetype = 'text/csv'
+    else:
+        mimetype = 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
@@ -1,16 +1,159 @@
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
 from models import Location, Room, Reservation, Customer, AuditLog
 from database import db, get_connection, release_connection # Keep connection pool for utils
 from datetime import datetime, timedelta, date as date_type # Import date separately to avoid conflict
-from sqlalchemy import func, cast, Time, Date, Interval, select
+from sqlalchemy import func, cast, Time, Date, Interval, select, tuple_
 from sqlalchemy.orm import joinedload
 import json
+from psycopg2 import errors
 
 # Keep using utils for complex calculations for now
 from utils.time_utils import generate_time_slots
+from utils.availability import availability_cache
+from utils.interval_index import slot_minutes
+from utils.occupancy_matrix import load_day_bookings, occupancy_matrices
+from utils.range_occupancy import load_range_occupancy
+from utils.change_feed import listener_stats
+from utils.status_rollover import rollover_stats
+from utils.audit_partitions import partition_stats
+from utils.audit import audit_writer
+from utils.pagination import decode_cursor, encode_cursor, parse_page_size
+from utils.dashboard_events import dashboard_broker
+from utils.dashboard_snapshots import (
+    accepts_deflate,
+    claim_snapshot,
+    compress_payload,
+    decompress_payload,
+    is_snapshot_date,
+    load_snapshot,
+    snapshot_stats,
+    store_snapshot
+)
+from config import Config
 
 bp = Blueprint('admin_other', __name__)
 
+MAX_DASHBOARD_RANGE_DAYS = 31 # A month of days x locations keeps the response reasonable
+
+
+def _room_slot_stats(occupancy, reservation_count, max_cap):
+    """Heatmap cell of one room and slot."""
+    return {
+        'occupancy': occupancy,
+        'reservation_count': reservation_count,
+        'percentage': round((occupancy / max_cap) * 100, 1) if max_cap > 0 else 0
+    }
+
+
+def _location_slot_stats(total_guests, total_reservations, location):
+    """Location-wide totals of one slot against the location's per-slot limits."""
+    max_guests = location.max_guests_per_slot
+    max_reservations = location.max_reservations_per_slot
+    return {
+        'total_guests': total_guests,
+        'total_reservations': total_reservations,
+        'guests_percentage': round((total_guests / max_guests) * 100, 1) if max_guests > 0 else 0,
+        'reservations_percentage': round((total_reservations / max_reservations) * 100, 1) if max_reservations > 0 else 0
+    }
+
+
+def _build_dashboard_payload(location, date_obj):
+    """
+    Dashboard of one location and date: time slots, room heatmap,
+    location-wide slot stats and the day's reservations.
+    """
+    # Get all reservations for the date using ORM
+    reservations = db.session.query(Reservation).options(
+        joinedload(Reservation.customer),
+        joinedload(Reservation.room)
+    ).filter(
+        Reservation.location_id == location.id,
+        Reservation.date == date_obj
+    ).order_by(Reservation.time).all()
+
+    # Get all rooms for this location using ORM
+    rooms = db.session.query(Room).filter_by(location_id=location.id).order_by(Room.code).all()
+
+    # Generate time slots (from utils)
+    time_slots = generate_time_slots(date_obj)
+
+    # Bookings of the day (completed ones too on past dates) as start/end minute arrays (one query)
+    conn = get_connection()
+    try:
+        bookings = load_day_bookings(conn, location.id, date_obj.isoformat())
+    finally:
+        release_connection(conn)
+    slots = slot_minutes(time_slots)
+    matrices = occupancy_matrices(bookings, [room.id for room in rooms], [minute for _, minute in slots])
+
+    # --- Calculate room heatmap (rooms x slots matrices) ---
+    room_guests = matrices['room_guests'].tolist()
+    room_reservations = matrices['room_reservations'].tolist()
+    room_heatmap = []
+    for row, room in enumerate(rooms):
+        max_cap = room.max_capacity
+        room_slots = {}
+        for column, (slot, _) in enumerate(slots):
+            room_slots[slot] = _room_slot_stats(room_guests[row][column], room_reservations[row][column], max_cap)
+        room_heatmap.append({
+            'id': room.id,
+            'code': room.code,
+            'name': room.name,
+            'max_capacity': room.max_capacity,
+            'is_active': room.is_active,
+            'slots': room_slots
+        })
+    # --- End heatmap calculation ---
+
+    # --- Location-wide stats per slot (from the same arrays) ---
+    location_stats = {}
+    location_guests = matrices['location_guests'].tolist()
+    location_reservations = matrices['location_reservations'].tolist()
+
+    for column, (slot, _) in enumerate(slots):
+        location_stats[slot] = _location_slot_stats(location_guests[column], location_reservations[column], location)
+    # --- End location stats calculation ---
+
+    return {
+        'location': location.to_dict(), # Use model's to_dict
+        'date': date_obj.isoformat(),
+        'time_slots': time_slots,
+        'room_heatmap': room_heatmap,
+        'location_stats': location_stats,
+        'reservations': [res.to_dict() for res in reservations]
+    }
+
+
+def _snapshot_dashboard_response(location_id, date_obj):
+    """
+    Serve a past date's dashboard from its snapshot, computing and storing
+    the snapshot on a miss. Hits read nothing but the snapshot row.
+    """
+    conn = get_connection()
+    try:
+        compressed = load_snapshot(conn, location_id, date_obj)
+        if compressed is None:
+            # Claim before reading anything the payload is built from
+            try:
+                generation = claim_snapshot(conn, location_id, date_obj)
+            except errors.ForeignKeyViolation:
+                conn.rollback()
+                return jsonify({'error': 'Location not found'}), 404
+            location = db.session.get(Location, location_id)
+            compressed = compress_payload(_build_dashboard_payload(location, date_obj))
+            store_snapshot(conn, location_id, date_obj, generation, compressed)
+    finally:
+        release_connection(conn)
+
+    if accepts_deflate(request.headers.get('Accept-Encoding')):
+        response = Response(compressed, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'deflate'
+    else:
+        response = Response(decompress_payload(compressed), mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
 @bp.route('/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
     """Get dashboard statistics using ORM for basic info, keep utils for complex calcs."""
@@ -23,124 +166,20 @@ def get_dashboard_stats():
     if not location_id or not date_str:
         return jsonify({'error': 'location_id and date parameters are required'}), 400
 
-    conn = None # For utils
     try:
         # This is the correct date object representing the requested date
         date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
 
+        # Past dates rarely change: serve them from stored snapshots
+        if is_snapshot_date(date_obj):
+            return _snapshot_dashboard_response(int(location_id), date_obj)
+
         # Get location info using ORM
         location = db.session.get(Location, location_id)
         if not location:
             return jsonify({'error': 'Location not found'}), 404
 
-        # Get all reservations for the date using ORM
-        reservations = db.session.query(Reservation).options(
-            joinedload(Reservation.customer),
-            joinedload(Reservation.room)
-        ).filter(
-            Reservation.location_id == location_id,
-            Reservation.date == date_obj
-        ).order_by(Reservation.time).all()
-
-        # Get all rooms for this location using ORM
-        rooms = db.session.query(Room).filter_by(location_id=location_id).order_by(Room.code).all()
-
-        # Generate time slots (from utils)
-        time_slots = generate_time_slots(date_obj)
-
-        # --- Calculate room heatmap (using raw reservations data) ---
-        room_heatmap = {}
-        for room in rooms:
-            room_heatmap[room.id] = {
-                'id': room.id,
-                'code': room.code,
-                'name': room.name,
-                'max_capacity': room.max_capacity,
-                'is_active': room.is_active,
-                'slots': {}
-            }
-
-        for slot in time_slots:
-             slot_dt = datetime.strptime(slot, '%H:%M').time()
-             # Calculate end time for overlap check
-             slot_end_dt_naive = datetime.combine(date_obj, slot_dt) + timedelta(minutes=60)
-             slot_end_time = slot_end_dt_naive.time() # This will only work correctly if duration doesn't cross midnight
-
-             for room_id in room_heatmap:
-                 occupancy = 0
-                 reservation_count = 0
-                 for res in reservations:
-                     if res.room_id != room_id or res.status != 'confirmed':
-                         continue
-                     # Combine the reservation's date with its time for proper comparison
-                     res_start_dt = datetime.combine(date_obj, res.time)
-                     res_end_dt = res_start_dt + timedelta(minutes=res.duration_minutes)
-
-                     # Combine the slot's date and time for comparison
-                     slot_start_dt = datetime.combine(date_obj, slot_dt)
-                     # slot_end_dt_naive calculated above is essentially slot_end_dt
-
-                     # Check overlap: (res.start < slot.end) and (res.end > slot.start)
-                     if res_start_dt < slot_end_dt_naive and res_end_dt > slot_start_dt:
-                         occupancy += res.party_size
-                         reservation_count += 1
-
-                 max_cap = room_heatmap[room_id]['max_capacity']
-                 room_heatmap[room_id]['slots'][slot] = {
-                     'occupancy': occupancy,
-                     'reservation_count': reservation_count,
-                     'percentage': round((occupancy / max_cap) * 100, 1) if max_cap > 0 else 0
-                 }
-        # --- End heatmap calculation ---
-
-        # --- Calculate location-wide stats per slot (using raw reservations data) ---
-        location_stats = {}
-        max_guests = location.max_guests_per_slot
-        max_reservations = location.max_reservations_per_slot
-
-        for slot in time_slots:
-            slot_dt = datetime.strptime(slot, '%H:%M').time()
-            slot_end_dt_naive = datetime.combine(date_obj, slot_dt) + timedelta(minutes=60)
-            slot_end_time = slot_end_dt_naive.time() # Again, watch out for midnight crossing
-
-            total_guests_in_slot = 0
-            total_reservations_in_slot = 0
-
-            # Combine slot date and time
-            slot_start_dt = datetime.combine(date_obj, slot_dt)
-
-            for res in reservations:
-                if res.status != 'confirmed':
-                    continue
-
-                # Combine reservation date and time
-                res_start_dt = datetime.combine(date_obj, res.time)
-                res_end_dt = res_start_dt + timedelta(minutes=res.duration_minutes)
-
-                # Check overlap
-                if res_start_dt < slot_end_dt_naive and res_end_dt > slot_start_dt:
-                    total_guests_in_slot += res.party_size
-                    total_reservations_in_slot += 1
-
-            location_stats[slot] = {
-                'total_guests': total_guests_in_slot,
-                'total_reservations': total_reservations_in_slot,
-                'guests_percentage': round((total_guests_in_slot / max_guests) * 100, 1) if max_guests > 0 else 0,
-                'reservations_percentage': round((total_reservations_in_slot / max_reservations) * 100, 1) if max_reservations > 0 else 0
-            }
-        # --- End location stats calculation ---
-
-        # Format reservations for response using model's to_dict
-        formatted_reservations = [res.to_dict() for res in reservations]
-
-        return jsonify({
-            'location': location.to_dict(), # Use model's to_dict
-            'date': date_str,
-            'time_slots': time_slots,
-            'room_heatmap': list(room_heatmap.values()),
-            'location_stats': location_stats,
-            'reservations': formatted_reservations
-        })
+        return jsonify(_build_dashboard_payload(location, date_obj))
 
     except ValueError as ve:
          # Handle potential strptime errors more gracefully
@@ -154,8 +193,201 @@ def get_dashboard_stats():
         import traceback
         traceback.print_exc() # Print full traceback for debugging
         return jsonify({'error': 'An internal error occurred'}), 500
+
+
+@bp.route('/dashboard/stream', methods=['GET'])
+def stream_dashboard():
+    """
+    Server-Sent Events stream of one location's dashboard for a date: a
+    'snapshot' event with the /dashboard/stats payload, then a 'delta' event
+    whenever a committed change alters it (see utils/dashboard_events.py).
+    The stream holds a worker thread for as long as it is open; clients fall
+    back to polling /dashboard/stats when it answers 503.
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not Config.DASHBOARD_STREAM_ENABLED:
+        return jsonify({'error': 'Live dashboard updates are disabled'}), 503
+    if not Config.CHANGE_FEED_ENABLED:
+        return jsonify({'error': 'Live dashboard updates need the change feed'}), 503
+
+    location_id = request.args.get('location_id')
+    date_str = request.args.get('date')
+
+    if not location_id or not date_str:
+        return jsonify({'error': 'location_id and date parameters are required'}), 400
+
+    try:
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+        location_id = int(location_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid location_id or date format. Use YYYY-MM-DD for the date'}), 400
+
+    # Snapshot dates are served from dashboard_snapshots, never rebuilt from reservations
+    if is_snapshot_date(date_obj):
+        return jsonify({'error': 'Live updates are not available for past dates. Use /dashboard/stats'}), 400
+
+    if not db.session.get(Location, location_id):
+        return jsonify({'error': 'Location not found'}), 404
+    db.session.close() # Don't hold a connection for the lifetime of the stream
+
+    def build_payload():
+        try:
+            location = db.session.get(Location, location_id)
+            if not location:
+                raise LookupError('Location not found')
+            return _build_dashboard_payload(location, date_obj)
+        finally:
+            db.session.close()
+
+    def generate():
+        channel = dashboard_broker.subscribe(location_id, date_obj)
+        try:
+            yield f"retry: {Config.DASHBOARD_STREAM_RETRY_MS}\n\n"
+            events = channel.events(
+                build_payload,
+                Config.DASHBOARD_STREAM_COALESCE_MS / 1000,
+                Config.DASHBOARD_STREAM_KEEPALIVE_SECONDS
+            )
+            for event, version, data in events:
+                if event == 'keepalive':
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"id: {version}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            # Headers are already sent; tell the client and let it reconnect
+            print(f"Error streaming dashboard: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e) if isinstance(e, LookupError) else 'An internal error occurred'})}\n\n"
+        finally:
+            dashboard_broker.unsubscribe(channel)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@bp.route('/dashboard/range-stats', methods=['GET'])
+def get_dashboard_range_stats():
+    """
+    Slot occupancy per location and room for a date range and several
+    locations, aggregated in SQL. Reservations are only included when
+    include_reservations=true.
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    start_str = request.args.get('start_date')
+    end_str = request.args.get('end_date')
+    location_ids_str = request.args.get('location_ids')
+    include_reservations = request.args.get('include_reservations', 'false').lower() == 'true'
+
+    if not start_str or not end_str:
+        return jsonify({'error': 'start_date and end_date parameters are required'}), 400
+
+    try:
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    if end_date < start_date:
+        return jsonify({'error': 'end_date must not be before start_date'}), 400
+    if (end_date - start_date).days >= MAX_DASHBOARD_RANGE_DAYS:
+        return jsonify({'error': f'Date range cannot exceed {MAX_DASHBOARD_RANGE_DAYS} days'}), 400
+
+    try:
+        location_ids = [int(part) for part in location_ids_str.split(',') if part.strip()] if location_ids_str else None
+    except ValueError:
+        return jsonify({'error': 'Invalid location_ids format. Use comma-separated ids'}), 400
+
+    conn = None
+    try:
+        # All locations unless a list was given
+        locations_query = db.session.query(Location)
+        if location_ids is not None:
+            locations_query = locations_query.filter(Location.id.in_(location_ids))
+        locations = locations_query.order_by(Location.id).all()
+        if location_ids is not None and len(locations) != len(set(location_ids)):
+            return jsonify({'error': 'Location not found'}), 404
+
+        location_ids = [location.id for location in locations]
+        rooms_by_location = {location_id: [] for location_id in location_ids}
+        for room in db.session.query(Room).filter(Room.location_id.in_(location_ids)).order_by(Room.code):
+            rooms_by_location[room.location_id].append(room)
+
+        reservations_by_day = {}
+        if include_reservations:
+            reservations = db.session.query(Reservation).options(
+                joinedload(Reservation.customer),
+                joinedload(Reservation.room)
+            ).filter(
+                Reservation.location_id.in_(location_ids),
+                Reservation.date.between(start_date, end_date)
+            ).order_by(Reservation.date, Reservation.time).all()
+            for res in reservations:
+                reservations_by_day.setdefault((res.location_id, res.date.isoformat()), []).append(res.to_dict())
+
+        # Every slot, room and location of the range in one query
+        conn = get_connection()
+        occupancy = load_range_occupancy(conn, location_ids, start_date, end_date)
+
+        result = []
+        for location in locations:
+            rooms = rooms_by_location[location.id]
+            days = []
+            current = start_date
+            while current <= end_date:
+                day = current.isoformat()
+                time_slots = generate_time_slots(current)
+                day_occupancy = occupancy.get((location.id, day), {'location': {}, 'rooms': {}})
+
+                location_stats = {}
+                for slot in time_slots:
+                    guests, count = day_occupancy['location'].get(slot, (0, 0))
+                    location_stats[slot] = _location_slot_stats(guests, count, location)
+
+                # Room metadata is listed once per location; days only carry slot cells
+                room_heatmap = []
+                for room in rooms:
+                    room_occupancy = day_occupancy['rooms'].get(room.id, {})
+                    room_slots = {}
+                    for slot in time_slots:
+                        guests, count = room_occupancy.get(slot, (0, 0))
+                        room_slots[slot] = _room_slot_stats(guests, count, room.max_capacity)
+                    room_heatmap.append({'id': room.id, 'slots': room_slots})
+
+                day_stats = {
+                    'date': day,
+                    'time_slots': time_slots,
+                    'location_stats': location_stats,
+                    'room_heatmap': room_heatmap
+                }
+                if include_reservations:
+                    day_stats['reservations'] = reservations_by_day.get((location.id, day), [])
+                days.append(day_stats)
+                current += timedelta(days=1)
+
+            result.append({
+                'location': location.to_dict(),
+                'rooms': [room.to_dict() for room in rooms],
+                'days': days
+            })
+
+        return jsonify({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'locations': result
+        })
+
+    except Exception as e:
+        print(f"Error getting dashboard range stats: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'An internal error occurred'}), 500
     finally:
-        if conn: release_connection(conn) # Ensure connection is released if used by utils
+        if conn: release_connection(conn)
 
 
 @bp.route('/rooms', methods=['GET'])
@@ -183,25 +415,171 @@ def get_rooms():
         return jsonify({'error': 'An internal error occurred'}), 500
 
 
+def _parse_audit_time(value, end_of_day=False):
+    """ISO 8601 timestamp or YYYY-MM-DD (start of day, or end of day for an upper bound)."""
+    if len(value) == 10:
+        day = datetime.strptime(value, '%Y-%m-%d')
+        return day + timedelta(days=1) if end_of_day else day
+    return datetime.fromisoformat(value)
+
+
 @bp.route('/audit-log', methods=['GET'])
 def get_audit_log():
-    """Get audit log entries using ORM."""
+    """
+    Get audit log entries, newest first, using ORM.
+
+    Filters: admin_id, action (comma-separated), entity_type, entity_id,
+    since / until (ISO timestamp or YYYY-MM-DD, until inclusive of the day)
+    and details (a JSON object the entry's details must contain). Each is
+    served by an index of migrations/011_audit_log_partitioning.sql, and a
+    time window only reads the months in it.
+
+    Passing cursor or paginate=true returns one keyset page on
+    (created_at, id) as {'entries': [...], 'next_cursor': ...}. Otherwise the
+    newest `limit` entries are returned as a bare list.
+    """
     if 'admin_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
 
-    try:
-        limit = int(request.args.get('limit', 50))
-    except ValueError:
-        limit = 50 # Default if limit is invalid
+    cursor = request.args.get('cursor')
+    paginate = cursor is not None or request.args.get('paginate', 'false').lower() == 'true'
 
     try:
-        logs = db.session.query(AuditLog).options(
+        query = db.session.query(AuditLog)
+
+        try:
+            if request.args.get('admin_id'):
+                query = query.filter(AuditLog.admin_id == int(request.args['admin_id']))
+            if request.args.get('entity_id'):
+                query = query.filter(AuditLog.entity_id == int(request.args['entity_id']))
+        except ValueError:
+            return jsonify({'error': 'admin_id and entity_id must be integers'}), 400
+
+        actions = [action.strip() for action in request.args.get('action', '').split(',') if action.strip()]
+        if actions:
+            query = query.filter(AuditLog.action.in_(actions))
+        if request.args.get('entity_type'):
+            query = query.filter(AuditLog.entity_type == request.args['entity_type'])
+
+        try:
+            if request.args.get('since'):
+                query = query.filter(AuditLog.created_at >= _parse_audit_time(request.args['since']))
+            if request.args.get('until'):
+                until = request.args['until']
+                if len(until) == 10:
+                    query = query.filter(AuditLog.created_at < _parse_audit_time(until, end_of_day=True))
+                else:
+                    query = query.filter(AuditLog.created_at <= _parse_audit_time(until))
+        except ValueError:
+            return jsonify({'error': 'Invalid since/until. Use an ISO 8601 timestamp or YYYY-MM-DD'}), 400
+
+        if request.args.get('details'):
+            try:
+                details = json.loads(request.args['details'])
+            except ValueError:
+                details = None
+            if not isinstance(details, dict):
+                return jsonify({'error': 'details must be a JSON object'}), 400
+            query = query.filter(AuditLog.details.contains(details))
+
+        query = query.options(
             joinedload(AuditLog.admin) # Eager load admin info
-        ).order_by(AuditLog.created_at.desc()).limit(limit).all()
+        ).order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
 
-        result = [log.to_dict() for log in logs] # Use model's to_dict
-        return jsonify(result)
+        if not paginate:
+            try:
+                limit = int(request.args.get('limit', 50))
+            except ValueError:
+                limit = 50 # Default if limit is invalid
+            logs = query.limit(limit).all()
+            return jsonify([log.to_dict() for log in logs]) # Use model's to_dict
+
+        try:
+            limit = parse_page_size(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = decode_cursor(cursor, 2)
+                after = (datetime.fromisoformat(cursor_created_at), int(cursor_id))
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            # Rows strictly after the cursor in (created_at, id) DESC order
+            query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*after))
+
+        # One extra row tells whether there is a next page
+        logs = query.limit(limit + 1).all()
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = logs[-1]
+            next_cursor = encode_cursor([last.created_at.isoformat(), last.id])
+
+        return jsonify({
+            'entries': [log.to_dict() for log in logs],
+            'next_cursor': next_cursor
+        })
     except Exception as e:
         print(f"Error fetching audit log: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
 
+
+
+@bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get hit/miss/eviction counters for this worker's in-process caches."""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify({
+        'availability': availability_cache.stats(),
+        'change_feed': listener_stats(),
+        'dashboard_streams': dashboard_broker.stats(),
+        'dashboard_snapshots': snapshot_stats(),
+        'audit_writer': audit_writer.stats()
+    })
+
+
+@bp.route('/scheduler/stats', methods=['GET'])
+def get_scheduler_stats():
+    """
+    Status rollover metrics: this worker's thread (only the leader runs
+    batches), the last batch logged by any worker and the past confirmed
+    reservations still waiting to be completed.
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        last_batch = db.session.query(AuditLog).filter_by(action='auto_complete') \
+            .order_by(AuditLog.id.desc()).first()
+        pending = db.session.query(func.count(Reservation.id)).filter(
+            Reservation.status == 'confirmed',
+            Reservation.date < date_type.today()
+        ).scalar()
+
+        last_batch_info = None
+        if last_batch:
+            details = last_batch.to_dict()['details'] or {}
+            last_batch_info = {
+                'created_at': last_batch.created_at.isoformat() if last_batch.created_at else None,
+                'count': details.get('count'),
+                'first_date': details.get('first_date'),
+                'last_date': details.get('last_date')
+            }
+
+        return jsonify({
+            'status_rollover': {
+                'enabled': Config.STATUS_ROLLOVER_ENABLED,
+                'worker': rollover_stats(),
+                'last_batch': last_batch_info,
+                'pending': pending
+            },
+            'audit_partitions': partition_stats()
+        })
+    except Exception as e:
+        print(f"Error fetching scheduler stats: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
@@ -1,80 +1,165 @@
 from flask import Blueprint, jsonify, request, session
-from models import Reservation, Customer, Location, Room, AuditLog
-from database import db, get_connection, release_connection
+from models import Reservation, Customer, Room
+from database import db
 from datetime import datetime, time, date, timedelta
 import json
-from sqlalchemy import or_, func, cast, Time, Date, Interval # For ORM querying
+from sqlalchemy import or_, func, cast, select, tuple_, union, Time, Date, Interval # For ORM querying
 from sqlalchemy.orm import joinedload # To eager load relationships
 
 # Keep using utils, which still use psycopg2 connection pool for now
 from utils.room_assignment import (
     weighted_random_room_selection,
-    generate_reservation_number,
     validate_reservation_constraints,
-    check_room_blocks,
-    calculate_room_occupancy
+    evaluate_rooms
 )
+from utils.availability import invalidate_availability
+from utils.audit import changed_fields, log_audit
+from utils.booking import book_reservation
+from utils.reservation_numbers import next_reservation_number
+from utils.locking import acquire_booking_locks, run_with_booking_lock, run_with_lock_retries, BookingLockTimeout
+from utils.pagination import decode_cursor, encode_cursor, parse_page_size
+from utils.streaming import stream_json_array
+from utils.bulk_import import (
+    FORMATS as IMPORT_FORMATS,
+    ImportFormatError,
+    booking_days,
+    import_reservations,
+    parse_rows,
+    prepare_rows
+)
+from utils.bulk_status import MAX_IDS as BULK_STATUS_MAX_IDS, bulk_update_status
+from config import Config
 
 bp = Blueprint('admin_reservations', __name__)
 
-def log_audit(admin_id, action, entity_type, entity_id, details):
-    """Helper function to log actions."""
-    try:
-        log_entry = AuditLog(
-            admin_id=admin_id,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            details=details # SQLAlchemy handles JSON conversion if type is JSON
-        )
-        db.session.add(log_entry)
-        # Note: commit should happen within the route's try block
-    except Exception as e:
-        print(f"Error logging audit trail: {e}")
-        # Decide if this should cause the main operation to fail (rollback)
+VALID_STATUSES = ['confirmed', 'cancelled', 'no-show', 'completed']
+
+def _audit_fields(reservation):
+    """The editable fields of a reservation, as recorded in audit details."""
+    return {
+        'customer_id': reservation.customer_id,
+        'location_id': reservation.location_id,
+        'room_id': reservation.room_id,
+        'date': reservation.date.isoformat() if reservation.date else None,
+        'time': reservation.time.strftime('%H:%M') if reservation.time else None,
+        'duration_minutes': reservation.duration_minutes,
+        'party_size': reservation.party_size,
+        'status': reservation.status,
+        'special_requests': reservation.special_requests
+    }
 
 @bp.route('/reservations', methods=['GET'])
 def get_reservations():
-    """Get all reservations with optional filtering using ORM."""
+    """
+    Get reservations, newest first, with optional filtering using ORM.
+
+    Passing limit and/or cursor returns one keyset page on (date, time, id)
+    as {'reservations': [...], 'next_cursor': ...}, plus 'total' when
+    include_total=true. Without them every match is returned as a bare list.
+    """
     if 'admin_id' not in session:
          return jsonify({'error': 'Unauthorized'}), 401
 
     location_id = request.args.get('location_id')
     date_str = request.args.get('date')
+    date_from_str = request.args.get('date_from')
+    date_to_str = request.args.get('date_to')
+    status_str = request.args.get('status', '').strip()
+    room_id = request.args.get('room_id')
     search = request.args.get('search', '').strip()
+    cursor = request.args.get('cursor')
+    paginate = cursor is not None or 'limit' in request.args
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
 
     try:
-        query = db.session.query(Reservation).options(
-            joinedload(Reservation.customer),
-            joinedload(Reservation.location),
-            joinedload(Reservation.room)
-        )
+        query = db.session.query(Reservation)
 
         if location_id:
              query = query.filter(Reservation.location_id == location_id)
 
-        if date_str:
+        try:
+            if date_str:
+                query = query.filter(Reservation.date == datetime.strptime(date_str, '%Y-%m-%d').date())
+            if date_from_str:
+                query = query.filter(Reservation.date >= datetime.strptime(date_from_str, '%Y-%m-%d').date())
+            if date_to_str:
+                query = query.filter(Reservation.date <= datetime.strptime(date_to_str, '%Y-%m-%d').date())
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        if status_str:
+            statuses = [status.strip() for status in status_str.split(',') if status.strip()]
+            invalid = [status for status in statuses if status not in VALID_STATUSES]
+            if invalid:
+                return jsonify({'error': f'Invalid status: {", ".join(invalid)} (use {", ".join(VALID_STATUSES)})'}), 400
+            query = query.filter(Reservation.status.in_(statuses))
+
+        if room_id:
             try:
-                filter_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                query = query.filter(Reservation.date == filter_date)
+                query = query.filter(Reservation.room_id == int(room_id))
             except ValueError:
-                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+                return jsonify({'error': 'Invalid room_id format'}), 400
 
         if search:
             search_pattern = f"%{search}%"
-            query = query.join(Reservation.customer).filter(
-                or_(
-                    Reservation.reservation_number.ilike(search_pattern),
-                    Customer.name.ilike(search_pattern),
-                     Customer.email.ilike(search_pattern)
+            # Two index-backed branches (trigram indexes, see
+            # migrations/009_trigram_search.sql) instead of an OR across the join
+            matching_customers = select(Customer.id).where(
+                or_(Customer.name.ilike(search_pattern), Customer.email.ilike(search_pattern))
+            )
+            matching_ids = union(
+                select(Reservation.id).where(Reservation.reservation_number.ilike(search_pattern)),
+                select(Reservation.id).where(Reservation.customer_id.in_(matching_customers))
+            )
+            query = query.filter(Reservation.id.in_(matching_ids))
+
+        filtered = query
+        query = query.options(
+            joinedload(Reservation.customer),
+            joinedload(Reservation.location),
+            joinedload(Reservation.room)
+        ).order_by(Reservation.date.desc(), Reservation.time.desc(), Reservation.id.desc())
+
+        if not paginate:
+            return stream_json_array(query) # Rows are serialized with the model's to_dict
+
+        try:
+            limit = parse_page_size(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if cursor:
+            try:
+                cursor_date, cursor_time, cursor_id = decode_cursor(cursor, 3)
+                after = (
+                    datetime.strptime(cursor_date, '%Y-%m-%d').date(),
+                    datetime.strptime(cursor_time, '%H:%M:%S').time(),
+                    int(cursor_id)
                 )
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            # Rows strictly after the cursor in (date, time, id) DESC order
+            query = query.filter(
+                tuple_(Reservation.date, Reservation.time, Reservation.id) < tuple_(*after)
             )
 
-        query = query.order_by(Reservation.date.desc(), Reservation.time.desc())
-        reservations = query.all()
+        # One extra row tells whether there is a next page
+        reservations = query.limit(limit + 1).all()
+        has_more = len(reservations) > limit
+        reservations = reservations[:limit]
 
-        result = [res.to_dict() for res in reservations] # Use to_dict method from model
-        return jsonify(result)
+        next_cursor = None
+        if has_more:
+            last = reservations[-1]
+            next_cursor = encode_cursor([last.date.isoformat(), last.time.strftime('%H:%M:%S'), last.id])
+
+        response = {
+            'reservations': [res.to_dict() for res in reservations],
+            'next_cursor': next_cursor
+        }
+        if include_total:
+            response['total'] = filtered.with_entities(func.count(Reservation.id)).scalar()
+        return jsonify(response)
 
     except Exception as e:
         print(f"Error fetching reservations: {e}")
@@ -90,9 +175,8 @@ def update_reservation_status(reservation_id):
     data = request.json
     status = data.get('status', '').strip()
 
-    valid_statuses = ['confirmed', 'cancelled', 'no-show', 'completed']
-    if not status or status not in valid_statuses:
-         return jsonify({'error': f'Valid status is required ({", ".join(valid_statuses)})'}), 400
+    if not status or status not in VALID_STATUSES:
+         return jsonify({'error': f'Valid status is required ({", ".join(VALID_STATUSES)})'}), 400
 
     try:
         reservation = db.session.get(Reservation, reservation_id)
@@ -101,6 +185,7 @@ def update_reservation_status(reservation_id):
 
         reservation.status = status
         reservation.updated_at = datetime.now() # Let ORM handle timezone if configured
+        affected_day = (reservation.location_id, reservation.date)
 
         log_audit(
             admin_id=session['admin_id'],
@@ -111,6 +196,7 @@ def update_reservation_status(reservation_id):
         )
 
         db.session.commit()
+        invalidate_availability(*affected_day)
         return jsonify({'message': 'Reservation status updated successfully'})
     except Exception as e:
         db.session.rollback()
@@ -118,6 +204,73 @@ def update_reservation_status(reservation_id):
         return jsonify({'error': 'An internal error occurred'}), 500
 
 
+@bp.route('/reservations/status', methods=['PUT'])
+def bulk_update_reservation_status():
+    """
+    Set the status of many reservations at once, e.g. closing out a night.
+    Body: {'status', 'ids': [...]} or {'status', 'location_id', 'date',
+    'time_from', 'time_to', 'current_status'} (current_status may be a list
+    or comma-separated). One statement updates the rows and writes their
+    audit entries.
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.json or {}
+    status = str(data.get('status') or '').strip()
+    if status not in VALID_STATUSES:
+        return jsonify({'error': f'Valid status is required ({", ".join(VALID_STATUSES)})'}), 400
+
+    current_statuses = data.get('current_status') or []
+    if isinstance(current_statuses, str):
+        current_statuses = [value.strip() for value in current_statuses.split(',') if value.strip()]
+    invalid = [value for value in current_statuses if value not in VALID_STATUSES]
+    if invalid:
+        return jsonify({'error': f'Invalid current_status: {", ".join(map(str, invalid))} (use {", ".join(VALID_STATUSES)})'}), 400
+
+    filters = {'current_statuses': current_statuses}
+    try:
+        if data.get('ids') is not None:
+            ids = data['ids']
+            if not isinstance(ids, list) or not ids:
+                return jsonify({'error': 'ids must be a non-empty list'}), 400
+            if len(ids) > BULK_STATUS_MAX_IDS:
+                return jsonify({'error': f'At most {BULK_STATUS_MAX_IDS} ids can be updated at once'}), 400
+            filters['ids'] = sorted({int(value) for value in ids})
+        else:
+            if not data.get('location_id') or not data.get('date'):
+                return jsonify({'error': 'Either ids or location_id and date are required'}), 400
+            filters['location_id'] = int(data['location_id'])
+            filters['date'] = datetime.strptime(data['date'], '%Y-%m-%d').date()
+            if data.get('time_from'):
+                filters['time_from'] = datetime.strptime(data['time_from'], '%H:%M').time()
+            if data.get('time_to'):
+                filters['time_to'] = datetime.strptime(data['time_to'], '%H:%M').time()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid ids, location_id, date (YYYY-MM-DD) or time (HH:MM)'}), 400
+
+    try:
+        changed = bulk_update_status(
+            db.session.connection().connection,
+            session['admin_id'],
+            status,
+            **filters
+        )
+        db.session.commit()
+
+        for location_id, day in sorted({(row['location_id'], row['date']) for row in changed}):
+            invalidate_availability(location_id, day)
+        return jsonify({
+            'message': f'{len(changed)} reservation(s) updated',
+            'updated': len(changed),
+            'reservations': [{'id': row['id'], 'old_status': row['old_status']} for row in changed]
+        })
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error bulk updating reservation status: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+
+
 @bp.route('/reservations/<int:reservation_id>/details', methods=['PUT'])
 def update_reservation_details(reservation_id):
     """Update full details of an existing reservation using ORM and existing utils."""
@@ -130,9 +283,7 @@ def update_reservation_details(reservation_id):
     if not all(field in data for field in required_fields):
          return jsonify({'error': 'Missing required fields for update'}), 400
 
-    conn = None 
     try:
-
         reservation = db.session.query(Reservation).options(
             joinedload(Reservation.customer) # Load customer to avoid extra query
         ).get(reservation_id)
@@ -153,8 +304,31 @@ def update_reservation_details(reservation_id):
         special_requests = data.get('special_requests')
         status = data['status']
 
+        # Moving a reservation touches both its old and its new day
+        affected_days = [
+            (reservation.location_id, reservation.date),
+            (location_id, datetime.strptime(date_str, '%Y-%m-%d').date())
+        ]
+    except ValueError as ve:
+         db.session.rollback()
+         print(f"Value error updating reservation details: {ve}")
+         return jsonify({'error': f'Invalid input format: {ve}'}), 400
+
+    def update(conn):
+        # Re-read and lock the row now that the day locks are held; the copy
+        # loaded above may predate a concurrent edit
+        reservation = db.session.query(Reservation).populate_existing().with_for_update().filter(
+            Reservation.id == reservation_id
+        ).first()
+        if not reservation:
+             return jsonify({'error': 'Reservation not found'}), 404
 
-        conn = get_connection()
+        # Moved to another day in the meantime: lock that day as well
+        changed_days = list(affected_days)
+        current_day = (reservation.location_id, reservation.date)
+        if current_day not in changed_days:
+            acquire_booking_locks(conn, [current_day], Config.BOOKING_LOCK_TIMEOUT_MS)
+            changed_days.append(current_day)
 
         is_valid, error_msg = validate_reservation_constraints(
             conn, location_id, date_str, time_str, party_size, duration_minutes,
@@ -162,7 +336,6 @@ def update_reservation_details(reservation_id):
         )
         
         if not is_valid:
-            release_connection(conn)
             return jsonify({'error': error_msg}), 400
 
         final_room_id = None
@@ -174,31 +347,29 @@ def update_reservation_details(reservation_id):
             room_id = int(room_id_input)
             manual_room_assignment = True
             
+            # Blocks and occupancy (excluding self) in one query
+            rooms = evaluate_rooms(
+                conn, None, date_str, time_str, duration_minutes,
+                exclude_id=reservation_id, room_id=room_id
+            )
+            if not rooms:
+                 return jsonify({'error': 'Selected room not found'}), 404
+            room = rooms[0]
+
             # Check for hard blocks
-            if check_room_blocks(conn, room_id, date_str, time_str, duration_minutes, 'hard'):
-                release_connection(conn)
+            if room['hard_blocked']:
                 return jsonify({'error': 'Selected room is blocked (hard block) for this time'}), 400
 
-            soft_block_override = check_room_blocks(conn, room_id, date_str, time_str, duration_minutes, 'soft')
+            soft_block_override = room['soft_blocked']
             if soft_block_override and session.get('admin_role') != 'manager':
-                release_connection(conn)
                 return jsonify({
                     'error': 'This room is soft-blocked. Only managers can override.'
                 }), 403
 
-            # Validate room capacity (excluding self)
-            current_occupancy = calculate_room_occupancy(
-                conn, room_id, date_str, time_str, duration_minutes,
-                exclude_id=reservation_id
-             )
-            room = db.session.get(Room, room_id) # Fetch room using ORM
-            if not room:
-                 release_connection(conn)
-                 return jsonify({'error': 'Selected room not found'}), 404
-
-            if current_occupancy + party_size > room.max_capacity:
-                 release_connection(conn)
-                 return jsonify({'error': f'Selected room ({room.name}) exceeds capacity ({room.max_capacity}) with {party_size} guests (currently {current_occupancy})'}), 400
+            # Validate room capacity
+            current_occupancy = room['current_occupancy']
+            if current_occupancy + party_size > room['max_capacity']:
+                 return jsonify({'error': f'Selected room ({room["name"]}) exceeds capacity ({room["max_capacity"]}) with {party_size} guests (currently {current_occupancy})'}), 400
 
             final_room_id = room_id
         else:
@@ -208,20 +379,15 @@ def update_reservation_details(reservation_id):
                 exclude_id=reservation_id
             )
             if not selected_room:
-                 release_connection(conn)
                  return jsonify({'error': 'No suitable rooms available for this time slot'}), 400
             final_room_id = selected_room['id']
             
-            soft_block_override = check_room_blocks(conn, final_room_id, date_str, time_str, duration_minutes, 'soft')
+            soft_block_override = selected_room['soft_blocked']
             if soft_block_override and session.get('admin_role') != 'manager':
-                release_connection(conn)
                 return jsonify({
                     'error': 'Auto-assignment failed. The only available room is soft-blocked and requires manager override.'
                 }), 403
 
-        release_connection(conn) # Release connection after utils are done
-
-        
         customer = db.session.query(Customer).filter_by(email=customer_email).first()
         if customer:
             # Update existing customer
@@ -241,6 +407,7 @@ def update_reservation_details(reservation_id):
         # Ensure customer_id is set for the reservation
         customer_id = customer.id
 
+        old_fields = _audit_fields(reservation)
         reservation.customer_id = customer_id
         reservation.location_id = location_id
         reservation.room_id = final_room_id
@@ -254,7 +421,7 @@ def update_reservation_details(reservation_id):
 
         audit_details = {
             "source": "admin_update",
-            "updated_data": data,
+            "changes": changed_fields(old_fields, _audit_fields(reservation)),
             "final_room_id": final_room_id,
             "manual_room_assignment": manual_room_assignment,
             "soft_block_override": soft_block_override
@@ -268,15 +435,20 @@ def update_reservation_details(reservation_id):
         )
 
         db.session.commit()
+        for affected_location_id, affected_date in changed_days:
+            invalidate_availability(affected_location_id, affected_date)
         return jsonify({'message': 'Reservation updated successfully'})
 
+    try:
+        return run_with_booking_lock(db.session, affected_days, update)
+    except BookingLockTimeout as e:
+        print(f"Booking lock timeout updating reservation details: {e}")
+        return jsonify({'error': 'These dates are busy right now. Please try again.'}), 503
     except ValueError as ve:
-         if conn: release_connection(conn)
          db.session.rollback()
          print(f"Value error updating reservation details: {ve}")
          return jsonify({'error': f'Invalid input format: {ve}'}), 400
     except Exception as e:
-        if conn: release_connection(conn)
         db.session.rollback()
         print(f"Error updating reservation details: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
@@ -292,6 +464,7 @@ def delete_reservation(reservation_id):
         if not reservation:
             return jsonify({'error': 'Reservation not found'}), 404
 
+        affected_day = (reservation.location_id, reservation.date)
         db.session.delete(reservation)
 
         log_audit(
@@ -303,6 +476,7 @@ def delete_reservation(reservation_id):
         )
 
         db.session.commit()
+        invalidate_availability(*affected_day)
         return jsonify({'message': 'Reservation deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -323,8 +497,17 @@ def update_reservation_room(reservation_id):
         return jsonify({'error': 'Valid room_id is required'}), 400
     new_room_id = int(new_room_id)
 
-    conn = None # For utils
     try:
+        reservation = db.session.get(Reservation, reservation_id)
+        if not reservation:
+             return jsonify({'error': 'Reservation not found'}), 404
+        affected_day = (reservation.location_id, reservation.date)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating reservation room: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+
+    def move(conn):
         reservation = db.session.get(Reservation, reservation_id)
         if not reservation:
              return jsonify({'error': 'Reservation not found'}), 404
@@ -342,35 +525,28 @@ def update_reservation_room(reservation_id):
         if new_room.location_id != reservation.location_id:
              return jsonify({'error': 'Cannot move reservation to a room in a different location'}), 400
 
+        exclude_id_for_calc = reservation_id if old_room_id == new_room_id else None
+        room_status = evaluate_rooms(
+            conn, None, date_str, time_str, duration_minutes,
+            exclude_id=exclude_id_for_calc, room_id=new_room_id
+        )[0]
 
-        conn = get_connection()
-
-        if check_room_blocks(conn, new_room_id, date_str, time_str, duration_minutes, 'hard'):
-            release_connection(conn)
+        if room_status['hard_blocked']:
             return jsonify({'error': 'Selected room is blocked (hard block) for this time'}), 400
 
-        exclude_id_for_calc = reservation_id if old_room_id == new_room_id else None
-        current_occupancy = calculate_room_occupancy(
-            conn, new_room_id, date_str, time_str, duration_minutes, exclude_id_for_calc
-        )
+        current_occupancy = room_status['current_occupancy']
         if current_occupancy + party_size > new_room.max_capacity:
-             release_connection(conn)
              return jsonify({
                  'error': f'Room ({new_room.name}) does not have enough capacity. Current: {current_occupancy}, Needed: {party_size}, Max: {new_room.max_capacity}'
              }), 400
 
-        soft_block_override = check_room_blocks(
-            conn, new_room_id, date_str, time_str, duration_minutes, 'soft'
-        )
+        soft_block_override = room_status['soft_blocked']
         
         if soft_block_override and session.get('admin_role') != 'manager':
-            release_connection(conn) # Release connection before returning
             return jsonify({
                 'error': 'This room is soft-blocked. Only managers can override.'
             }), 403
 
-        release_connection(conn)
-
         reservation.room_id = new_room_id
         reservation.updated_at = datetime.now()
 
@@ -388,10 +564,15 @@ def update_reservation_room(reservation_id):
         )
 
         db.session.commit()
+        invalidate_availability(*affected_day)
         return jsonify({'message': 'Room assignment updated successfully'})
 
+    try:
+        return run_with_booking_lock(db.session, [affected_day], move)
+    except BookingLockTimeout as e:
+        print(f"Booking lock timeout updating reservation room: {e}")
+        return jsonify({'error': 'This date is busy right now. Please try again.'}), 503
     except Exception as e:
-        if conn: release_connection(conn)
         db.session.rollback()
         print(f"Error updating reservation room: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
@@ -408,159 +589,74 @@ def create_admin_reservation():
     if not all(field in data for field in required_fields):
          return jsonify({'error': f'Missing required fields: {", ".join(required_fields)}'}), 400
 
-    conn = None # For utils
     try:
         location_id = int(data['location_id'])
         party_size = int(data['party_size'])
         duration_minutes = int(data.get('duration_minutes', 60))
         date_str = data['date']
         time_str = data['time']
+        reservation_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         room_id_input = data.get('room_id') # Optional manual assignment
+        manual_room_id = int(room_id_input) if room_id_input and str(room_id_input).isdigit() else None
+    except ValueError as ve:
+         print(f"Value error creating reservation: {ve}")
+         return jsonify({'error': f'Invalid input format: {ve}'}), 400
 
-        if not 1 <= party_size <= 30:
-            return jsonify({'error': 'Party size must be between 1 and 30 for admin bookings.'}), 400
-
-        conn = get_connection()
-
-        is_valid, error_msg = validate_reservation_constraints(
-            conn, location_id, date_str, time_str, party_size, duration_minutes, is_admin=True
-        )
-        # ------------------------------------
-        if not is_valid:
-             release_connection(conn)
-             return jsonify({'error': error_msg}), 400
-
-        # Select room (or use manual assignment if provided)
-        final_room_id = None
-        soft_block_override = False
-        manual_room_assignment = False
-
-        if room_id_input and str(room_id_input).isdigit():
-            manual_room_assignment = True
-            room_id = int(room_id_input)
-            # Validate hard blocks
-            if check_room_blocks(conn, room_id, date_str, time_str, duration_minutes, 'hard'):
-                 release_connection(conn)
-                 return jsonify({'error': 'Selected room is blocked (hard block) for this time'}), 400
-             # Check soft block
-            soft_block_override = check_room_blocks(conn, room_id, date_str, time_str, duration_minutes, 'soft')
-
-            if soft_block_override and session.get('admin_role') != 'manager':
-                release_connection(conn) # Release connection before returning
-                return jsonify({
-                    'error': 'This room is soft-blocked. Only managers can override.'
-                }), 403
-
-            # Validate room capacity using utils
-            current_occupancy = calculate_room_occupancy(
-                conn, room_id, date_str, time_str, duration_minutes
-            )
-            # Fetch room using ORM to check max capacity
-            room = db.session.get(Room, room_id)
-            if not room:
-                 release_connection(conn)
-                 return jsonify({'error': 'Selected room not found'}), 404
-
-            if current_occupancy + party_size > room.max_capacity:
-                 release_connection(conn)
-                 return jsonify({'error': f'Selected room ({room.name}) exceeds capacity ({room.max_capacity}) with {party_size} guests (currently {current_occupancy})'}), 400
-
-            final_room_id = room_id
-        else:
-             # Use weighted-random algorithm (utils)
-            selected_room = weighted_random_room_selection(
-                conn, location_id, date_str, time_str, party_size, duration_minutes
-            )
-            if not selected_room:
-                 release_connection(conn)
-                 return jsonify({'error': 'No rooms available for this time slot'}), 400
-            final_room_id = selected_room['id']
-            # Check if auto-assigned room overrides a soft block
-            soft_block_override = check_room_blocks(conn, final_room_id, date_str, time_str, duration_minutes, 'soft')
-
-            if soft_block_override and session.get('admin_role') != 'manager':
-                release_connection(conn) # Release connection before returning
-                return jsonify({
-                    'error': 'Auto-assignment failed. The only available room is soft-blocked and requires manager override.'
-                }), 403
-
-        release_connection(conn) # Done with utils
-
-        customer = db.session.query(Customer).filter_by(email=data['customer_email']).first()
-        if customer:
-            customer.name = data['customer_name']
-            customer.phone = data.get('customer_phone')
-            customer.updated_at = datetime.now()
-        else:
-            customer = Customer(
-                 name=data['customer_name'],
-                email=data['customer_email'],
-                phone=data.get('customer_phone')
-            )
-            db.session.add(customer)
-            db.session.flush() # Get ID
-
-        customer_id = customer.id
+    if not 1 <= party_size <= 30:
+        return jsonify({'error': 'Party size must be between 1 and 30 for admin bookings.'}), 400
 
-        # Get location code for reservation number
-        location = db.session.get(Location, location_id)
-        if not location:
-             # This rollback might be redundant if the commit doesn't happen, but good practice
-             db.session.rollback()
-             return jsonify({'error': 'Invalid location selected'}), 400
-        location_code = location.code
-
-         # Generate reservation number (utils)
-        reservation_number = generate_reservation_number(location_code)
-
-        # Create reservation object
-        new_reservation = Reservation(
-            reservation_number=reservation_number,
-            customer_id=customer_id,
-            location_id=location_id,
-            room_id=final_room_id,
-            date=datetime.strptime(date_str, '%Y-%m-%d').date(),
-             time=datetime.strptime(time_str, '%H:%M').time(),
+    def book(conn, lock_timeout_ms):
+        result = book_reservation(
+            conn, location_id, date_str, time_str, party_size,
+            data['customer_name'], data['customer_email'],
+            phone=data.get('customer_phone'),
+            special_requests=data.get('special_requests', ''),
             duration_minutes=duration_minutes,
-            party_size=party_size,
-            status='confirmed', # Default for admin creation
-            special_requests=data.get('special_requests', '')
+            room_id=manual_room_id,
+            is_admin=True,
+            allow_soft_block=session.get('admin_role') == 'manager',
+            lock_timeout_ms=lock_timeout_ms,
+            reservation_number=reservation_number
         )
-        db.session.add(new_reservation)
-        db.session.flush() # Get the new reservation ID for logging
+        if not result['ok']:
+            return jsonify({'error': result['error']}), result['status']
 
          # Log admin creation
         audit_details = {
             "source": "admin",
-            "room_id": final_room_id,
-            "manual_room_assignment": manual_room_assignment,
-            "soft_block_override": soft_block_override
+            "room_id": result['room_id'],
+            "manual_room_assignment": manual_room_id is not None,
+            "soft_block_override": result['soft_block_override']
         }
         log_audit(
             admin_id=session['admin_id'],
              action='create_reservation',
             entity_type='reservation',
-            entity_id=new_reservation.id,
+            entity_id=result['reservation_id'],
             details=audit_details
         )
 
         db.session.commit()
+        invalidate_availability(location_id, reservation_date)
 
         return jsonify({
-            'id': new_reservation.id,
-            'reservation_number': reservation_number,
+            'id': result['reservation_id'],
+            'reservation_number': result['reservation_number'],
              'message': 'Reservation created successfully'
         }), 201
 
+    try:
+        # Allocated once, so a lock retry does not burn another number
+        reservation_number = next_reservation_number(location_id)
+        return run_with_lock_retries(db.session, [(location_id, reservation_date)], book)
+    except BookingLockTimeout as e:
+        print(f"Booking lock timeout creating admin reservation: {e}")
+        return jsonify({'error': 'This time slot is busy right now. Please try again.'}), 503
     except ValueError as ve:
-         # Ensure connection is released even on value errors
-         if conn: release_connection(conn)
          db.session.rollback()
          print(f"Value error creating reservation: {ve}")
          return jsonify({'error': f'Invalid input format: {ve}'}), 400
     except Exception as e:
-         # Ensure connection is released on general exceptions
-        if conn: release_connection(conn)
         db.session.rollback()
         print(f"Error creating admin reservation: {e}")
 
@@ -568,6 +664,74 @@ def create_admin_reservation():
         traceback.print_exc()
         # ----------------------------------------------------
         return jsonify({'error': 'An internal error occurred'}), 500
-    # finally:
-    #     if conn: release_connection(conn)
-    # Removing finally block as release_connection is called within try/except
\ No newline at end of file
+
+
+@bp.route('/reservations/import', methods=['POST'])
+def import_reservations_route():
+    """
+    Bulk-create reservations from a CSV or NDJSON upload (multipart 'file'
+    or the raw request body). Rows are validated and assigned rooms per
+    (location, date) in memory and inserted in one transaction; the response
+    reports the outcome of every row. dry_run=true validates without saving.
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    import_format = request.args.get('format', 'csv').lower()
+    if import_format not in IMPORT_FORMATS:
+        return jsonify({'error': f'format must be one of: {", ".join(IMPORT_FORMATS)}'}), 400
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+
+    upload = request.files.get('file')
+    body = upload.read() if upload else request.get_data()
+    try:
+        raw_rows = parse_rows(body.decode('utf-8-sig'), import_format)
+    except UnicodeDecodeError:
+        return jsonify({'error': 'The import must be UTF-8 encoded'}), 400
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    if not raw_rows:
+        return jsonify({'error': 'The import contains no rows'}), 400
+    if len(raw_rows) > Config.BULK_IMPORT_MAX_ROWS:
+        return jsonify({'error': f'An import can contain at most {Config.BULK_IMPORT_MAX_ROWS} rows'}), 400
+
+    allow_soft_block = session.get('admin_role') == 'manager'
+
+    try:
+        prepared = prepare_rows(db.session.connection().connection, raw_rows)
+
+        def load(conn):
+            report = import_reservations(conn, prepared, allow_soft_block=allow_soft_block, dry_run=dry_run)
+            if dry_run:
+                db.session.rollback()
+                return report
+
+            log_audit(
+                admin_id=session['admin_id'],
+                action='import_reservations',
+                entity_type='reservation',
+                entity_id=None,
+                details={
+                    'format': import_format,
+                    'total': report['total'],
+                    'imported': report['imported'],
+                    'failed': report['failed']
+                }
+            )
+            db.session.commit()
+            for location_id, day in report['days']:
+                invalidate_availability(location_id, day)
+            return report
+
+        report = run_with_booking_lock(db.session, booking_days(prepared), load)
+        del report['days']
+        return jsonify(report), 200 if dry_run or report['imported'] else 422
+    except BookingLockTimeout as e:
+        print(f"Booking lock timeout importing reservations: {e}")
+        return jsonify({'error': 'Some of these dates are busy right now. Please try again.'}), 503
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error importing reservations: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'An internal error occurred'}), 500
@@ -0,0 +1,47 @@
+from flask import Blueprint, jsonify, request, session
+from database import get_connection, release_connection
+
+from utils.search import search_customers, search_reservations
+
+bp = Blueprint('admin_search', __name__)
+
+MIN_TERM_LENGTH = 2
+MAX_SEARCH_LIMIT = 50
+
+
+@bp.route('/search', methods=['GET'])
+def search():
+    """
+    Ranked search over reservations (number, customer name and email) and
+    customers (name and email). Use type=reservations or type=customers to
+    search only one of them.
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    term = request.args.get('q', '').strip()
+    search_type = request.args.get('type', 'all')
+    if len(term) < MIN_TERM_LENGTH:
+        return jsonify({'error': f'q must be at least {MIN_TERM_LENGTH} characters'}), 400
+    if search_type not in ('all', 'reservations', 'customers'):
+        return jsonify({'error': 'type must be all, reservations or customers'}), 400
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), MAX_SEARCH_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    conn = None
+    try:
+        conn = get_connection()
+        result = {'query': term}
+        if search_type in ('all', 'reservations'):
+            result['reservations'] = search_reservations(conn, term, limit)
+        if search_type in ('all', 'customers'):
+            result['customers'] = search_customers(conn, term, limit)
+        return jsonify(result)
+    except Exception as e:
+        print(f"Error searching: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+    finally:
+        if conn: release_connection(conn)
@@ -1,18 +1,24 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 import datetime
-from models import Location, Reservation, Customer, Room
+import json
+from models import Location, Room
 from database import db, get_connection, release_connection # Keep connection pool for utils
 
-# Keep using utils, which still use psycopg2 connection pool
-from utils.room_assignment import (
-    weighted_random_room_selection,
-    generate_reservation_number,
-    validate_reservation_constraints
+from utils.booking import book_reservation
+from utils.reservation_numbers import next_reservation_number
+from utils.availability import (
+    get_day_availability,
+    iter_range_availability,
+    summarize_day,
+    invalidate_availability
 )
-from utils.time_utils import generate_time_slots, is_valid_booking_time
+from utils.locking import run_with_lock_retries, BookingLockTimeout
+from utils.time_utils import is_valid_booking_time
 
 bp = Blueprint('reservations', __name__)
 
+MAX_AVAILABILITY_RANGE_DAYS = 92 # A quarter is plenty for calendar views
+
 @bp.route('/locations', methods=['GET'])
 def get_locations():
     """Get all available locations using ORM."""
@@ -28,7 +34,7 @@ def get_locations():
 
 @bp.route('/availability', methods=['GET'])
 def availability():
-    """Get availability using utils (which use psycopg2)."""
+    """Get availability for every slot of a date from one snapshot of the day."""
     location_id = request.args.get('location_id')
     date_str = request.args.get('date')
 
@@ -42,60 +48,17 @@ def availability():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
 
-    # Generate time slots for the date (from utils)
-    slots = generate_time_slots(date_obj)
+    try:
+        location_id = int(location_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid location_id format'}), 400
 
     conn = None
     try:
         conn = get_connection() # Get connection for utils
-        slots_with_availability = []
-
-        # Get location limits using ORM for efficiency before looping
-        location = db.session.get(Location, location_id)
-        if not location:
-            release_connection(conn)
+        slots_with_availability = get_day_availability(conn, location_id, date_obj)
+        if slots_with_availability is None:
             return jsonify({'error': 'Location not found'}), 404
-        max_guests = location.max_guests_per_slot
-        max_reservations = location.max_reservations_per_slot
-
-        for slot in slots:
-            # Validate constraints for this slot using utils
-            is_valid, _ = validate_reservation_constraints(
-                conn, int(location_id), date_str, slot, 1, 60 # Check feasibility for 1 guest
-            )
-
-            # Get current occupancy (could potentially be optimized with ORM later)
-            start_dt = datetime.datetime.strptime(slot, '%H:%M')
-            end_dt = start_dt + datetime.timedelta(minutes=60)
-            end_time = end_dt.strftime('%H:%M')
-
-            # Use raw SQL within utils for this complex overlap check for now
-            with conn.cursor() as cursor:
-                 cursor.execute("""
-                    SELECT
-                        COALESCE(SUM(party_size), 0) as total_guests,
-                        COUNT(*) as total_reservations
-                    FROM reservations
-                    WHERE location_id = %s
-                    AND date = %s
-                    AND status = 'confirmed'
-                    AND time < %s::time
-                    AND (time + (duration_minutes || ' minutes')::interval)::time > %s::time
-                """, (location_id, date_str, end_time, slot))
-                 result = cursor.fetchone()
-
-            total_guests = result[0] if result else 0
-            total_reservations = result[1] if result else 0
-
-            slots_available = max_reservations - total_reservations
-            guests_available = max_guests - total_guests
-
-            slots_with_availability.append({
-                'time': slot,
-                'available': is_valid,
-                'slotsLeft': max(0, slots_available),
-                'guestsAvailable': max(0, guests_available)
-            })
 
         return jsonify({
             'date': date_str,
@@ -109,6 +72,68 @@ def availability():
             release_connection(conn)
 
 
+@bp.route('/availability/range', methods=['GET'])
+def availability_range():
+    """Stream per-day summaries and slot availability for a date range."""
+    location_id = request.args.get('location_id')
+    start_str = request.args.get('start_date')
+    end_str = request.args.get('end_date')
+    include_slots = request.args.get('include_slots', 'true').lower() != 'false'
+
+    if not location_id or not start_str or not end_str:
+        return jsonify({'error': 'location_id, start_date and end_date parameters are required'}), 400
+
+    try:
+        start_date = datetime.datetime.strptime(start_str, '%Y-%m-%d').date()
+        end_date = datetime.datetime.strptime(end_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    if start_date < datetime.date.today():
+        return jsonify({'error': 'Cannot check availability for past dates'}), 400
+    if end_date < start_date:
+        return jsonify({'error': 'end_date must not be before start_date'}), 400
+    if (end_date - start_date).days >= MAX_AVAILABILITY_RANGE_DAYS:
+        return jsonify({'error': f'Date range cannot exceed {MAX_AVAILABILITY_RANGE_DAYS} days'}), 400
+
+    try:
+        location_id = int(location_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid location_id format'}), 400
+
+    conn = None
+    try:
+        conn = get_connection()
+        days = iter_range_availability(conn, location_id, start_date, end_date)
+        if days is None:
+            release_connection(conn)
+            return jsonify({'error': 'Location not found'}), 404
+    except Exception as e:
+        if conn: release_connection(conn)
+        print(f"Error checking range availability: {e}")
+        return jsonify({'error': 'An internal error occurred during availability check'}), 500
+
+    def generate():
+        # Write the JSON document one day at a time
+        try:
+            yield '{"location_id": %d, "start_date": %s, "end_date": %s, "days": [' % (
+                location_id, json.dumps(start_str), json.dumps(end_str)
+            )
+            for index, (day, slots) in enumerate(days):
+                entry = {'date': day.isoformat(), 'summary': summarize_day(slots)}
+                if include_slots:
+                    entry['slots'] = slots
+                yield (',' if index else '') + json.dumps(entry)
+            yield ']}'
+        except Exception as e:
+            # Headers are already sent, so the truncated body signals the failure
+            print(f"Error streaming range availability: {e}")
+        finally:
+            release_connection(conn)
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
 @bp.route('/', methods=['POST'])
 def create_reservation():
     """Create a new reservation using ORM and utils."""
@@ -141,89 +166,46 @@ def create_reservation():
     location_id = int(data['location_id'])
     duration_minutes = 60 # Default
 
-    conn = None # For utils
-    try:
-        # --- Use utility functions (with psycopg2 connection) ---
-        conn = get_connection()
-        # Validate reservation constraints using utils
-        is_valid, error_msg = validate_reservation_constraints(
-            conn, location_id, data['date'], data['time'], party_size, duration_minutes
-        )
-        if not is_valid:
-            release_connection(conn)
-            return jsonify({'error': error_msg}), 400
-
-        # Select room using weighted-random algorithm (utils)
-        selected_room = weighted_random_room_selection(
-            conn, location_id, data['date'], data['time'], party_size, duration_minutes
-        )
-        if not selected_room:
-            release_connection(conn)
-            return jsonify({'error': 'No rooms available for this time slot'}), 400
-
-        release_connection(conn) # Done with utils
-        # --- End utility usage ---
-
-        # Get location code for reservation number using ORM
-        location = db.session.get(Location, location_id)
-        if not location:
-            return jsonify({'error': 'Invalid location selected'}), 400
-        location_code = location.code
-
-        # Generate reservation number (utils)
-        reservation_number = generate_reservation_number(location_code)
-
-        # Find or create customer using ORM
-        customer = db.session.query(Customer).filter_by(email=data['email']).first()
-        if customer:
-            customer.name = data['name']
-            customer.phone = data.get('phone')
-            customer.updated_at = datetime.datetime.now()
-        else:
-            customer = Customer(
-                name=data['name'],
-                email=data['email'],
-                phone=data.get('phone'),
-                newsletter_signup=False # Default for new reservation customer
-            )
-            db.session.add(customer)
-            db.session.flush() # Get ID
-        
-        customer_id = customer.id
-
-        # Create reservation object
-        new_reservation = Reservation(
-            reservation_number=reservation_number,
-            customer_id=customer_id,
-            location_id=location_id,
-            room_id=selected_room['id'],
-            date=reservation_date,
-            time=datetime.datetime.strptime(data['time'], '%H:%M').time(),
+    def book(conn, lock_timeout_ms):
+        # One round trip: lock, validate, assign a room, upsert the customer
+        # and insert the reservation (see migrations/005_book_reservation.sql)
+        result = book_reservation(
+            conn, location_id, data['date'], data['time'], party_size,
+            data['name'], data['email'],
+            phone=data.get('phone'),
+            special_requests=data.get('special_requests', ''),
             duration_minutes=duration_minutes,
-            party_size=party_size,
-            status='confirmed',
-            special_requests=data.get('special_requests', '')
+            lock_timeout_ms=lock_timeout_ms,
+            reservation_number=reservation_number
         )
-        db.session.add(new_reservation)
+        if not result['ok']:
+            return jsonify({'error': result['error']}), result['status']
+
         db.session.commit()
+        invalidate_availability(location_id, reservation_date)
 
         return jsonify({
-            'id': new_reservation.id,
-            'reservationNumber': reservation_number,
-            'message': f'Reservation confirmed! Your reservation number is {reservation_number}',
+            'id': result['reservation_id'],
+            'reservationNumber': result['reservation_number'],
+            'message': f'Reservation confirmed! Your reservation number is {result["reservation_number"]}',
             'room': { # Provide room details back
-                'code': selected_room['code'],
-                'name': selected_room['name']
+                'code': result['room_code'],
+                'name': result['room_name']
             }
         }), 201
 
+    try:
+        # Allocated once, so a lock retry does not burn another number
+        reservation_number = next_reservation_number(location_id)
+        return run_with_lock_retries(db.session, [(location_id, reservation_date)], book)
+    except BookingLockTimeout as e:
+        print(f"Booking lock timeout: {e}")
+        return jsonify({'error': 'This time slot is very busy right now. Please try again.'}), 503
     except ValueError as ve:
-         if conn: release_connection(conn)
          db.session.rollback()
          print(f"Value error during reservation creation: {ve}")
          return jsonify({'error': f'Invalid input data format: {ve}'}), 400
     except Exception as e:
-        if conn: release_connection(conn)
         db.session.rollback()
         print(f"Error creating reservation: {e}")
         return jsonify({'error': 'An internal server error occurred'}), 500
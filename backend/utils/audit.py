@@ -0,0 +1,304 @@
+"""
+Audit Log
+One log_audit() for every route. Entries are staged on the SQLAlchemy
+session and only go out once its transaction commits, so a rolled back
+change never leaves an audit row behind. In async mode the committed
+entries are handed to a writer thread that inserts them in batches with
+one multi-row INSERT, off the request path. Actions listed in
+AUDIT_SYNC_ACTIONS (or logged with durable=True), and every action in sync
+mode, are added to the request transaction instead and commit with it.
+"""
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import Json, execute_values
+from psycopg2.pool import PoolError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import Config
+from database import db, get_connection, release_connection
+from models import AuditLog
+
+MODES = ('sync', 'async')
+
+# A typo here would otherwise silently fall back to async; refuse to start instead
+if Config.AUDIT_MODE not in MODES:
+    raise ValueError(f"Invalid AUDIT_MODE {Config.AUDIT_MODE!r} (use {', '.join(MODES)})")
+
+# Key of the entries staged on a session until it commits
+_PENDING_KEY = 'pending_audit_entries'
+
+_STOP = object()
+
+# Errors worth retrying a batch for: the database or the pool, not the entries
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError)
+
+
+def changed_fields(old: Dict, new: Dict) -> Dict:
+    """{field: {'old': ..., 'new': ...}} for the fields of new whose value differs from old."""
+    return {
+        key: {'old': old.get(key), 'new': value}
+        for key, value in new.items()
+        if old.get(key) != value
+    }
+
+
+def _is_sync(action: str, durable: Optional[bool]) -> bool:
+    if durable is not None:
+        return durable
+    return Config.AUDIT_MODE == 'sync' or action in Config.AUDIT_SYNC_ACTIONS
+
+
+def log_audit(admin_id, action, entity_type, entity_id, details, durable=None):
+    """
+    Record an admin action. Call it inside the route's transaction, before
+    db.session.commit(); nothing is written if the transaction rolls back.
+    durable=True writes the entry in the same transaction as the change,
+    durable=False always queues it; by default the configured mode decides.
+    """
+    entry = {
+        'admin_id': admin_id,
+        'action': action,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'details': details,
+        'created_at': datetime.now(timezone.utc)
+    }
+    try:
+        if _is_sync(action, durable):
+            db.session.add(AuditLog(**entry))
+        else:
+            db.session.info.setdefault(_PENDING_KEY, []).append(entry)
+    except Exception as e:
+        print(f"Error logging audit trail: {e}")
+
+
+def insert_entries(conn, entries: List[Dict]) -> None:
+    """Insert audit entries with one multi-row INSERT and commit."""
+    with conn.cursor() as cursor:
+        execute_values(cursor, """
+            INSERT INTO audit_log (admin_id, action, entity_type, entity_id, details, created_at)
+            VALUES %s
+        """, [
+            (
+                entry['admin_id'], entry['action'], entry['entity_type'],
+                entry['entity_id'], Json(entry['details'], dumps=_dumps), entry['created_at']
+            )
+            for entry in entries
+        ], page_size=len(entries))
+    conn.commit()
+
+
+def _dumps(value) -> str:
+    # Request payloads may carry dates and other values JSON cannot encode
+    return json.dumps(value, default=str)
+
+
+class AuditWriter:
+    """
+    Bounded queue of committed audit entries and the thread that writes
+    them. The thread waits up to flush_interval for a batch of batch_size
+    entries, then inserts whatever it has. When the queue is full, enqueue()
+    blocks up to enqueue_timeout and then writes the entries itself on the
+    caller's thread, so a slow database slows admin writes down instead of
+    losing entries or growing memory.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        enqueue_timeout: float = 0.5,
+        max_backoff: float = 30.0,
+        max_attempts: int = 8
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.inline_writes = 0
+        self.lost = 0
+
+    def start(self) -> None:
+        """Start the writer thread (idempotent)."""
+        with self._lock:
+            if self._stopping:
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, entries: List[Dict]) -> None:
+        self.start()
+        for index, entry in enumerate(entries):
+            if self._stopping:
+                self._write_inline(entries[index:])
+                return
+            try:
+                self._queue.put(entry, timeout=self.enqueue_timeout)
+            except queue.Full:
+                self._write_inline(entries[index:])
+                return
+
+    def _write_inline(self, entries: List[Dict]) -> None:
+        self.inline_writes += len(entries)
+        conn = None
+        try:
+            conn = get_connection()
+            insert_entries(conn, entries)
+            self.written += len(entries)
+        except Exception as e:
+            self._lose(entries, e)
+        finally:
+            if conn:
+                release_connection(conn)
+
+    def _lose(self, entries: List[Dict], error: Exception) -> None:
+        # Last resort: the entries end up in the process log
+        self.lost += len(entries)
+        print(f"Error writing audit entries, {len(entries)} lost: {error}")
+        for entry in entries:
+            print(f"Lost audit entry: {_dumps(entry)}")
+
+    def _next_batch(self) -> Tuple[List[Dict], bool]:
+        """
+        Block for the first entry, then collect more until the batch is full
+        or flush_interval passes. Returns (batch, stop requested).
+        """
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _insert_batch(self, batch: List[Dict]) -> None:
+        conn = None
+        broken = False
+        try:
+            conn = get_connection()
+            insert_entries(conn, batch)
+        except Exception as e:
+            broken = isinstance(e, TRANSIENT_ERRORS)
+            if conn and not broken:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            raise
+        finally:
+            if conn:
+                release_connection(conn, close=broken)
+        self.written += len(batch)
+        self.batches += 1
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        """
+        Insert a batch, retrying connection and pool errors with backoff up
+        to max_attempts times. Any other error comes from the entries
+        themselves, so the batch is split in halves until the failing entry
+        is isolated and lost on its own.
+        """
+        backoff = 1.0
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._insert_batch(batch)
+                return
+            except TRANSIENT_ERRORS as e:
+                self.failures += 1
+                if self._stopping or attempt == self.max_attempts:
+                    self._lose(batch, e)
+                    return
+                print(f"Error writing audit batch (retrying in {backoff:.0f}s): {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            except Exception as e:
+                self.failures += 1
+                if len(batch) == 1:
+                    self._lose(batch, e)
+                    return
+                middle = len(batch) // 2
+                self._write_batch(batch[:middle])
+                self._write_batch(batch[middle:])
+                return
+
+    def _run(self) -> None:
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self._write_batch(batch)
+            if stop:
+                return
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write everything still queued and stop the thread (registered with atexit)."""
+        with self._lock:
+            self._stopping = True
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"Audit writer did not finish within {timeout}s; about {self._queue.qsize()} entries unwritten")
+
+    def stats(self) -> Dict:
+        return {
+            'mode': Config.AUDIT_MODE,
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'failures': self.failures,
+            'inline_writes': self.inline_writes,
+            'lost': self.lost
+        }
+
+
+audit_writer = AuditWriter(
+    maxsize=Config.AUDIT_QUEUE_SIZE,
+    batch_size=Config.AUDIT_BATCH_SIZE,
+    flush_interval=Config.AUDIT_FLUSH_MS / 1000,
+    enqueue_timeout=Config.AUDIT_ENQUEUE_TIMEOUT_MS / 1000
+)
+atexit.register(audit_writer.close)
+
+
+@event.listens_for(Session, 'after_commit')
+def _queue_committed_entries(session) -> None:
+    entries = session.info.pop(_PENDING_KEY, None)
+    if entries:
+        audit_writer.enqueue(entries)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_rolled_back_entries(session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
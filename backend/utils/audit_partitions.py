@@ -0,0 +1,96 @@
+"""
+Audit Log Partitions
+Background thread that keeps the monthly audit_log partitions created
+ahead (see migrations/011_audit_log_partitioning.sql and 013). Every worker
+runs it, whatever else is enabled; the database function lets one caller
+through at a time and does nothing when the partitions already exist.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import Config
+from database import get_connection, release_connection
+
+_maintainer = None
+_maintainer_lock = threading.Lock()
+
+
+def ensure_audit_partitions(conn, months_ahead: int) -> int:
+    """Create the audit_log partitions of this month and months_ahead more. Returns how many were new."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT audit_log_ensure_partitions(CURRENT_DATE, %s)", (months_ahead,))
+        created = cursor.fetchone()[0]
+    conn.commit()
+    return created
+
+
+class AuditPartitionMaintainer(threading.Thread):
+    """Runs ensure_audit_partitions() at start and then every interval seconds."""
+
+    def __init__(self, months_ahead: int = 3, interval: float = 3600.0):
+        super().__init__(name='audit-partitions', daemon=True)
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self.runs = 0
+        self.created = 0
+        self.last_run: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run_once(self) -> int:
+        conn = get_connection()
+        try:
+            created = ensure_audit_partitions(conn, self.months_ahead)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            release_connection(conn)
+        self.runs += 1
+        self.created += created
+        self.last_run = datetime.now().isoformat(timespec='seconds')
+        return created
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                # Rows of a month without a partition go to audit_log_default
+                # meanwhile and are moved out when it is created
+                self.last_error = str(e)
+                print(f"Error creating audit_log partitions: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stats(self) -> Dict:
+        return {
+            'months_ahead': self.months_ahead,
+            'interval_seconds': self.interval,
+            'runs': self.runs,
+            'created': self.created,
+            'last_run': self.last_run,
+            'last_error': self.last_error
+        }
+
+
+def start_partition_maintenance() -> AuditPartitionMaintainer:
+    """Start this worker's partition maintenance thread (idempotent)."""
+    global _maintainer
+    with _maintainer_lock:
+        if _maintainer is None or not _maintainer.is_alive():
+            _maintainer = AuditPartitionMaintainer(
+                months_ahead=Config.AUDIT_LOG_PARTITIONS_AHEAD,
+                interval=Config.AUDIT_LOG_PARTITION_CHECK_SECONDS
+            )
+            _maintainer.start()
+        return _maintainer
+
+
+def partition_stats() -> Optional[Dict]:
+    """Return the maintenance thread's counters, or None if it is not running."""
+    return _maintainer.stats() if _maintainer else None
@@ -0,0 +1,344 @@
+"""
+Availability Engine
+Computes per-slot availability for a location and date from a single
+snapshot of the day's reservations and blocks.
+"""
+from typing import Optional, List, Dict, Tuple, Iterator
+from datetime import datetime, timedelta, date as date_type
+from itertools import groupby
+
+from config import Config
+from utils.cache import TTLCache
+from utils.interval_index import IntervalIndex
+from utils.change_feed import register_handler
+from utils.time_utils import generate_time_slots
+
+# Day availability keyed by (location_id, date); see invalidate_availability
+availability_cache = TTLCache(
+    maxsize=Config.AVAILABILITY_CACHE_SIZE,
+    ttl=Config.AVAILABILITY_CACHE_TTL
+)
+
+
+def _to_minutes(value) -> int:
+    """Convert a datetime.time (or 'HH:MM' string) to minutes since midnight."""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%H:%M').time()
+    return value.hour * 60 + value.minute
+
+
+def load_day_schedule(
+    conn,
+    location_id: int,
+    date: str
+) -> Optional[Tuple[Dict, List[Tuple[int, int, int]], List[Tuple[int, int]]]]:
+    """
+    Load everything needed to answer availability for one location and date.
+    Returns (limits, reservations, blocks) or None if the location does not exist.
+
+    - limits: {'max_guests': int, 'max_reservations': int}
+    - reservations: list of (start_minute, end_minute, party_size) for confirmed bookings
+    - blocks: list of (start_minute, end_minute) for location-wide hard blocks
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT max_guests_per_slot, max_reservations_per_slot
+            FROM locations
+            WHERE id = %s
+        """, (location_id,))
+        result = cursor.fetchone()
+        if not result:
+            return None
+        limits = {'max_guests': result[0], 'max_reservations': result[1]}
+
+        # Confirmed reservations overlapping the day (including bookings from
+        # the previous evening that run past midnight) and location-wide hard
+        # blocks in one round trip. Minutes are relative to midnight of the date.
+        cursor.execute("""
+            SELECT
+                'R',
+                (EXTRACT(EPOCH FROM lower(period) - %(day)s::timestamp) / 60)::int,
+                (EXTRACT(EPOCH FROM upper(period) - %(day)s::timestamp) / 60)::int,
+                party_size
+            FROM reservations
+            WHERE location_id = %(location_id)s
+            AND status = 'confirmed'
+            AND period && tsrange(%(day)s::timestamp, %(day)s::timestamp + INTERVAL '1 day', '[)')
+            UNION ALL
+            SELECT
+                'B',
+                (EXTRACT(EPOCH FROM start_time) / 60)::int,
+                (EXTRACT(EPOCH FROM end_time) / 60)::int,
+                NULL
+            FROM reservation_blocks
+            WHERE location_id = %(location_id)s
+            AND room_id IS NULL
+            AND block_type = 'hard'
+            AND %(day)s::date BETWEEN start_date AND end_date
+        """, {'location_id': location_id, 'day': date})
+
+        reservations = []
+        blocks = []
+        for kind, start_minute, end_minute, party_size in cursor.fetchall():
+            if kind == 'R':
+                reservations.append((start_minute, end_minute, party_size))
+            else:
+                blocks.append((start_minute, end_minute))
+
+    return limits, reservations, blocks
+
+
+def compute_slot_availability(
+    slots: List[str],
+    reservations: List[Tuple[int, int, int]],
+    blocks: List[Tuple[int, int]],
+    max_guests: int,
+    max_reservations: int,
+    duration_minutes: int = 60,
+    party_size: int = 1
+) -> List[Dict]:
+    """
+    Compute availability for every slot from interval indexes of the day's
+    reservations and blocks (see utils/interval_index.py), so each slot's
+    overlap totals cost O(log n).
+    """
+    reservation_index = IntervalIndex.from_intervals(reservations)
+    block_index = IntervalIndex.from_intervals((start, end, 1) for start, end in blocks)
+
+    result = []
+    for slot in slots:
+        window_start = _to_minutes(slot)
+        window_end = window_start + duration_minutes
+
+        total_guests, total_reservations = reservation_index.overlap(window_start, window_end)
+        blocked = block_index.overlap(window_start, window_end)[1] > 0
+        is_valid = (
+            not blocked
+            and total_guests + party_size <= max_guests
+            and total_reservations + 1 <= max_reservations
+        )
+
+        result.append({
+            'time': slot,
+            'available': is_valid,
+            'slotsLeft': max(0, max_reservations - total_reservations),
+            'guestsAvailable': max(0, max_guests - total_guests)
+        })
+
+    return result
+
+
+def get_day_availability(
+    conn,
+    location_id: int,
+    date_obj: date_type
+) -> Optional[List[Dict]]:
+    """
+    Get availability for every dining slot of a date, served from
+    availability_cache when possible.
+    Returns None if the location does not exist.
+    """
+    return availability_cache.get_or_compute(
+        (location_id, date_obj),
+        lambda: _compute_day_availability(conn, location_id, date_obj)
+    )
+
+
+def _compute_day_availability(
+    conn,
+    location_id: int,
+    date_obj: date_type
+) -> Optional[List[Dict]]:
+    """Compute day availability straight from the database."""
+    date_str = date_obj.isoformat()
+    schedule = load_day_schedule(conn, location_id, date_str)
+    if schedule is None:
+        return None
+
+    limits, reservations, blocks = schedule
+    return compute_slot_availability(
+        generate_time_slots(date_obj),
+        reservations,
+        blocks,
+        limits['max_guests'],
+        limits['max_reservations']
+    )
+
+
+def _as_date(value) -> date_type:
+    """Accept a date, datetime or 'YYYY-MM-DD' string."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+def invalidate_availability(
+    location_id,
+    start_date,
+    end_date=None
+) -> int:
+    """
+    Drop cached availability for a location on every date in
+    [start_date, end_date] (a single date when end_date is omitted).
+    Call after the mutating transaction has committed.
+    Returns the number of cache entries dropped.
+    """
+    location_id = int(location_id)
+    start_date = _as_date(start_date)
+    end_date = _as_date(end_date) if end_date is not None else start_date
+
+    return availability_cache.invalidate_matching(
+        lambda key: key[0] == location_id and start_date <= key[1] <= end_date
+    )
+
+
+def handle_change(change: Dict) -> None:
+    """
+    Change feed handler: evict availability touched by a write in any worker.
+    Reservation and block changes carry a date range; room and location
+    changes affect every date of the location; a reset drops everything.
+    """
+    entity = change['entity']
+    location_id = change['location_id']
+
+    if entity == '*' or location_id is None:
+        availability_cache.clear()
+    elif entity in ('reservation', 'reservation_block') and change['start_date']:
+        invalidate_availability(location_id, change['start_date'], change['end_date'])
+    else:
+        location_id = int(location_id)
+        availability_cache.invalidate_matching(lambda key: key[0] == location_id)
+
+
+register_handler(handle_change)
+
+
+def _row_minutes(rows) -> List[Tuple[int, int, int]]:
+    """Convert (date, time, duration, guests) rows to (start, end, guests) minutes."""
+    result = []
+    for _, start, duration, guests in rows:
+        start_minute = _to_minutes(start)
+        result.append((start_minute, start_minute + duration, guests))
+    return result
+
+
+def _spillover(reservations: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Shift the part of a day's bookings that runs past midnight onto the next day's minutes."""
+    return [
+        (start - 1440, end - 1440, guests)
+        for start, end, guests in reservations
+        if end > 1440
+    ]
+
+
+def summarize_day(slots: List[Dict]) -> Dict:
+    """
+    Build a compact per-day summary from slot availability.
+    Status is 'open' when every slot is bookable, 'full' when none is,
+    and 'partial' otherwise.
+    """
+    available_slots = sum(1 for slot in slots if slot['available'])
+    if available_slots == len(slots):
+        status = 'open'
+    elif available_slots == 0:
+        status = 'full'
+    else:
+        status = 'partial'
+
+    return {
+        'status': status,
+        'availableSlots': available_slots,
+        'totalSlots': len(slots)
+    }
+
+
+def iter_range_availability(
+    conn,
+    location_id: int,
+    start_date: date_type,
+    end_date: date_type
+) -> Optional[Iterator[Tuple[date_type, List[Dict]]]]:
+    """
+    Compute availability for every date in [start_date, end_date].
+    Returns None if the location does not exist, otherwise an iterator of
+    (date, slots) pairs in date order.
+
+    Reservations for the whole range come from one pass over a server-side
+    cursor ordered by date, so only one day is held in memory at a time.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT max_guests_per_slot, max_reservations_per_slot
+            FROM locations
+            WHERE id = %s
+        """, (location_id,))
+        result = cursor.fetchone()
+        if not result:
+            return None
+        max_guests, max_reservations = result
+
+        # Location-wide hard blocks touching any day of the range
+        cursor.execute("""
+            SELECT start_date, end_date, start_time, end_time
+            FROM reservation_blocks
+            WHERE location_id = %s
+            AND room_id IS NULL
+            AND block_type = 'hard'
+            AND start_date <= %s
+            AND end_date >= %s
+        """, (location_id, end_date, start_date))
+        range_blocks = cursor.fetchall()
+
+    def _generate():
+        cursor = conn.cursor(name='availability_range')
+        cursor.itersize = 2000
+        try:
+            # The day before start_date is read too, for bookings that run past midnight
+            cursor.execute("""
+                SELECT date, time, duration_minutes, party_size
+                FROM reservations
+                WHERE location_id = %s
+                AND status = 'confirmed'
+                AND period && tsrange(%s::timestamp, %s::timestamp + INTERVAL '1 day', '[)')
+                ORDER BY date
+            """, (location_id, start_date, end_date))
+
+            by_date = groupby(cursor, key=lambda row: row[0])
+            pending = next(by_date, None)
+
+            # Minutes past midnight carried over from the previous date
+            carried = []
+            if pending and pending[0] < start_date:
+                carried = _spillover(_row_minutes(pending[1]))
+                pending = next(by_date, None)
+
+            current = start_date
+            while current <= end_date:
+                reservations = carried
+                carried = []
+                if pending and pending[0] == current:
+                    own = _row_minutes(pending[1])
+                    reservations = reservations + own
+                    carried = _spillover(own)
+                    pending = next(by_date, None)
+
+                blocks = [
+                    (_to_minutes(start_time), _to_minutes(end_time))
+                    for block_start, block_end, start_time, end_time in range_blocks
+                    if block_start <= current <= block_end
+                ]
+
+                yield current, compute_slot_availability(
+                    generate_time_slots(current),
+                    reservations,
+                    blocks,
+                    max_guests,
+                    max_reservations
+                )
+                current += timedelta(days=1)
+        finally:
+            cursor.close()
+
+    return _generate()
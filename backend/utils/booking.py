@@ -0,0 +1,63 @@
+"""
+Booking
+Creates reservations in one round trip through the book_reservation()
+database function (see migrations/005_book_reservation.sql).
+"""
+from typing import Optional, Dict
+
+from config import Config
+from utils.reservation_numbers import next_reservation_number
+
+BOOKING_RESULT_FIELDS = (
+    'ok', 'error', 'status', 'reservation_id', 'reservation_number',
+    'room_id', 'room_code', 'room_name', 'soft_block_override'
+)
+
+
+def book_reservation(
+    conn,
+    location_id: int,
+    date: str,
+    start_time: str,
+    party_size: int,
+    name: str,
+    email: str,
+    phone: Optional[str] = None,
+    special_requests: Optional[str] = None,
+    duration_minutes: int = 60,
+    room_id: Optional[int] = None,
+    is_admin: bool = False,
+    allow_soft_block: bool = True,
+    lock_timeout_ms: Optional[int] = None,
+    reservation_number: Optional[str] = None
+) -> Dict:
+    """
+    Lock the (location, date), validate the constraints, pick a room (or
+    check room_id), upsert the customer and insert the reservation in the
+    connection's current transaction. The caller commits.
+    The reservation number comes from the collision-free allocator unless
+    one is given; callers that retry should allocate it once and pass it in.
+
+    Returns a dict with 'ok'; on failure 'error' and the HTTP 'status' to
+    answer with, on success the new reservation's id, number and room.
+    Raises psycopg2.errors.LockNotAvailable if the lock is not granted in
+    lock_timeout_ms (use it with utils.locking.run_with_lock_retries).
+    """
+    if lock_timeout_ms is None:
+        lock_timeout_ms = Config.BOOKING_LOCK_TIMEOUT_MS
+    if reservation_number is None:
+        reservation_number = next_reservation_number(location_id)
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM book_reservation(
+                %s, %s::date, %s::time, %s, %s,
+                %s, %s, %s, %s,
+                %s, %s, %s, %s, %s
+            )
+        """, (
+            location_id, date, start_time, party_size, duration_minutes,
+            name, email, phone, special_requests,
+            room_id, is_admin, allow_soft_block, lock_timeout_ms, reservation_number
+        ))
+        return dict(zip(BOOKING_RESULT_FIELDS, cursor.fetchone()))
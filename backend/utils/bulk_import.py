@@ -0,0 +1,353 @@
+"""
+Bulk reservation import
+Loads many reservations at once from CSV or NDJSON. Rows are grouped by
+(location, date) and validated and placed against one in-memory DayIndex
+per group (see utils/interval_index.py), with the same rules as
+book_reservation(). Customers are upserted and reservations inserted with
+one execute_values statement each. The caller holds the booking locks of
+every group (see booking_days) and commits.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from utils.interval_index import load_day_index
+from utils.reservation_numbers import next_reservation_number
+from utils.room_assignment import choose_weighted_room, get_candidate_rooms_from_index
+
+FORMATS = ('csv', 'ndjson')
+STATUSES = ('confirmed', 'cancelled', 'no-show', 'completed')
+PAGE_SIZE = 1000
+
+
+class ImportFormatError(ValueError):
+    """Raised when the import body cannot be parsed at all."""
+
+
+def parse_rows(text: str, import_format: str) -> List[Dict]:
+    """Raw rows (dicts of strings or JSON values) from a CSV or NDJSON body."""
+    if import_format == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise ImportFormatError('CSV header row is missing')
+        return [
+            {key.strip(): value for key, value in row.items() if key}
+            for row in reader
+        ]
+
+    rows = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise ImportFormatError(f'Line {line_number} is not valid JSON: {e}')
+        if not isinstance(row, dict):
+            raise ImportFormatError(f'Line {line_number} is not a JSON object')
+        rows.append(row)
+    return rows
+
+
+def _text(raw: Dict, key: str) -> Optional[str]:
+    value = raw.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _int(raw: Dict, key: str) -> Optional[int]:
+    value = _text(raw, key)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{key} must be an integer')
+
+
+def normalize_row(raw: Dict) -> Dict:
+    """
+    Validate the fields of one raw row and convert them. Raises ValueError
+    with a message for the report.
+    """
+    missing = [
+        key for key in ('date', 'time', 'party_size', 'customer_name', 'customer_email')
+        if _text(raw, key) is None
+    ]
+    if _text(raw, 'location_id') is None and _text(raw, 'location_code') is None:
+        missing.insert(0, 'location_id or location_code')
+    if missing:
+        raise ValueError(f'Missing required fields: {", ".join(missing)}')
+
+    try:
+        date = datetime.strptime(_text(raw, 'date'), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    time_str = _text(raw, 'time')
+    try:
+        start = datetime.strptime(time_str, '%H:%M:%S' if time_str.count(':') == 2 else '%H:%M').time()
+    except ValueError:
+        raise ValueError('Invalid time format. Use HH:MM')
+
+    party_size = _int(raw, 'party_size')
+    if not 1 <= party_size <= 30:
+        raise ValueError('Party size must be between 1 and 30 for admin bookings.')
+    duration_minutes = _int(raw, 'duration_minutes') or 60
+    if duration_minutes <= 0:
+        raise ValueError('duration_minutes must be positive')
+
+    status = _text(raw, 'status') or 'confirmed'
+    if status not in STATUSES:
+        raise ValueError(f'Invalid status (use {", ".join(STATUSES)})')
+
+    return {
+        'location_id': _int(raw, 'location_id'),
+        'location_code': _text(raw, 'location_code'),
+        'room_id': _int(raw, 'room_id'),
+        'room_code': _text(raw, 'room_code'),
+        'date': date,
+        'time': start,
+        'start_minute': start.hour * 60 + start.minute,
+        'duration_minutes': duration_minutes,
+        'party_size': party_size,
+        'status': status,
+        'name': _text(raw, 'customer_name'),
+        'email': _text(raw, 'customer_email'),
+        'phone': _text(raw, 'customer_phone'),
+        'special_requests': _text(raw, 'special_requests') or '',
+        'reservation_number': _text(raw, 'reservation_number')
+    }
+
+
+def prepare_rows(conn, raw_rows: List[Dict]) -> List[Dict]:
+    """
+    Normalize every row and resolve location and room codes to ids.
+    Returns one entry per input row: {'row': n, 'data': {...}} or
+    {'row': n, 'error': '...'} (n counts data rows from 1).
+    """
+    prepared = []
+    for number, raw in enumerate(raw_rows, start=1):
+        try:
+            prepared.append({'row': number, 'data': normalize_row(raw)})
+        except ValueError as e:
+            prepared.append({'row': number, 'error': str(e)})
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT id, code, max_guests_per_slot, max_reservations_per_slot FROM locations
+        """)
+        locations = {row[0]: row for row in cursor.fetchall()}
+        cursor.execute("SELECT id, code, location_id FROM rooms")
+        rooms = {row[0]: row for row in cursor.fetchall()}
+    location_ids = {code: location_id for location_id, code, _, _ in locations.values()}
+    room_ids = {code: room_id for room_id, code, _ in rooms.values()}
+
+    for entry in prepared:
+        data = entry.get('data')
+        if data is None:
+            continue
+        location_id = data['location_id'] or location_ids.get(data['location_code'])
+        if location_id not in locations:
+            entry['error'] = 'Invalid location.'
+            del entry['data']
+            continue
+        data['location_id'] = location_id
+        data['location'] = locations[location_id]
+
+        if data['room_code'] is not None and data['room_id'] is None:
+            data['room_id'] = room_ids.get(data['room_code'])
+            if data['room_id'] is None:
+                entry['error'] = 'Selected room not found'
+                del entry['data']
+                continue
+        if data['room_id'] is not None:
+            room = rooms.get(data['room_id'])
+            if room is None or room[2] != location_id:
+                entry['error'] = 'Selected room not found'
+                del entry['data']
+    return prepared
+
+
+def booking_days(prepared: Iterable[Dict]) -> List[Tuple[int, object]]:
+    """The (location_id, date) booking locks an import of the rows needs."""
+    return sorted({
+        (entry['data']['location_id'], entry['data']['date'])
+        for entry in prepared if 'data' in entry
+    })
+
+
+def _place(day_index, data: Dict, allow_soft_block: bool) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Check one row against its day's index and pick its room, with the rules
+    of book_reservation(). Returns (room_id, error).
+    """
+    start = data['start_minute']
+    end = start + data['duration_minutes']
+    party_size = data['party_size']
+    _, _, max_guests, max_reservations = data['location']
+
+    if data['status'] != 'confirmed':
+        # History rows do not take capacity
+        return data['room_id'], None
+
+    if day_index.is_blocked(None, 'hard', start, end):
+        return None, 'This time slot is not available for reservations due to a location block.'
+
+    guests, count = day_index.location_overlap(start, end)
+    if guests + party_size > max_guests:
+        return None, f'This time slot would exceed the maximum location capacity of {max_guests} guests (currently {guests}).'
+    if count + 1 > max_reservations:
+        return None, f'This time slot has reached the maximum of {max_reservations} reservations (currently {count}).'
+
+    room_id = data['room_id']
+    if room_id is not None:
+        room = day_index.rooms[room_id]
+        if day_index.is_blocked(room_id, 'hard', start, end):
+            return None, 'Selected room is blocked (hard block) for this time'
+        if day_index.is_blocked(room_id, 'soft', start, end) and not allow_soft_block:
+            return None, 'This room is soft-blocked. Only managers can override.'
+        room_guests, _ = day_index.room_overlap(room_id, start, end)
+        if room_guests + party_size > room['max_capacity']:
+            return None, (
+                f"Selected room ({room['name']}) exceeds capacity ({room['max_capacity']}) "
+                f"with {party_size} guests (currently {room_guests})"
+            )
+        return room_id, None
+
+    candidate = choose_weighted_room(get_candidate_rooms_from_index(
+        day_index, data['time'].strftime('%H:%M'), party_size, data['duration_minutes']
+    ))
+    if candidate is None:
+        return None, 'No rooms available for this time slot'
+    if candidate['soft_blocked'] and not allow_soft_block:
+        return None, 'Auto-assignment failed. The only available room is soft-blocked and requires manager override.'
+    return candidate['id'], None
+
+
+def import_reservations(
+    conn,
+    prepared: List[Dict],
+    allow_soft_block: bool = True,
+    dry_run: bool = False
+) -> Dict:
+    """
+    Validate and place every prepared row, then upsert the customers and
+    insert the accepted reservations in the connection's transaction. The
+    caller must hold the booking locks of booking_days(prepared) and commits
+    (or rolls back for a dry run).
+
+    Returns {'total', 'imported', 'failed', 'dry_run', 'days', 'results'},
+    with results in input order and days the (location_id, date) pairs that
+    received reservations.
+    """
+    # Group by (location, date) so every group is checked against one day index
+    groups: Dict[Tuple[int, object], List[Dict]] = {}
+    for entry in prepared:
+        if 'data' in entry:
+            groups.setdefault((entry['data']['location_id'], entry['data']['date']), []).append(entry)
+
+    # Reservation numbers given by the file (legacy books) must be unused
+    given_numbers = [entry['data']['reservation_number'] for group in groups.values() for entry in group
+                     if entry['data']['reservation_number']]
+    taken = set()
+    if given_numbers:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT reservation_number FROM reservations WHERE reservation_number = ANY(%s)",
+                (given_numbers,)
+            )
+            taken = {row[0] for row in cursor.fetchall()}
+
+    accepted = []
+    for (location_id, date), group in groups.items():
+        day_index = load_day_index(conn, location_id, date.isoformat())
+        # In file order, so earlier rows of the file win the capacity
+        for entry in sorted(group, key=lambda e: e['row']):
+            data = entry['data']
+            number = data['reservation_number']
+            if number and number in taken:
+                entry['error'] = 'Reservation number already exists'
+                continue
+            room_id, error = _place(day_index, data, allow_soft_block)
+            if error:
+                entry['error'] = error
+                continue
+            if number:
+                taken.add(number)
+            data['room_id'] = room_id
+            if data['status'] == 'confirmed':
+                day_index.add_reservation(
+                    room_id, data['start_minute'], data['start_minute'] + data['duration_minutes'], data['party_size']
+                )
+            entry['room_code'] = day_index.rooms[room_id]['code'] if room_id in day_index.rooms else None
+            accepted.append(entry)
+
+    if accepted and not dry_run:
+        with conn.cursor() as cursor:
+            # One row per email (a statement cannot upsert the same row twice); later rows win
+            customers = {}
+            for entry in sorted(accepted, key=lambda e: e['row']):
+                data = entry['data']
+                customers[data['email']] = (data['name'], data['email'], data['phone'])
+            customer_rows = execute_values(cursor, """
+                INSERT INTO customers AS c (name, email, phone, newsletter_signup)
+                VALUES %s
+                ON CONFLICT (email) DO UPDATE
+                SET name = EXCLUDED.name,
+                    phone = EXCLUDED.phone,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING c.email, c.id
+            """, list(customers.values()), template='(%s, %s, %s, false)', page_size=PAGE_SIZE, fetch=True)
+            customer_ids = dict(customer_rows)
+
+            for entry in accepted:
+                data = entry['data']
+                if not data['reservation_number']:
+                    data['reservation_number'] = next_reservation_number(data['location_id'])
+
+            reservation_rows = execute_values(cursor, """
+                INSERT INTO reservations (
+                    reservation_number, customer_id, location_id, room_id,
+                    date, time, duration_minutes, party_size, status, special_requests
+                ) VALUES %s
+                RETURNING id
+            """, [
+                (
+                    entry['data']['reservation_number'], customer_ids[entry['data']['email']],
+                    entry['data']['location_id'], entry['data']['room_id'], entry['data']['date'],
+                    entry['data']['time'], entry['data']['duration_minutes'], entry['data']['party_size'],
+                    entry['data']['status'], entry['data']['special_requests']
+                )
+                for entry in accepted
+            ], page_size=PAGE_SIZE, fetch=True)
+            for entry, (reservation_id,) in zip(accepted, reservation_rows):
+                entry['reservation_id'] = reservation_id
+
+    results = []
+    for entry in prepared:
+        if 'error' in entry:
+            results.append({'row': entry['row'], 'ok': False, 'error': entry['error']})
+        else:
+            results.append({
+                'row': entry['row'],
+                'ok': True,
+                'reservation_id': entry.get('reservation_id'),
+                'reservation_number': entry['data']['reservation_number'],
+                'room_code': entry['room_code']
+            })
+
+    imported = len(accepted)
+    return {
+        'total': len(prepared),
+        'imported': imported,
+        'failed': len(prepared) - imported,
+        'dry_run': dry_run,
+        'days': sorted({(entry['data']['location_id'], entry['data']['date']) for entry in accepted}),
+        'results': results
+    }
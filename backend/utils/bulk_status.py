@@ -0,0 +1,85 @@
+"""
+Bulk status transitions
+Changes the status of many reservations (by id or by a location/date
+filter) and writes one audit_log row per changed reservation, in a single
+statement: the UPDATE ... RETURNING feeds a multi-row INSERT through CTEs.
+"""
+from datetime import date as date_type, time as time_type
+from typing import Dict, List, Optional, Sequence
+
+# Reservation ids accepted by one request
+MAX_IDS = 5000
+
+
+def bulk_update_status(
+    conn,
+    admin_id: int,
+    status: str,
+    ids: Optional[Sequence[int]] = None,
+    location_id: Optional[int] = None,
+    date: Optional[date_type] = None,
+    time_from: Optional[time_type] = None,
+    time_to: Optional[time_type] = None,
+    current_statuses: Optional[Sequence[str]] = None
+) -> List[Dict]:
+    """
+    Set status on the reservations selected by ids, or else by location_id
+    and date (optionally time_from <= time < time_to), narrowed to
+    current_statuses when given. Reservations already in the target status
+    are left alone. Runs in the connection's transaction; the caller commits.
+
+    Returns [{'id', 'location_id', 'date', 'old_status'}] for every
+    reservation changed.
+    """
+    conditions = ['r.status <> %(status)s']
+    if ids is not None:
+        conditions.append('r.id = ANY(%(ids)s)')
+    else:
+        conditions.append('r.location_id = %(location_id)s')
+        conditions.append('r.date = %(date)s')
+        if time_from is not None:
+            conditions.append('r.time >= %(time_from)s')
+        if time_to is not None:
+            conditions.append('r.time < %(time_to)s')
+    if current_statuses:
+        conditions.append('r.status = ANY(%(current_statuses)s)')
+
+    with conn.cursor() as cursor:
+        # The locked target rows carry the old status into the audit details
+        cursor.execute(f"""
+            WITH target AS (
+                SELECT r.id, r.status
+                FROM reservations r
+                WHERE {' AND '.join(conditions)}
+                ORDER BY r.id
+                FOR UPDATE
+            ),
+            updated AS (
+                UPDATE reservations r
+                SET status = %(status)s,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM target t
+                WHERE r.id = t.id
+                RETURNING r.id, r.location_id, r.date, t.status AS old_status
+            ),
+            audit AS (
+                INSERT INTO audit_log (admin_id, action, entity_type, entity_id, details)
+                SELECT %(admin_id)s, 'update_status', 'reservation', u.id,
+                    jsonb_build_object('new_status', %(status)s, 'old_status', u.old_status, 'bulk', true)
+                FROM updated u
+            )
+            SELECT id, location_id, date, old_status FROM updated ORDER BY id
+        """, {
+            'status': status,
+            'admin_id': admin_id,
+            'ids': list(ids) if ids is not None else None,
+            'location_id': location_id,
+            'date': date,
+            'time_from': time_from,
+            'time_to': time_to,
+            'current_statuses': list(current_statuses) if current_statuses else None
+        })
+        return [
+            {'id': row[0], 'location_id': row[1], 'date': row[2], 'old_status': row[3]}
+            for row in cursor.fetchall()
+        ]
@@ -0,0 +1,156 @@
+"""
+Change Feed
+Consumes the PostgreSQL 'efp_changes' NOTIFY channel (see
+migrations/001_change_notifications.sql) in a background thread and fans
+each change out to the in-process handlers that keep caches fresh.
+"""
+import json
+import select
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import psycopg2
+from psycopg2 import extensions
+
+from config import Config
+
+CHANNEL = 'efp_changes'
+
+# A change with entity '*' means "anything may have changed": handlers should
+# drop everything. It is dispatched after the listener (re)connects because
+# notifications sent while it was disconnected are lost.
+RESET = {'entity': '*', 'location_id': None, 'start_date': None, 'end_date': None}
+
+_handlers: List[Callable[[Dict], None]] = []
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def register_handler(handler: Callable[[Dict], None]) -> None:
+    """Register a callable that receives every change dict."""
+    if handler not in _handlers:
+        _handlers.append(handler)
+
+
+def parse_payload(payload: str) -> Optional[Dict]:
+    """
+    Decode a NOTIFY payload into a change dict with dates parsed.
+    Returns None for malformed payloads.
+    """
+    try:
+        data = json.loads(payload)
+        change = {
+            'entity': data['entity'],
+            'location_id': data.get('location_id'),
+            'start_date': None,
+            'end_date': None
+        }
+        for key in ('start_date', 'end_date'):
+            if data.get(key):
+                change[key] = datetime.strptime(data[key], '%Y-%m-%d').date()
+        return change
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def dispatch(change: Dict) -> None:
+    """Deliver a change to every registered handler. Handler errors are logged, not raised."""
+    for handler in list(_handlers):
+        try:
+            handler(change)
+        except Exception as e:
+            print(f"Error in change feed handler {getattr(handler, '__name__', handler)}: {e}")
+
+
+class ChangeListener(threading.Thread):
+    """
+    Background thread holding a dedicated LISTEN connection.
+    Reconnects with exponential backoff when the connection drops.
+    """
+
+    def __init__(self, poll_timeout: float = 5.0, max_backoff: float = 30.0):
+        super().__init__(name='change-feed-listener', daemon=True)
+        self.poll_timeout = poll_timeout
+        self.max_backoff = max_backoff
+        self._stop_event = threading.Event()
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _connect(self):
+        conn = psycopg2.connect(
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            database=Config.DB_NAME,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD
+        )
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def run(self) -> None:
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                self.connected = True
+                backoff = 1.0
+                # Anything may have changed while we were not listening
+                dispatch(dict(RESET))
+
+                while not self._stop_event.is_set():
+                    readable, _, _ = select.select([conn], [], [], self.poll_timeout)
+                    if not readable:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        change = parse_payload(notify.payload)
+                        if change is None:
+                            print(f"Ignoring malformed change notification: {notify.payload!r}")
+                            continue
+                        self.received += 1
+                        dispatch(change)
+            except Exception as e:
+                print(f"Change feed listener error: {e}")
+            finally:
+                self.connected = False
+                if conn:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+            if not self._stop_event.is_set():
+                self.reconnects += 1
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def stats(self) -> Dict:
+        return {
+            'connected': self.connected,
+            'received': self.received,
+            'reconnects': self.reconnects
+        }
+
+
+def start_listener() -> ChangeListener:
+    """Start this worker's listener thread (idempotent)."""
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = ChangeListener()
+            _listener.start()
+        return _listener
+
+
+def listener_stats() -> Optional[Dict]:
+    """Return the listener's counters, or None if it is not running."""
+    return _listener.stats() if _listener else None
@@ -0,0 +1,237 @@
+"""
+Dashboard Events
+Live dashboard updates for Server-Sent Events streams. Streams of the same
+location and date share a channel: a change from the change feed marks the
+channel dirty, one stream rebuilds the dashboard payload after a short
+coalescing window, and every stream sends the difference to the previous
+payload as a small delta.
+"""
+import threading
+import time
+from datetime import date as date_type
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.change_feed import register_handler
+
+# Entities whose changes can alter the dashboard (blocks are not shown on it)
+DASHBOARD_ENTITIES = {'reservation', 'room', 'location', '*'}
+
+
+def diff_dashboard(old: Dict, new: Dict) -> Optional[Dict]:
+    """
+    Difference between two dashboard payloads of the same location and date:
+
+        {'location_stats': {slot: stats},
+         'room_heatmap': {room_id: {slot: cell}},
+         'reservations': {'added': [...], 'changed': [...], 'removed': [ids]}}
+
+    with unchanged parts left out (an empty dict means nothing changed).
+    Returns None when the layout changed (slots, rooms or the location
+    itself), which needs a full snapshot instead.
+    """
+    if old['location'] != new['location'] or old['time_slots'] != new['time_slots']:
+        return None
+    old_rooms = {room['id']: room for room in old['room_heatmap']}
+    new_rooms = {room['id']: room for room in new['room_heatmap']}
+    if list(old_rooms) != list(new_rooms):
+        return None
+    for room_id, room in new_rooms.items():
+        old_room = old_rooms[room_id]
+        if any(room[key] != old_room[key] for key in room if key != 'slots'):
+            return None
+
+    delta: Dict = {}
+
+    location_stats = {
+        slot: stats for slot, stats in new['location_stats'].items()
+        if old['location_stats'].get(slot) != stats
+    }
+    if location_stats:
+        delta['location_stats'] = location_stats
+
+    room_heatmap = {}
+    for room_id, room in new_rooms.items():
+        old_slots = old_rooms[room_id]['slots']
+        cells = {slot: cell for slot, cell in room['slots'].items() if old_slots.get(slot) != cell}
+        if cells:
+            room_heatmap[room_id] = cells
+    if room_heatmap:
+        delta['room_heatmap'] = room_heatmap
+
+    old_reservations = {res['id']: res for res in old['reservations']}
+    new_reservations = {res['id']: res for res in new['reservations']}
+    added = [res for res_id, res in new_reservations.items() if res_id not in old_reservations]
+    changed = [
+        res for res_id, res in new_reservations.items()
+        if res_id in old_reservations and old_reservations[res_id] != res
+    ]
+    removed = [res_id for res_id in old_reservations if res_id not in new_reservations]
+    if added or changed or removed:
+        delta['reservations'] = {'added': added, 'changed': changed, 'removed': removed}
+
+    return delta
+
+
+class DashboardChannel:
+    """
+    Latest dashboard payload of one location and date, shared by the streams
+    watching it. version counts payload changes; delta turns version - 1
+    into version (None when only a full snapshot will do).
+    """
+
+    def __init__(self, location_id: int, date: date_type):
+        self.location_id = location_id
+        self.date = date
+        self.condition = threading.Condition()
+        self.subscribers = 0
+        self.payload: Optional[Dict] = None
+        self.version = 0
+        self.delta: Optional[Dict] = None
+        self.dirty_since: Optional[float] = None
+        self.refreshing = False
+        self.refreshes = 0
+
+    def mark_dirty(self) -> None:
+        with self.condition:
+            if self.dirty_since is None:
+                self.dirty_since = time.monotonic()
+            self.condition.notify_all()
+
+    def _refresh(self, build_payload: Callable[[], Dict]) -> None:
+        """Rebuild the payload (caller holds the refreshing turn) and publish the change."""
+        try:
+            payload = build_payload()
+        except Exception:
+            with self.condition:
+                self.refreshing = False
+                # Keep the change pending so the next stream retries it
+                if self.payload is not None and self.dirty_since is None:
+                    self.dirty_since = time.monotonic()
+                self.condition.notify_all()
+            raise
+
+        with self.condition:
+            self.refreshing = False
+            self.refreshes += 1
+            if self.payload is None:
+                delta = None
+            else:
+                delta = diff_dashboard(self.payload, payload)
+            if delta != {}:
+                self.payload = payload
+                self.delta = delta
+                self.version += 1
+            self.condition.notify_all()
+
+    def events(
+        self,
+        build_payload: Callable[[], Dict],
+        coalesce_seconds: float,
+        keepalive_seconds: float
+    ) -> Iterator[Tuple[str, int, Optional[Dict]]]:
+        """
+        Yield (event, version, data) for one stream: a 'snapshot' first, then
+        a 'delta' per payload change, or a 'snapshot' when the stream fell
+        behind or the layout changed. 'keepalive' (data None) is yielded when
+        nothing happened for keepalive_seconds.
+
+        The first stream to notice a change waits coalesce_seconds from the
+        first change of the burst, then rebuilds the payload for everyone.
+        """
+        seen = None
+        while True:
+            refresh = False
+            event = None
+            with self.condition:
+                deadline = time.monotonic() + keepalive_seconds
+                while True:
+                    if self.payload is not None and self.version != seen:
+                        if seen is not None and self.version == seen + 1 and self.delta is not None:
+                            event = ('delta', self.version, self.delta)
+                        else:
+                            event = ('snapshot', self.version, self.payload)
+                        seen = self.version
+                        break
+                    if not self.refreshing and (self.payload is None or self.dirty_since is not None):
+                        self.refreshing = True
+                        refresh = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        event = ('keepalive', self.version, None)
+                        break
+                    self.condition.wait(remaining)
+
+            if refresh:
+                if self.payload is not None:
+                    with self.condition:
+                        dirty_since = self.dirty_since
+                    wait = dirty_since + coalesce_seconds - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                # Changes arriving from here on need another refresh
+                with self.condition:
+                    self.dirty_since = None
+                self._refresh(build_payload)
+                continue
+
+            yield event
+
+
+class DashboardBroker:
+    """Channels by (location_id, date), fed by change feed notifications."""
+
+    def __init__(self):
+        self._channels: Dict[Tuple[int, date_type], DashboardChannel] = {}
+        self._lock = threading.Lock()
+        self.changes = 0
+
+    def subscribe(self, location_id: int, date: date_type) -> DashboardChannel:
+        with self._lock:
+            key = (location_id, date)
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = self._channels[key] = DashboardChannel(location_id, date)
+            channel.subscribers += 1
+            return channel
+
+    def unsubscribe(self, channel: DashboardChannel) -> None:
+        with self._lock:
+            channel.subscribers -= 1
+            key = (channel.location_id, channel.date)
+            if channel.subscribers <= 0 and self._channels.get(key) is channel:
+                del self._channels[key]
+
+    def handle_change(self, change: Dict) -> None:
+        """
+        Change feed handler: mark the channels a committed write may affect.
+        Reservation changes carry their date; room and location changes
+        affect every date of the location; a reset marks everything.
+        """
+        if change['entity'] not in DASHBOARD_ENTITIES:
+            return
+        with self._lock:
+            channels: List[DashboardChannel] = list(self._channels.values())
+        for channel in channels:
+            if change['entity'] != '*':
+                if change['location_id'] is not None and channel.location_id != change['location_id']:
+                    continue
+                start_date, end_date = change['start_date'], change['end_date']
+                if start_date is not None and not start_date <= channel.date <= (end_date or start_date):
+                    continue
+            self.changes += 1
+            channel.mark_dirty()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            channels = list(self._channels.values())
+        return {
+            'channels': len(channels),
+            'subscribers': sum(channel.subscribers for channel in channels),
+            'refreshes': sum(channel.refreshes for channel in channels),
+            'changes': self.changes
+        }
+
+
+dashboard_broker = DashboardBroker()
+register_handler(dashboard_broker.handle_change)
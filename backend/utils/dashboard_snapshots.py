@@ -0,0 +1,122 @@
+"""
+Dashboard Snapshots
+Persistent, compressed copies of past-date dashboard payloads (see
+migrations/007_dashboard_snapshots.sql). Triggers invalidate a snapshot when
+anything it shows changes; a snapshot computed while such a change commits
+is discarded instead of stored, and claims wait for changes in flight.
+"""
+import json
+import threading
+import zlib
+from datetime import date as date_type, timedelta
+from typing import Dict, Optional
+
+from config import Config
+
+# Bump when the dashboard payload changes shape: older snapshots are recomputed
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Second key of the per-location snapshot lock; booking locks use date
+# ordinals there, which start at 1
+SNAPSHOT_LOCK_DAY = 0
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stored': 0, 'discarded': 0}
+
+
+def _count(counter: str) -> None:
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def snapshot_stats() -> Dict:
+    """Hit/miss/store counters of this worker."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def is_snapshot_date(date: date_type, today: Optional[date_type] = None) -> bool:
+    """True when dashboards of the date are served from snapshots."""
+    if not Config.DASHBOARD_SNAPSHOTS_ENABLED:
+        return False
+    today = today or date_type.today()
+    return date < today - timedelta(days=Config.DASHBOARD_SNAPSHOT_AFTER_DAYS)
+
+
+def compress_payload(payload: Dict) -> bytes:
+    """Serialize a payload to zlib-compressed JSON."""
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def load_snapshot(conn, location_id: int, date: date_type) -> Optional[bytes]:
+    """Return the compressed payload of a current snapshot, or None."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT payload FROM dashboard_snapshots
+            WHERE location_id = %s AND date = %s
+            AND payload IS NOT NULL AND format_version = %s
+        """, (location_id, date, SNAPSHOT_FORMAT_VERSION))
+        row = cursor.fetchone()
+    conn.rollback()
+    _count('hits' if row else 'misses')
+    return bytes(row[0]) if row else None
+
+
+def claim_snapshot(conn, location_id: int, date: date_type) -> int:
+    """
+    Make sure the snapshot row exists and return its generation. Call (and
+    commit) before reading the data the payload is computed from.
+
+    Takes the location's snapshot lock exclusively first, which waits for
+    writers whose invalidation trigger already ran (they hold it shared
+    until they commit, see migrations/012_dashboard_snapshot_locks.sql).
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", (location_id, SNAPSHOT_LOCK_DAY))
+        cursor.execute("""
+            INSERT INTO dashboard_snapshots (location_id, date)
+            VALUES (%s, %s)
+            ON CONFLICT (location_id, date) DO NOTHING
+        """, (location_id, date))
+        cursor.execute("""
+            SELECT generation FROM dashboard_snapshots
+            WHERE location_id = %s AND date = %s
+        """, (location_id, date))
+        generation = cursor.fetchone()[0]
+    conn.commit()
+    return generation
+
+
+def store_snapshot(conn, location_id: int, date: date_type, generation: int, compressed: bytes) -> bool:
+    """
+    Store a compressed payload computed after claim_snapshot() returned
+    generation. Returns False (and stores nothing) if the snapshot was
+    invalidated in the meantime.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE dashboard_snapshots
+            SET payload = %s, format_version = %s, created_at = CURRENT_TIMESTAMP
+            WHERE location_id = %s AND date = %s AND generation = %s
+        """, (compressed, SNAPSHOT_FORMAT_VERSION, location_id, date, generation))
+        stored = cursor.rowcount == 1
+    conn.commit()
+    _count('stored' if stored else 'discarded')
+    return stored
+
+
+def decompress_payload(compressed: bytes) -> bytes:
+    """JSON bytes of a compressed payload."""
+    return zlib.decompress(compressed)
+
+
+def accepts_deflate(accept_encoding: Optional[str]) -> bool:
+    """
+    True when an Accept-Encoding header allows 'deflate', whose HTTP meaning
+    is exactly zlib-wrapped data, so snapshots can be sent as stored.
+    """
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() == 'deflate':
+            return params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
@@ -0,0 +1,211 @@
+"""
+Bulk export
+Streams COPY (SELECT ...) TO STDOUT output as CSV or NDJSON. PostgreSQL
+formats every row; Python only moves byte buffers from the COPY into the
+HTTP response, through a bounded queue fed by a background thread.
+"""
+import queue
+import threading
+from datetime import date as date_type
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database import get_connection, release_connection
+
+FORMATS = ('csv', 'ndjson')
+
+# Bytes collected from COPY before being handed to the response
+CHUNK_SIZE = 256 * 1024
+QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+class ExportCancelled(Exception):
+    """Raised inside the COPY when the response was closed early."""
+
+
+def reservations_query(
+    location_id: Optional[int],
+    start_date: Optional[date_type],
+    end_date: Optional[date_type]
+) -> Tuple[str, Dict]:
+    """Reservations with their location, room and customer, by date and time."""
+    conditions = ['TRUE']
+    if location_id is not None:
+        conditions.append('r.location_id = %(location_id)s')
+    if start_date is not None:
+        conditions.append('r.date >= %(start_date)s')
+    if end_date is not None:
+        conditions.append('r.date <= %(end_date)s')
+    return f"""
+        SELECT
+            r.id, r.reservation_number, l.code AS location_code, rm.code AS room_code,
+            r.date, to_char(r.time, 'HH24:MI') AS time, r.duration_minutes, r.party_size,
+            r.status, c.name AS customer_name, c.email AS customer_email,
+            c.phone AS customer_phone, r.special_requests, r.created_at, r.updated_at
+        FROM reservations r
+        JOIN locations l ON l.id = r.location_id
+        JOIN customers c ON c.id = r.customer_id
+        LEFT JOIN rooms rm ON rm.id = r.room_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY r.date, r.time, r.id
+    """, {'location_id': location_id, 'start_date': start_date, 'end_date': end_date}
+
+
+def customers_query(
+    location_id: Optional[int],
+    start_date: Optional[date_type],
+    end_date: Optional[date_type]
+) -> Tuple[str, Dict]:
+    """
+    Customers, by id. With a location or dates, only customers with a
+    reservation at that location and/or dated within the range.
+    """
+    conditions = []
+    if location_id is not None:
+        conditions.append('r.location_id = %(location_id)s')
+    if start_date is not None:
+        conditions.append('r.date >= %(start_date)s')
+    if end_date is not None:
+        conditions.append('r.date <= %(end_date)s')
+    where = ''
+    if conditions:
+        where = f"""
+        WHERE EXISTS (
+            SELECT 1 FROM reservations r
+            WHERE r.customer_id = c.id AND {' AND '.join(conditions)}
+        )"""
+    return f"""
+        SELECT c.id, c.name, c.email, c.phone, c.newsletter_signup, c.created_at, c.updated_at
+        FROM customers c{where}
+        ORDER BY c.id
+    """, {'location_id': location_id, 'start_date': start_date, 'end_date': end_date}
+
+
+def subscribers_query(
+    location_id: Optional[int],
+    start_date: Optional[date_type],
+    end_date: Optional[date_type]
+) -> Tuple[str, Dict]:
+    """Newsletter subscribers by id, filtered on the date they subscribed."""
+    if location_id is not None:
+        raise ValueError('Subscribers cannot be filtered by location')
+    conditions = ['TRUE']
+    if start_date is not None:
+        conditions.append('s.subscribed_at >= %(start_date)s')
+    if end_date is not None:
+        conditions.append("s.subscribed_at < %(end_date)s::date + INTERVAL '1 day'")
+    return f"""
+        SELECT s.id, s.email, s.name, s.status, s.subscribed_at
+        FROM newsletter_subscribers s
+        WHERE {' AND '.join(conditions)}
+        ORDER BY s.id
+    """, {'start_date': start_date, 'end_date': end_date}
+
+
+DATASETS = {
+    'reservations': reservations_query,
+    'customers': customers_query,
+    'subscribers': subscribers_query,
+}
+
+
+def copy_statement(select_sql: str, export_format: str) -> str:
+    """
+    Wrap a (parameter-free) SELECT in the COPY producing the format.
+
+    NDJSON rows are row_to_json() text written through CSV mode with quote
+    and delimiter characters that JSON text never contains raw (it escapes
+    control characters), so COPY writes the JSON unquoted and unescaped.
+    """
+    if export_format == 'csv':
+        return f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+    return (
+        f"COPY (SELECT row_to_json(t)::text FROM ({select_sql}) t) "
+        "TO STDOUT WITH (FORMAT csv, QUOTE e'\\x01', DELIMITER e'\\x02')"
+    )
+
+
+class CopyStream:
+    """
+    Runs a COPY ... TO STDOUT on a pool connection in a background thread
+    and yields its output in CHUNK_SIZE byte chunks. The bounded queue
+    keeps the COPY from running ahead of a slow client; close() stops it.
+    """
+
+    def __init__(self, select_sql: str, params: Dict, export_format: str):
+        self._select_sql = select_sql
+        self._params = params
+        self._format = export_format
+        self._queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._cancelled = threading.Event()
+        self._buffer = bytearray()
+        self._thread = threading.Thread(target=self._run, name='copy-export', daemon=True)
+
+    # Called by psycopg2's copy_expert with each piece of COPY output
+    def write(self, data) -> None:
+        self._buffer += data
+        if len(self._buffer) >= CHUNK_SIZE:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _put(self, item) -> None:
+        while True:
+            if self._cancelled.is_set():
+                raise ExportCancelled()
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self) -> None:
+        conn = None
+        # A COPY stopped part way can leave the connection mid-protocol, so
+        # it only goes back to the pool when the export ran to completion
+        completed = False
+        try:
+            conn = get_connection()
+            with conn.cursor() as cursor:
+                select_sql = cursor.mogrify(self._select_sql, self._params).decode('utf-8')
+                cursor.copy_expert(copy_statement(select_sql, self._format), self)
+            completed = True
+            if self._buffer:
+                self._put(bytes(self._buffer))
+            self._put(_DONE)
+        except ExportCancelled:
+            pass
+        except Exception as e:
+            print(f"Error running export COPY: {e}")
+            try:
+                self._put(e)
+            except ExportCancelled:
+                pass
+        finally:
+            if conn:
+                if completed:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        completed = False
+                release_connection(conn, close=not completed)
+
+    def __iter__(self) -> Iterator[bytes]:
+        self._thread.start()
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self) -> None:
+        self._cancelled.set()
+
+
+def export_filename(dataset: str, export_format: str, filters: List, compressed: bool) -> str:
+    """e.g. reservations_2025-01-01_2025-12-31.csv.gz"""
+    parts = [dataset] + [str(value) for value in filters if value is not None]
+    extension = 'csv' if export_format == 'csv' else 'ndjson'
+    return f"{'_'.join(parts)}.{extension}{'.gz' if compressed else ''}"
@@ -0,0 +1,279 @@
+"""
+Interval Index
+In-memory index of a day's bookings and blocks. Answers "guests and
+reservations overlapping [t, t + d)" in O(log n) and supports incremental
+insert and remove, so one query can back every overlap question about a
+location's day.
+"""
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DAY_MINUTES = 24 * 60
+
+# Minutes relative to midnight of the indexed date. Query windows must lie
+# inside the domain (bookings may reach outside it): a day's slots plus the
+# longest booking window after the last one.
+DEFAULT_DOMAIN = (0, DAY_MINUTES + 6 * 60)
+
+
+# Guests and counts share one tree: each interval adds guests * COUNT_BASE + 1.
+# Sums stay linear, so (guests, count) = divmod(total, COUNT_BASE) as long as
+# fewer than COUNT_BASE intervals overlap.
+COUNT_BASE = 1 << 32
+
+_child_offsets: Dict[int, List[int]] = {}
+
+
+def _fenwick_from_totals(totals: List[int]) -> List[int]:
+    """Build a Fenwick tree from per-position totals (index 0 unused) in O(size)."""
+    size = len(totals)
+    offsets = _child_offsets.get(size)
+    if offsets is None:
+        offsets = _child_offsets[size] = [0] + [i - (i & -i) for i in range(1, size)]
+    prefix = list(accumulate(totals))
+    tree = [a - b for a, b in zip(prefix, map(prefix.__getitem__, offsets))]
+    tree[0] = 0
+    return tree
+
+
+class IntervalIndex:
+    """
+    Multiset of [start, end) minute intervals, each carrying a guest count.
+
+    Keeps two Fenwick trees (binary indexed trees) keyed by minute: one over
+    interval starts and one over interval ends. An interval overlaps [a, b)
+    when it starts before b and ends after a, and every interval that ended
+    at or before a also started before b, so
+
+        overlapping = (started before b) - (ended at or before a)
+
+    which is one prefix sum per tree. Intervals reaching outside the domain
+    are clamped to it, which keeps the answer exact for query windows inside
+    the domain.
+    """
+
+    def __init__(self, domain: Tuple[int, int] = DEFAULT_DOMAIN):
+        self.domain_start, self.domain_end = domain
+        self._size = self.domain_end - self.domain_start + 1
+        self._starts = [0] * (self._size + 1)
+        self._ends = [0] * (self._size + 1)
+        self._length = 0
+
+    @classmethod
+    def from_intervals(
+        cls,
+        intervals: Iterable[Tuple[int, int, int]],
+        domain: Tuple[int, int] = DEFAULT_DOMAIN
+    ) -> 'IntervalIndex':
+        """Build an index from (start, end, guests) triples in O(n + domain)."""
+        index = cls(domain)
+        starts = index._starts
+        ends = index._ends
+        for start, end, guests in intervals:
+            value = guests * COUNT_BASE + 1
+            starts[index._position(start)] += value
+            ends[index._position(end)] += value
+            index._length += 1
+
+        index._starts = _fenwick_from_totals(starts)
+        index._ends = _fenwick_from_totals(ends)
+        return index
+
+    def _position(self, minute: int) -> int:
+        """1-based tree position of a minute, clamped to the domain."""
+        if minute < self.domain_start:
+            return 1
+        if minute > self.domain_end:
+            return self._size
+        return minute - self.domain_start + 1
+
+    def add(self, start: int, end: int, guests: int = 1) -> None:
+        """Insert an interval in O(log n)."""
+        self._apply(start, end, guests * COUNT_BASE + 1)
+        self._length += 1
+
+    def remove(self, start: int, end: int, guests: int = 1) -> None:
+        """Remove an interval previously added with the same values, in O(log n)."""
+        self._apply(start, end, -(guests * COUNT_BASE + 1))
+        self._length -= 1
+
+    def _apply(self, start: int, end: int, delta: int) -> None:
+        size = self._size
+        position = self._position(start)
+        while position <= size:
+            self._starts[position] += delta
+            position += position & -position
+        position = self._position(end)
+        while position <= size:
+            self._ends[position] += delta
+            position += position & -position
+
+    def overlap(self, start: int, end: int) -> Tuple[int, int]:
+        """Return (guests, intervals) overlapping the window [start, end) in O(log n)."""
+        total = 0
+        # Starts strictly before end: prefix up to minute end - 1
+        position = self._position(end) - 1
+        while position > 0:
+            total += self._starts[position]
+            position -= position & -position
+        # Minus ends at or before start: prefix up to minute start
+        position = self._position(start)
+        while position > 0:
+            total -= self._ends[position]
+            position -= position & -position
+        return divmod(total, COUNT_BASE)
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class DayIndex:
+    """
+    Interval indexes for one location and date: confirmed bookings for the
+    whole location and per room, plus room and location-wide blocks.
+    Room keys are room ids; bookings without a room are indexed under None.
+
+    Built in bulk from (room_id, start, end, guests) reservations and
+    (room_id, block_type, start, end) blocks; add_reservation and
+    remove_reservation keep it current afterwards.
+    """
+
+    def __init__(
+        self,
+        location_id: int,
+        date: str,
+        rooms: Optional[Dict[int, Dict]] = None,
+        reservations: Iterable[Tuple[Optional[int], int, int, int]] = (),
+        blocks: Iterable[Tuple[Optional[int], str, int, int]] = ()
+    ):
+        self.location_id = location_id
+        self.date = date
+        self.rooms: Dict[int, Dict] = rooms or {}
+
+        reservations = list(reservations)
+        per_room: Dict[Optional[int], List[Tuple[int, int, int]]] = {}
+        for room_id, start, end, guests in reservations:
+            per_room.setdefault(room_id, []).append((start, end, guests))
+        self.location = IntervalIndex.from_intervals(
+            (start, end, guests) for _, start, end, guests in reservations
+        )
+        self.by_room: Dict[Optional[int], IntervalIndex] = {
+            room_id: IntervalIndex.from_intervals(intervals)
+            for room_id, intervals in per_room.items()
+        }
+
+        # (room_id or None for location-wide, block_type) -> index of blocks
+        per_block: Dict[Tuple[Optional[int], str], List[Tuple[int, int, int]]] = {}
+        for room_id, block_type, start, end in blocks:
+            per_block.setdefault((room_id, block_type), []).append((start, end, 1))
+        self.blocks: Dict[Tuple[Optional[int], str], IntervalIndex] = {
+            key: IntervalIndex.from_intervals(intervals)
+            for key, intervals in per_block.items()
+        }
+
+    def add_reservation(self, room_id: Optional[int], start: int, end: int, guests: int) -> None:
+        self.location.add(start, end, guests)
+        self.by_room.setdefault(room_id, IntervalIndex()).add(start, end, guests)
+
+    def remove_reservation(self, room_id: Optional[int], start: int, end: int, guests: int) -> None:
+        self.location.remove(start, end, guests)
+        self.by_room[room_id].remove(start, end, guests)
+
+    def location_overlap(self, start: int, end: int) -> Tuple[int, int]:
+        """(guests, reservations) of the whole location overlapping [start, end)."""
+        return self.location.overlap(start, end)
+
+    def room_overlap(self, room_id: Optional[int], start: int, end: int) -> Tuple[int, int]:
+        """(guests, reservations) of one room overlapping [start, end)."""
+        index = self.by_room.get(room_id)
+        return index.overlap(start, end) if index else (0, 0)
+
+    def is_blocked(self, room_id: Optional[int], block_type: str, start: int, end: int) -> bool:
+        """True if a block of the type (room_id None: location-wide) overlaps [start, end)."""
+        index = self.blocks.get((room_id, block_type))
+        return bool(index and index.overlap(start, end)[1])
+
+    def evaluate_rooms(self, start: int, duration_minutes: int = 60) -> List[Dict]:
+        """
+        In-memory counterpart of room_assignment.evaluate_rooms() for the
+        location's active rooms.
+        """
+        end = start + duration_minutes
+        result = []
+        for room in self.rooms.values():
+            if not room['is_active']:
+                continue
+            guests, count = self.room_overlap(room['id'], start, end)
+            result.append({
+                'id': room['id'],
+                'code': room['code'],
+                'name': room['name'],
+                'max_capacity': room['max_capacity'],
+                'hard_blocked': self.is_blocked(room['id'], 'hard', start, end),
+                'soft_blocked': self.is_blocked(room['id'], 'soft', start, end),
+                'current_occupancy': guests,
+                'reservation_count': count
+            })
+        return result
+
+
+def load_day_index(conn, location_id: int, date: str) -> DayIndex:
+    """
+    Build a DayIndex for a location and date ('YYYY-MM-DD') from one query:
+    the location's rooms, its confirmed bookings overlapping the day
+    (including the previous evening's spillover) and its blocks on the date.
+    """
+    rooms = {}
+    reservations = []
+    blocks = []
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                'R', room_id, NULL::text,
+                (EXTRACT(EPOCH FROM lower(period) - %(day)s::timestamp) / 60)::int,
+                (EXTRACT(EPOCH FROM upper(period) - %(day)s::timestamp) / 60)::int,
+                party_size, NULL::text, NULL::text, NULL::boolean
+            FROM reservations
+            WHERE location_id = %(location_id)s
+            AND status = 'confirmed'
+            AND period && tsrange(%(day)s::timestamp, %(day)s::timestamp + INTERVAL '1 day', '[)')
+            UNION ALL
+            SELECT
+                'B', room_id, block_type,
+                (EXTRACT(EPOCH FROM start_time) / 60)::int,
+                (EXTRACT(EPOCH FROM end_time) / 60)::int,
+                NULL, NULL, NULL, NULL
+            FROM reservation_blocks
+            WHERE location_id = %(location_id)s
+            AND %(day)s::date BETWEEN start_date AND end_date
+            UNION ALL
+            SELECT
+                'M', id, NULL, NULL, NULL,
+                max_capacity, code, name, is_active
+            FROM rooms
+            WHERE location_id = %(location_id)s
+        """, {'location_id': location_id, 'day': date})
+
+        for kind, room_id, block_type, start, end, number, code, name, is_active in cursor.fetchall():
+            if kind == 'R':
+                reservations.append((room_id, start, end, number))
+            elif kind == 'B':
+                blocks.append((room_id, block_type, start, end))
+            else:
+                rooms[room_id] = {
+                    'id': room_id,
+                    'code': code,
+                    'name': name,
+                    'max_capacity': number,
+                    'is_active': is_active
+                }
+
+    # Keep rooms in code order, like the admin room listings
+    rooms = dict(sorted(rooms.items(), key=lambda item: item[1]['code']))
+    return DayIndex(location_id, date, rooms, reservations, blocks)
+
+
+def slot_minutes(slots: Iterable[str]) -> List[Tuple[str, int]]:
+    """Pair 'HH:MM' slots with their minute of the day."""
+    return [(slot, int(slot[:2]) * 60 + int(slot[3:5])) for slot in slots]
+
@@ -0,0 +1,111 @@
+"""
+Booking Locks
+Serializes bookings per (location_id, date) with transaction-scoped
+PostgreSQL advisory locks, so validate -> assign -> insert runs atomically
+without blocking bookings for other dates or locations.
+"""
+import random
+import time
+from typing import Callable, Iterable, List, Tuple, TypeVar
+from datetime import datetime
+
+from psycopg2 import errors
+
+from config import Config
+
+T = TypeVar('T')
+
+
+class BookingLockTimeout(Exception):
+    """Raised when a booking lock could not be acquired within the retry budget."""
+
+
+def booking_lock_keys(days: Iterable[Tuple[int, object]]) -> List[Tuple[int, int]]:
+    """
+    Map (location_id, date) pairs to two-int advisory lock keys.
+    Keys are de-duplicated and sorted so every caller acquires them in the
+    same order, which rules out deadlocks between multi-day updates.
+    The date part is the proleptic ordinal (date - 0001-01-01 + 1), which the
+    database side can compute as well.
+    """
+    keys = set()
+    for location_id, day in days:
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+        elif isinstance(day, datetime):
+            day = day.date()
+        keys.add((int(location_id), day.toordinal()))
+    return sorted(keys)
+
+
+def acquire_booking_locks(conn, days: Iterable[Tuple[int, object]], timeout_ms: int) -> None:
+    """
+    Take the advisory locks for the given days in the connection's current
+    transaction. They are released automatically on commit or rollback.
+    Raises psycopg2.errors.LockNotAvailable if a lock is not granted in time.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SET LOCAL lock_timeout = %s", (f'{int(timeout_ms)}ms',))
+        for key1, key2 in booking_lock_keys(days):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", (key1, key2))
+        cursor.execute("SET LOCAL lock_timeout = DEFAULT")
+
+
+def run_with_lock_retries(
+    session,
+    days: Iterable[Tuple[int, object]],
+    attempt: Callable[[object, int], T],
+    retries: int = None,
+    timeout_ms: int = None
+) -> T:
+    """
+    Run attempt(conn, timeout_ms) in the SQLAlchemy session's transaction,
+    where attempt takes the booking locks for days itself (for example
+    inside a database function) with the given lock timeout.
+
+    attempt is expected to commit on success. Anything it leaves uncommitted
+    (e.g. after returning a validation error) is rolled back, which also
+    releases the locks. Lock timeouts are retried with jittered exponential
+    backoff; BookingLockTimeout is raised when the retries are exhausted.
+    """
+    days = list(days)
+    retries = Config.BOOKING_LOCK_RETRIES if retries is None else retries
+    timeout_ms = Config.BOOKING_LOCK_TIMEOUT_MS if timeout_ms is None else timeout_ms
+
+    try:
+        for attempt_number in range(retries + 1):
+            conn = session.connection().connection
+            try:
+                return attempt(conn, timeout_ms)
+            except errors.LockNotAvailable:
+                session.rollback()
+                if attempt_number == retries:
+                    raise BookingLockTimeout(
+                        f"Could not lock {booking_lock_keys(days)} after {retries + 1} attempts"
+                    )
+                time.sleep((0.05 * (2 ** attempt_number)) * (1 + random.random()))
+    finally:
+        if session.in_transaction():
+            session.rollback()
+
+
+def run_with_booking_lock(
+    session,
+    days: Iterable[Tuple[int, object]],
+    work: Callable[[object], T],
+    retries: int = None,
+    timeout_ms: int = None
+) -> T:
+    """
+    Run work(conn) in the SQLAlchemy session's transaction while holding the
+    booking locks for days. conn is the session's DBAPI connection, so the
+    utils' validation queries see the same transaction as the ORM insert.
+    Commit and retry semantics are those of run_with_lock_retries.
+    """
+    days = list(days)
+
+    def attempt(conn, lock_timeout_ms):
+        acquire_booking_locks(conn, days, lock_timeout_ms)
+        return work(conn)
+
+    return run_with_lock_retries(session, days, attempt, retries, timeout_ms)
@@ -0,0 +1,95 @@
+"""
+Occupancy Matrix
+Vectorized per-room and per-location slot occupancy for a day, computed with
+NumPy from arrays of booking start/end minutes.
+"""
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+
+class DayBookings:
+    """
+    Column arrays of a day's confirmed (and, for past dates, completed)
+    bookings. Minutes are relative to midnight of the date; room_id is 0 for
+    bookings without a room.
+    """
+
+    def __init__(self, rows: Sequence[Tuple[int, int, int, int]]):
+        table = np.array(rows, dtype=np.int64).reshape(-1, 4)
+        self.room_ids = table[:, 0]
+        self.starts = table[:, 1]
+        self.ends = table[:, 2]
+        self.guests = table[:, 3]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def load_day_bookings(conn, location_id: int, date: str) -> DayBookings:
+    """
+    Load a location's confirmed (or, for past dates, completed) bookings
+    overlapping a date ('YYYY-MM-DD'), including the previous evening's
+    spillover, as DayBookings.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                COALESCE(room_id, 0),
+                (EXTRACT(EPOCH FROM lower(period) - %(day)s::timestamp) / 60)::int,
+                (EXTRACT(EPOCH FROM upper(period) - %(day)s::timestamp) / 60)::int,
+                party_size
+            FROM reservations
+            WHERE location_id = %(location_id)s
+            AND (status = 'confirmed' OR (status = 'completed' AND %(day)s::date < CURRENT_DATE))
+            AND period && tsrange(%(day)s::timestamp, %(day)s::timestamp + INTERVAL '1 day', '[)')
+        """, {'location_id': location_id, 'day': date})
+        return DayBookings(cursor.fetchall())
+
+
+def occupancy_matrices(
+    bookings: DayBookings,
+    room_ids: Sequence[int],
+    slot_starts: Sequence[int],
+    window_minutes: int = 60
+) -> Dict[str, np.ndarray]:
+    """
+    Guests and reservation counts overlapping each slot window
+    [slot, slot + window_minutes).
+
+    Returns int64 arrays:
+    - room_guests, room_reservations: rooms x slots, rows in room_ids order
+    - location_guests, location_reservations: per slot, over every booking
+      (including those in rooms not listed and those without a room)
+    """
+    slot_starts = np.asarray(slot_starts, dtype=np.int64)
+    slot_ends = slot_starts + window_minutes
+
+    # bookings x slots: does booking i overlap slot j
+    overlaps = (bookings.starts[:, None] < slot_ends[None, :]) & (bookings.ends[:, None] > slot_starts[None, :])
+    guests = overlaps * bookings.guests[:, None]
+
+    # Row of each booking's room in the result; the extra last row collects
+    # bookings in rooms that are not listed (or without a room)
+    room_ids = np.asarray(room_ids, dtype=np.int64)
+    rows = np.full(len(bookings), len(room_ids), dtype=np.int64)
+    if len(room_ids):
+        order = np.argsort(room_ids, kind='stable')
+        sorted_ids = room_ids[order]
+        positions = np.clip(np.searchsorted(sorted_ids, bookings.room_ids), 0, len(room_ids) - 1)
+        listed = sorted_ids[positions] == bookings.room_ids
+        rows[listed] = order[positions[listed]]
+
+    # (rooms + 1) x bookings membership matrix; multiplying it with the
+    # bookings x slots matrices sums each room's bookings per slot
+    membership = np.zeros((len(room_ids) + 1, len(bookings)), dtype=np.int64)
+    membership[rows, np.arange(len(bookings))] = 1
+    room_guests = membership @ guests
+    room_reservations = membership @ overlaps.astype(np.int64)
+
+    return {
+        'room_guests': room_guests[:-1],
+        'room_reservations': room_reservations[:-1],
+        'location_guests': guests.sum(axis=0),
+        'location_reservations': overlaps.sum(axis=0, dtype=np.int64)
+    }
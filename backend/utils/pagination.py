@@ -0,0 +1,44 @@
+"""
+Keyset pagination helpers
+Opaque cursors carrying the sort key of the last row of a page, so the next
+page is an index range scan that starts right after it.
+"""
+import base64
+import json
+from typing import List, Optional, Sequence
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that were not produced by encode_cursor()."""
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Encode a row's sort key (JSON-serializable values) as a URL-safe cursor."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, length: int) -> List:
+    """Decode a cursor back into its sort key of the given length."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def parse_page_size(value: Optional[str]) -> int:
+    """Page size from a query parameter, defaulted and clamped to [1, MAX_PAGE_SIZE]."""
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    return max(1, min(size, MAX_PAGE_SIZE))
@@ -0,0 +1,95 @@
+"""
+Range Occupancy
+Per-slot occupancy of several locations over a date range, aggregated in one
+query: slot starts come from generate_series over each day's dining hours
+and are joined to the confirmed reservations (and, on past dates, the
+completed ones) overlapping their window.
+"""
+from datetime import date as date_type, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+from utils.time_utils import get_dining_hours
+
+
+def dining_days(start_date: date_type, end_date: date_type) -> List[Tuple[date_type, object, object]]:
+    """(date, open_time, close_time) for each date from start_date to end_date inclusive."""
+    days = []
+    current = start_date
+    while current <= end_date:
+        open_time, close_time = get_dining_hours(current)
+        days.append((current, open_time, close_time))
+        current += timedelta(days=1)
+    return days
+
+
+def load_range_occupancy(
+    conn,
+    location_ids: Sequence[int],
+    start_date: date_type,
+    end_date: date_type,
+    interval_minutes: int = 30,
+    window_minutes: int = 60
+) -> Dict[Tuple[int, str], Dict]:
+    """
+    Guests and reservation counts overlapping each slot window
+    [slot, slot + window_minutes) for every location and date in the range.
+
+    Returns {(location_id, 'YYYY-MM-DD'): {'location': {slot: (guests, reservations)},
+    'rooms': {room_id: {slot: (guests, reservations)}}}}. Every slot of the
+    day appears under 'location'; rooms only appear in slots they have
+    bookings in. Bookings without a room count towards the location only.
+    """
+    days = dining_days(start_date, end_date)
+    result: Dict[Tuple[int, str], Dict] = {}
+    with conn.cursor() as cursor:
+        # Dining hours are passed in per date so time_utils stays their only source
+        cursor.execute("""
+            WITH days AS (
+                SELECT * FROM unnest(%(dates)s::date[], %(opens)s::time[], %(closes)s::time[])
+                    AS d(date, open_time, close_time)
+            ),
+            slots AS (
+                SELECT l.id AS location_id, d.date, s AS slot_start
+                FROM locations l
+                CROSS JOIN days d
+                CROSS JOIN LATERAL generate_series(
+                    d.date + d.open_time,
+                    d.date + d.close_time - %(interval)s * INTERVAL '1 minute',
+                    %(interval)s * INTERVAL '1 minute'
+                ) s
+                WHERE l.id = ANY(%(location_ids)s)
+            )
+            SELECT
+                s.location_id,
+                s.date,
+                to_char(s.slot_start, 'HH24:MI'),
+                GROUPING(r.room_id),
+                r.room_id,
+                COALESCE(SUM(r.party_size), 0),
+                COUNT(r.id)
+            FROM slots s
+            LEFT JOIN reservations r
+                ON r.location_id = s.location_id
+                AND (r.status = 'confirmed' OR (r.status = 'completed' AND s.date < CURRENT_DATE))
+                AND r.period && tsrange(s.slot_start, s.slot_start + %(window)s * INTERVAL '1 minute', '[)')
+            GROUP BY GROUPING SETS (
+                (s.location_id, s.date, s.slot_start),
+                (s.location_id, s.date, s.slot_start, r.room_id)
+            )
+            ORDER BY s.location_id, s.date, s.slot_start
+        """, {
+            'dates': [day for day, _, _ in days],
+            'opens': [open_time for _, open_time, _ in days],
+            'closes': [close_time for _, _, close_time in days],
+            'location_ids': list(location_ids),
+            'interval': interval_minutes,
+            'window': window_minutes
+        })
+
+        for location_id, day, slot, location_level, room_id, guests, count in cursor.fetchall():
+            entry = result.setdefault((location_id, day.isoformat()), {'location': {}, 'rooms': {}})
+            if location_level:
+                entry['location'][slot] = (guests, count)
+            elif room_id is not None and count:
+                entry['rooms'].setdefault(room_id, {})[slot] = (guests, count)
+    return result
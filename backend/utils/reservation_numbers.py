@@ -0,0 +1,196 @@
+"""
+Reservation Numbers
+Allocates LOC-XXXXX reservation numbers that cannot collide. Each location
+has a sequence (reservation_number_blocks, see
+migrations/006_reservation_number_blocks.sql) handed out to workers in
+blocks, and each sequence value is mapped to a five-character suffix by a
+keyed Feistel permutation, so numbers look random but are never repeated.
+"""
+import hashlib
+import os
+import string
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import Config
+from database import get_connection, release_connection
+
+ALPHABET = string.ascii_uppercase + string.digits
+SUFFIX_LENGTH = 5
+
+# 36^5 == 7776^2, so the suffix space splits into two equal Feistel halves
+HALF_SIZE = 6 ** 5
+CAPACITY = HALF_SIZE ** 2
+FEISTEL_ROUNDS = 4
+
+
+class ReservationNumbersExhausted(Exception):
+    """Raised when a location has used up all 36^5 suffixes."""
+
+
+def _derive_key(key: str) -> bytes:
+    return hashlib.sha256(key.encode('utf-8')).digest()
+
+
+def _round_value(value: int, round_index: int, key: bytes) -> int:
+    digest = hashlib.blake2b(
+        f"{round_index}:{value}".encode('ascii'), key=key, digest_size=8
+    ).digest()
+    return int.from_bytes(digest, 'big') % HALF_SIZE
+
+
+def scramble(sequence: int, key: bytes) -> int:
+    """
+    Map a sequence value in [0, CAPACITY) to a suffix value in the same
+    range. Each key gives a different bijection.
+    """
+    if not 0 <= sequence < CAPACITY:
+        raise ValueError(f"Sequence {sequence} is outside [0, {CAPACITY})")
+    left, right = divmod(sequence, HALF_SIZE)
+    for round_index in range(FEISTEL_ROUNDS):
+        left, right = right, (left + _round_value(right, round_index, key)) % HALF_SIZE
+    return left * HALF_SIZE + right
+
+
+def unscramble(value: int, key: bytes) -> int:
+    """Inverse of scramble()."""
+    if not 0 <= value < CAPACITY:
+        raise ValueError(f"Value {value} is outside [0, {CAPACITY})")
+    left, right = divmod(value, HALF_SIZE)
+    for round_index in reversed(range(FEISTEL_ROUNDS)):
+        left, right = (right - _round_value(left, round_index, key)) % HALF_SIZE, left
+    return left * HALF_SIZE + right
+
+
+def encode_suffix(value: int) -> str:
+    """Encode a value in [0, CAPACITY) as a fixed-width base36 suffix."""
+    chars = []
+    for _ in range(SUFFIX_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def format_reservation_number(location_code: str, sequence: int, key: bytes) -> str:
+    """Reservation number for a location's sequence value, e.g. JPN-A43C7."""
+    return f"{location_code}-{encode_suffix(scramble(sequence, key))}"
+
+
+def reserve_block_from_db(location_id: int, block_size: int) -> Optional[Tuple[str, int]]:
+    """
+    Reserve the next block_size sequence values of a location and return
+    (location_code, first_value), or None if the location does not exist.
+    Commits on its own connection, so a block is never handed out twice even
+    if the booking that asked for it rolls back.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO reservation_number_blocks AS b (location_id, next_sequence)
+                SELECT id, %(block_size)s FROM locations WHERE id = %(location_id)s
+                ON CONFLICT (location_id) DO UPDATE
+                SET next_sequence = b.next_sequence + EXCLUDED.next_sequence
+                RETURNING
+                    b.next_sequence - %(block_size)s,
+                    (SELECT code FROM locations WHERE id = %(location_id)s)
+            """, {'location_id': location_id, 'block_size': block_size})
+            result = cursor.fetchone()
+        conn.commit()
+        return (result[1], result[0]) if result else None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def find_taken_in_db(numbers: List[str]) -> Set[str]:
+    """Return the numbers already used by a reservation (e.g. legacy random ones)."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT reservation_number FROM reservations WHERE reservation_number = ANY(%s)",
+                (numbers,)
+            )
+            taken = {row[0] for row in cursor.fetchall()}
+        conn.rollback()
+        return taken
+    finally:
+        release_connection(conn)
+
+
+class ReservationNumberAllocator:
+    """
+    Hands out reservation numbers from per-location blocks held in memory.
+    Only refilling a block touches the database. Blocks are dropped after a
+    fork so parent and child never share one.
+    """
+
+    def __init__(
+        self,
+        reserve_block: Callable[[int, int], Optional[Tuple[str, int]]] = reserve_block_from_db,
+        find_taken: Callable[[List[str]], Iterable[str]] = find_taken_in_db,
+        block_size: Optional[int] = None,
+        key: Optional[str] = None
+    ):
+        self._reserve_block = reserve_block
+        self._find_taken = find_taken
+        self.block_size = block_size or Config.RESERVATION_NUMBER_BLOCK_SIZE
+        self._key = _derive_key(key or Config.RESERVATION_NUMBER_KEY)
+        self._blocks: Dict[int, deque] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.blocks_reserved = 0
+        self.skipped = 0
+
+    def allocate(self, location_id: int) -> Optional[str]:
+        """
+        Return the next unused reservation number for a location, or None if
+        the location does not exist.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._blocks.clear()
+                self._pid = os.getpid()
+
+            numbers = self._blocks.get(location_id)
+            while not numbers:
+                numbers = self._refill(location_id)
+                if numbers is None:
+                    return None
+            return numbers.popleft()
+
+    def _refill(self, location_id: int) -> Optional[deque]:
+        reserved = self._reserve_block(location_id, self.block_size)
+        if reserved is None:
+            return None
+        location_code, start = reserved
+        end = start + self.block_size
+        if end > CAPACITY:
+            raise ReservationNumbersExhausted(
+                f"Location {location_code} has no reservation numbers left"
+            )
+
+        candidates = [
+            format_reservation_number(location_code, sequence, self._key)
+            for sequence in range(start, end)
+        ]
+        # Numbers issued before the allocator existed were random
+        taken = set(self._find_taken(candidates))
+        numbers = deque(number for number in candidates if number not in taken)
+
+        self.blocks_reserved += 1
+        self.skipped += len(taken)
+        self._blocks[location_id] = numbers
+        return numbers
+
+
+reservation_numbers = ReservationNumberAllocator()
+
+
+def next_reservation_number(location_id: int) -> Optional[str]:
+    """Allocate a reservation number for a location (None if it does not exist)."""
+    return reservation_numbers.allocate(location_id)
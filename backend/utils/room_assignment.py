@@ -6,6 +6,22 @@ import random
 from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
 
+from utils.slot_occupancy import is_counter_window, get_location_slot_counts
+
+def booking_window(
+    date: str,
+    start_time: str,
+    duration_minutes: int = 60
+) -> Tuple[datetime, datetime]:
+    """
+    Return the [start, end) timestamps of a booking window.
+    Used with the reservations.period column, so windows and bookings that
+    run past midnight compare correctly.
+    """
+    start_ts = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
+    return start_ts, start_ts + timedelta(minutes=duration_minutes)
+
+
 def calculate_room_occupancy(
     conn,
     room_id: int,
@@ -20,21 +36,16 @@ def calculate_room_occupancy(
     Can optionally exclude a reservation ID from the count.
     """
     with conn.cursor() as cursor:
-        # Calculate end time for the new reservation
-        start_dt = datetime.strptime(start_time, '%H:%M')
-        end_dt = start_dt + timedelta(minutes=duration_minutes)
-        end_time = end_dt.strftime('%H:%M')
+        window_start, window_end = booking_window(date, start_time, duration_minutes)
 
         query = """
             SELECT COALESCE(SUM(party_size), 0)
             FROM reservations
             WHERE room_id = %s
-            AND date = %s
             AND status = 'confirmed'
-            AND time < %s::time
-            AND (time + (duration_minutes || ' minutes')::interval)::time > %s::time
+            AND period && tsrange(%s, %s, '[)')
         """
-        params = [room_id, date, end_time, start_time]
+        params = [room_id, window_start, window_end]
 
         if exclude_id is not None:
             query += " AND id != %s"
@@ -57,11 +68,13 @@ def calculate_location_occupancy(
     Calculate current location-wide occupancy during a time window.
     Returns (total_guests, total_reservations) for the location.
     Can optionally exclude a reservation ID from the count.
+    Standard one-hour slot windows are read from the slot_occupancy counters.
     """
+    if is_counter_window(start_time, duration_minutes):
+        return get_location_slot_counts(conn, location_id, date, start_time, exclude_id)
+
     with conn.cursor() as cursor:
-        start_dt = datetime.strptime(start_time, '%H:%M')
-        end_dt = start_dt + timedelta(minutes=duration_minutes)
-        end_time = end_dt.strftime('%H:%M')
+        window_start, window_end = booking_window(date, start_time, duration_minutes)
 
         query = """
             SELECT
@@ -69,12 +82,10 @@ def calculate_location_occupancy(
                 COUNT(*) as total_reservations
             FROM reservations
             WHERE location_id = %s
-            AND date = %s
             AND status = 'confirmed'
-            AND time < %s::time
-            AND (time + (duration_minutes || ' minutes')::interval)::time > %s::time
+            AND period && tsrange(%s, %s, '[)')
         """
-        params = [location_id, date, end_time, start_time]
+        params = [location_id, window_start, window_end]
 
         if exclude_id is not None:
             query += " AND id != %s"
@@ -150,6 +161,162 @@ def check_location_blocks(
         return result[0] > 0 if result else False
 
 
+def evaluate_rooms(
+    conn,
+    location_id: Optional[int],
+    date: str,
+    start_time: str,
+    duration_minutes: int = 60,
+    exclude_id: Optional[int] = None,
+    room_id: Optional[int] = None
+) -> List[Dict]:
+    """
+    Evaluate rooms for a time window in a single query.
+    Returns one dict per room with max_capacity, hard/soft block flags and
+    the overlapping guest sum and reservation count (optionally excluding a
+    reservation ID).
+    Evaluates every active room of the location, or only room_id when given.
+    Standard one-hour slot windows read occupancy from slot_occupancy.
+    """
+    start_dt = datetime.strptime(start_time, '%H:%M')
+    end_dt = start_dt + timedelta(minutes=duration_minutes)
+    end_time = end_dt.strftime('%H:%M')
+    window_start, window_end = booking_window(date, start_time, duration_minutes)
+
+    if is_counter_window(start_time, duration_minutes):
+        # Standard slot window: read the room's counter row, minus the
+        # excluded reservation's contribution
+        occupancy_source = """
+                SELECT
+                    COALESCE((
+                        SELECT guests FROM slot_occupancy
+                        WHERE location_id = r.location_id
+                        AND date = %(date)s
+                        AND slot_start = %(start_time)s::time
+                        AND room_id = r.id
+                    ), 0) - COALESCE(SUM(x.party_size), 0) AS guests,
+                    COALESCE((
+                        SELECT reservations FROM slot_occupancy
+                        WHERE location_id = r.location_id
+                        AND date = %(date)s
+                        AND slot_start = %(start_time)s::time
+                        AND room_id = r.id
+                    ), 0) - COUNT(x.id) AS reservation_count
+                FROM reservations x
+                WHERE x.id = %(exclude_id)s
+                AND x.room_id = r.id
+                AND x.status = 'confirmed'
+                AND x.period && tsrange(%(window_start)s, %(window_end)s, '[)')
+        """
+    else:
+        occupancy_source = """
+                SELECT
+                    SUM(party_size) AS guests,
+                    COUNT(*) AS reservation_count
+                FROM reservations
+                WHERE room_id = r.id
+                AND status = 'confirmed'
+                AND period && tsrange(%(window_start)s, %(window_end)s, '[)')
+                AND (%(exclude_id)s IS NULL OR id != %(exclude_id)s)
+        """
+
+    if room_id is not None:
+        room_filter = "r.id = %(room_id)s"
+    else:
+        room_filter = "r.location_id = %(location_id)s AND r.is_active = true"
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT
+                r.id,
+                r.code,
+                r.name,
+                r.max_capacity,
+                COALESCE(b.hard_blocked, false),
+                COALESCE(b.soft_blocked, false),
+                COALESCE(o.guests, 0),
+                COALESCE(o.reservation_count, 0)
+            FROM rooms r
+            LEFT JOIN LATERAL (
+                SELECT
+                    bool_or(block_type = 'hard') AS hard_blocked,
+                    bool_or(block_type = 'soft') AS soft_blocked
+                FROM reservation_blocks
+                WHERE room_id = r.id
+                AND %(date)s BETWEEN start_date AND end_date
+                AND start_time < %(end_time)s::time
+                AND end_time > %(start_time)s::time
+            ) b ON true
+            LEFT JOIN LATERAL ({occupancy_source}) o ON true
+            WHERE {room_filter}
+            ORDER BY r.id
+        """, {
+            'location_id': location_id,
+            'room_id': room_id,
+            'date': date,
+            'start_time': start_time,
+            'end_time': end_time,
+            'window_start': window_start,
+            'window_end': window_end,
+            'exclude_id': exclude_id
+        })
+
+        return [
+            {
+                'id': row[0],
+                'code': row[1],
+                'name': row[2],
+                'max_capacity': row[3],
+                'hard_blocked': row[4],
+                'soft_blocked': row[5],
+                'current_occupancy': row[6],
+                'reservation_count': row[7]
+            }
+            for row in cursor.fetchall()
+        ]
+
+
+def rank_candidate_rooms(rooms: List[Dict], party_size: int) -> List[Dict]:
+    """
+    Turn evaluated rooms (see evaluate_rooms) into candidates that can
+    accommodate the party, with their available capacity and weight.
+    Weight is calculated based on available capacity (primary)
+    and reservation count (tie-breaker), per the spec.
+    """
+    candidates = []
+
+    for room in rooms:
+        # 1. Skip rooms that are 'hard' blocked
+        if room['hard_blocked']:
+            continue
+
+        # 2. Calculate available capacity
+        available_capacity = room['max_capacity'] - room['current_occupancy']
+
+        # 3. Check if room can accommodate the party
+        if available_capacity >= party_size:
+            reservation_count = room['reservation_count']
+
+            # 4. Calculate weight per spec
+            # This weight heavily prioritizes available capacity,
+            # then uses (100 - reservation_count) as a tie-breaker.
+            weight = (available_capacity * 1000) + (100 - reservation_count)
+
+            candidates.append({
+                'id': room['id'],
+                'code': room['code'],
+                'name': room['name'],
+                'max_capacity': room['max_capacity'],
+                'current_occupancy': room['current_occupancy'],
+                'available_capacity': available_capacity,
+                'reservation_count': reservation_count,
+                'soft_blocked': room['soft_blocked'],
+                'weight': weight
+            })
+
+    return candidates
+
+
 def get_candidate_rooms(
     conn,
     location_id: int,
@@ -162,75 +329,35 @@ def get_candidate_rooms(
     """
     Get all candidate rooms that can accommodate the party.
     Returns list of rooms with their available capacity and weight.
-    Weight is calculated based on available capacity (primary)
-    and reservation count (tie-breaker), per the spec.
     """
-    with conn.cursor() as cursor:
-        # Get all active rooms for this location
-        cursor.execute("""
-            SELECT id, code, name, max_capacity
-            FROM rooms
-            WHERE location_id = %s
-            AND is_active = true
-        """, (location_id,))
+    return rank_candidate_rooms(
+        evaluate_rooms(conn, location_id, date, start_time, duration_minutes, exclude_id),
+        party_size
+    )
 
-        rooms = cursor.fetchall()
-        candidates = []
 
-        # Calculate end time for the slot check
-        start_dt = datetime.strptime(start_time, '%H:%M')
-        end_dt = start_dt + timedelta(minutes=duration_minutes)
-        end_time = end_dt.strftime('%H:%M')
+def get_candidate_rooms_from_index(
+    day_index,
+    start_time: str,
+    party_size: int,
+    duration_minutes: int = 60
+) -> List[Dict]:
+    """
+    Same as get_candidate_rooms, scored against an in-memory DayIndex
+    (see utils/interval_index.py) instead of the database. Meant for paths
+    that place many bookings on one day.
+    """
+    start_dt = datetime.strptime(start_time, '%H:%M')
+    start_minute = start_dt.hour * 60 + start_dt.minute
+    return rank_candidate_rooms(day_index.evaluate_rooms(start_minute, duration_minutes), party_size)
 
-        for room in rooms:
-            room_id, code, name, max_capacity = room
-
-            # 1. Check if room is 'hard' blocked
-            if check_room_blocks(conn, room_id, date, start_time, duration_minutes, 'hard'):
-                continue
-
-            # 2. Calculate current occupancy
-            current_occupancy = calculate_room_occupancy(
-                conn, room_id, date, start_time, duration_minutes, exclude_id
-            )
-
-            # 3. Calculate available capacity
-            available_capacity = max_capacity - current_occupancy
-
-            # 4. Check if room can accommodate the party
-            if available_capacity >= party_size:
-
-                # 5. Get reservation count for this slot (for tie-breaker)
-                # This query is fixed to check the slot, not the whole day.
-                cursor.execute("""
-                    SELECT COUNT(*)
-                    FROM reservations
-                    WHERE room_id = %s
-                    AND date = %s
-                    AND status = 'confirmed'
-                    AND time < %s::time
-                    AND (time + (duration_minutes || ' minutes')::interval)::time > %s::time
-                """, (room_id, date, end_time, start_time))
-
-                reservation_count = cursor.fetchone()[0]
-
-                # 6. Calculate weight per spec
-                # This weight heavily prioritizes available capacity,
-                # then uses (100 - reservation_count) as a tie-breaker.
-                weight = (available_capacity * 1000) + (100 - reservation_count)
-
-                candidates.append({
-                    'id': room_id,
-                    'code': code,
-                    'name': name,
-                    'max_capacity': max_capacity,
-                    'current_occupancy': current_occupancy,
-                    'available_capacity': available_capacity,
-                    'reservation_count': reservation_count,
-                    'weight': weight
-                })
-
-        return candidates
+
+def choose_weighted_room(candidates: List[Dict]) -> Optional[Dict]:
+    """Pick one candidate at random, proportionally to its weight."""
+    if not candidates:
+        return None
+    weights = [c['weight'] for c in candidates]
+    return random.choices(candidates, weights=weights, k=1)[0]
 
 
 def weighted_random_room_selection(
@@ -251,26 +378,8 @@ def weighted_random_room_selection(
         conn, location_id, date, start_time, party_size, duration_minutes, exclude_id
     )
 
-    if not candidates:
-        return None
-
-    # This logic is now simplified, as the sorting/tie-breaking
-    # is baked into the 'weight' from get_candidate_rooms.
-    weights = [c['weight'] for c in candidates]
-    selected = random.choices(candidates, weights=weights, k=1)[0]
-
-    return selected
-
-
-def generate_reservation_number(location_code: str) -> str:
-    """
-    Generate a unique reservation number in format: LOC-XXXXX
-    Example: JPN-A43C7
-    """
-    import string
-    chars = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choices(chars, k=5))
-    return f"{location_code}-{random_part}"
+    # The sorting/tie-breaking is baked into the 'weight' from get_candidate_rooms.
+    return choose_weighted_room(candidates)
 
 
 def validate_reservation_constraints(
@@ -0,0 +1,124 @@
+"""
+Admin search
+Ranked reservation and customer search backed by pg_trgm GIN indexes (see
+migrations/009_trigram_search.sql). Candidates are substring matches
+(partial reservation numbers, partial emails) or fuzzy word matches
+(typos in names); both predicates are served by the trigram indexes.
+"""
+from typing import Dict, List
+
+# Substring and prefix matches rank above fuzzy ones
+EXACT_BOOST = 2.0
+PREFIX_BOOST = 1.0
+SUBSTRING_BOOST = 0.5
+
+# Customers considered when ranking reservations by customer name or email
+MAX_CUSTOMER_CANDIDATES = 200
+
+
+def like_pattern(term: str) -> str:
+    """'%term%' with LIKE wildcards in the term escaped."""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def _score(column: str) -> str:
+    """SQL scoring one text column against %(term)s."""
+    return f"""(
+        word_similarity(%(term)s, {column})
+        + CASE
+            WHEN lower({column}) = lower(%(term)s) THEN {EXACT_BOOST}
+            WHEN {column} ILIKE %(prefix)s THEN {PREFIX_BOOST}
+            WHEN {column} ILIKE %(pattern)s THEN {SUBSTRING_BOOST}
+            ELSE 0
+        END
+    )"""
+
+
+def _match(column: str) -> str:
+    """SQL predicate matching one text column; both arms can use its trigram index."""
+    return f"({column} ILIKE %(pattern)s OR %(term)s <%% {column})"
+
+
+def _params(term: str, limit: int) -> Dict:
+    pattern = like_pattern(term)
+    return {
+        'term': term,
+        'pattern': pattern,
+        'prefix': pattern[1:],
+        'limit': limit,
+        'customer_limit': MAX_CUSTOMER_CANDIDATES
+    }
+
+
+def search_customers(conn, term: str, limit: int = 20) -> List[Dict]:
+    """Customers whose name or email matches the term, best first."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT id, name, email, phone,
+                GREATEST({_score('name')}, {_score('email')}) AS score
+            FROM customers
+            WHERE {_match('name')} OR {_match('email')}
+            ORDER BY score DESC, id DESC
+            LIMIT %(limit)s
+        """, _params(term, limit))
+        return [
+            {'id': row[0], 'name': row[1], 'email': row[2], 'phone': row[3], 'score': round(row[4], 3)}
+            for row in cursor.fetchall()
+        ]
+
+
+def search_reservations(conn, term: str, limit: int = 20) -> List[Dict]:
+    """
+    Reservations whose number, customer name or customer email matches the
+    term, best first (newest first among equal scores).
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            WITH matched_customers AS (
+                SELECT id, GREATEST({_score('name')}, {_score('email')}) AS score
+                FROM customers
+                WHERE {_match('name')} OR {_match('email')}
+                ORDER BY score DESC
+                LIMIT %(customer_limit)s
+            ),
+            candidates AS (
+                SELECT id, {_score('reservation_number')} AS score
+                FROM reservations
+                WHERE {_match('reservation_number')}
+                UNION ALL
+                SELECT r.id, mc.score
+                FROM matched_customers mc
+                JOIN reservations r ON r.customer_id = mc.id
+            ),
+            ranked AS (
+                SELECT id, MAX(score) AS score
+                FROM candidates
+                GROUP BY id
+            )
+            SELECT
+                r.id, r.reservation_number, r.date, r.time, r.party_size, r.status,
+                c.id, c.name, c.email, l.code, rm.code, ranked.score
+            FROM ranked
+            JOIN reservations r ON r.id = ranked.id
+            JOIN customers c ON c.id = r.customer_id
+            JOIN locations l ON l.id = r.location_id
+            LEFT JOIN rooms rm ON rm.id = r.room_id
+            ORDER BY ranked.score DESC, r.date DESC, r.time DESC, r.id DESC
+            LIMIT %(limit)s
+        """, _params(term, limit))
+        return [
+            {
+                'id': row[0],
+                'reservation_number': row[1],
+                'date': row[2].isoformat(),
+                'time': row[3].strftime('%H:%M'),
+                'party_size': row[4],
+                'status': row[5],
+                'customer': {'id': row[6], 'name': row[7], 'email': row[8]},
+                'location_code': row[9],
+                'room_code': row[10],
+                'score': round(row[11], 3)
+            }
+            for row in cursor.fetchall()
+        ]
@@ -0,0 +1,128 @@
+"""
+Slot Occupancy Counters
+Reads and reconciles the slot_occupancy table (see
+migrations/004_slot_occupancy.sql), which a trigger keeps in step with
+confirmed reservations.
+"""
+from typing import Optional, List, Dict, Tuple
+from datetime import datetime
+
+# Must match the grid and window baked into reservation_slot_starts()
+SLOT_INTERVAL_MINUTES = 30
+SLOT_WINDOW_MINUTES = 60
+
+
+def is_counter_window(start_time: str, duration_minutes: int) -> bool:
+    """
+    True when a booking window lines up with a counter row: it starts on the
+    slot grid and lasts exactly one standard window.
+    """
+    if duration_minutes != SLOT_WINDOW_MINUTES:
+        return False
+    minute = datetime.strptime(start_time, '%H:%M').minute
+    return minute % SLOT_INTERVAL_MINUTES == 0
+
+
+def get_location_slot_counts(
+    conn,
+    location_id: int,
+    date: str,
+    start_time: str,
+    exclude_id: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Read (total_guests, total_reservations) for a location's slot from the
+    counters. An excluded reservation's contribution is subtracted when it
+    is confirmed and overlaps the slot window.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            WITH excluded AS (
+                SELECT party_size
+                FROM reservations
+                WHERE id = %(exclude_id)s
+                AND location_id = %(location_id)s
+                AND status = 'confirmed'
+                AND period && tsrange(
+                    %(date)s::date + %(start_time)s::time,
+                    %(date)s::date + %(start_time)s::time + %(window)s * INTERVAL '1 minute',
+                    '[)'
+                )
+            )
+            SELECT
+                COALESCE(SUM(guests), 0) - COALESCE((SELECT SUM(party_size) FROM excluded), 0),
+                COALESCE(SUM(reservations), 0) - (SELECT COUNT(*) FROM excluded)
+            FROM slot_occupancy
+            WHERE location_id = %(location_id)s
+            AND date = %(date)s
+            AND slot_start = %(start_time)s::time
+        """, {
+            'location_id': location_id,
+            'date': date,
+            'start_time': start_time,
+            'window': SLOT_WINDOW_MINUTES,
+            'exclude_id': exclude_id
+        })
+        result = cursor.fetchone()
+        return (int(result[0]), int(result[1])) if result else (0, 0)
+
+
+def find_drift(conn, limit: int = 20) -> Tuple[int, List[Dict]]:
+    """
+    Compare slot_occupancy with the counters recomputed from reservations.
+    Returns (number_of_drifted_rows, sample_of_drifted_rows).
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                COALESCE(a.location_id, e.location_id),
+                COALESCE(a.date, e.date),
+                COALESCE(a.slot_start, e.slot_start),
+                COALESCE(a.room_id, e.room_id),
+                COALESCE(a.guests, 0),
+                COALESCE(e.guests, 0),
+                COALESCE(a.reservations, 0),
+                COALESCE(e.reservations, 0),
+                COUNT(*) OVER ()
+            FROM slot_occupancy a
+            FULL OUTER JOIN slot_occupancy_expected e
+                USING (location_id, date, slot_start, room_id)
+            WHERE COALESCE(a.guests, 0) <> COALESCE(e.guests, 0)
+            OR COALESCE(a.reservations, 0) <> COALESCE(e.reservations, 0)
+            ORDER BY 1, 2, 3, 4
+            LIMIT %s
+        """, (limit,))
+        rows = cursor.fetchall()
+
+    sample = [
+        {
+            'location_id': row[0],
+            'date': row[1].isoformat(),
+            'slot_start': row[2].strftime('%H:%M'),
+            'room_id': row[3],
+            'guests': row[4],
+            'expected_guests': row[5],
+            'reservations': row[6],
+            'expected_reservations': row[7]
+        }
+        for row in rows
+    ]
+    return (rows[0][8] if rows else 0), sample
+
+
+def rebuild_slot_occupancy(conn) -> int:
+    """
+    Rebuild slot_occupancy from reservations inside the caller's transaction.
+    Reservation writes are blocked until the caller commits so no change is
+    lost between the delete and the re-insert.
+    Returns the number of counter rows written.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("LOCK TABLE reservations IN SHARE MODE")
+        cursor.execute("DELETE FROM slot_occupancy")
+        cursor.execute("""
+            INSERT INTO slot_occupancy (location_id, date, slot_start, room_id, guests, reservations)
+            SELECT location_id, date, slot_start, room_id, guests, reservations
+            FROM slot_occupancy_expected
+        """)
+        return cursor.rowcount
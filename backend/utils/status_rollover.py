@@ -0,0 +1,208 @@
+"""
+Status Rollover
+Background thread that marks confirmed reservations from past dates as
+'completed', so the confirmed rows (and the partial indexes over them) only
+hold upcoming bookings. Every worker starts the thread, but only the one
+holding the leader advisory lock does the work; the others keep trying to
+take over in case the leader goes away.
+"""
+import threading
+import time
+from datetime import date as date_type, datetime
+from typing import Dict, Optional
+
+import psycopg2
+
+from config import Config
+
+# Session-level advisory lock (single bigint key, so it cannot collide with
+# the two-int booking locks of utils/locking.py)
+LEADER_LOCK_KEY = 7_301_001
+
+_rollover = None
+_rollover_lock = threading.Lock()
+
+
+def complete_batch(conn, cutoff: date_type, batch_size: int) -> Dict:
+    """
+    Mark up to batch_size confirmed reservations dated before cutoff as
+    completed and write one audit_log entry for the batch, in one
+    statement. Rows locked by other transactions are skipped (SKIP LOCKED)
+    and picked up by a later batch. The caller commits.
+
+    Returns {'count', 'first_date', 'last_date'}.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            WITH batch AS (
+                SELECT id
+                FROM reservations
+                WHERE status = 'confirmed'
+                AND date < %(cutoff)s
+                ORDER BY date, time, id
+                LIMIT %(batch_size)s
+                FOR UPDATE SKIP LOCKED
+            ),
+            updated AS (
+                UPDATE reservations r
+                SET status = 'completed',
+                    updated_at = CURRENT_TIMESTAMP
+                FROM batch
+                WHERE r.id = batch.id
+                RETURNING r.id, r.date
+            ),
+            audit AS (
+                INSERT INTO audit_log (admin_id, action, entity_type, entity_id, details)
+                SELECT NULL, 'auto_complete', 'reservation', NULL,
+                    jsonb_build_object(
+                        'count', COUNT(*),
+                        'cutoff_date', %(cutoff)s::date,
+                        'first_date', MIN(date),
+                        'last_date', MAX(date),
+                        'reservation_ids', jsonb_agg(id ORDER BY id)
+                    )
+                FROM updated
+                HAVING COUNT(*) > 0
+            )
+            SELECT COUNT(*), MIN(date), MAX(date) FROM updated
+        """, {'cutoff': cutoff, 'batch_size': batch_size})
+        count, first_date, last_date = cursor.fetchone()
+        return {'count': count, 'first_date': first_date, 'last_date': last_date}
+
+
+class StatusRollover(threading.Thread):
+    """
+    Runs the rollover every interval seconds while this worker holds the
+    leader lock, in batches of batch_size rows with one commit each.
+    The lock lives as long as the thread's dedicated connection; it is
+    reconnected (and the lock re-contended) with backoff when it drops.
+    """
+
+    def __init__(
+        self,
+        interval: float = 300.0,
+        batch_size: int = 500,
+        batch_pause: float = 0.1,
+        max_backoff: float = 60.0
+    ):
+        super().__init__(name='status-rollover', daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.max_backoff = max_backoff
+        self._stop_event = threading.Event()
+        self.is_leader = False
+        self.runs = 0
+        self.total_completed = 0
+        self.last_run: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _connect(self):
+        return psycopg2.connect(
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            database=Config.DB_NAME,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD
+        )
+
+    def _try_lead(self, conn) -> bool:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (LEADER_LOCK_KEY,))
+            acquired = cursor.fetchone()[0]
+        conn.commit()
+        return acquired
+
+    def run_once(self, conn) -> Dict:
+        """Complete every past confirmed reservation, batch by batch."""
+        started = time.monotonic()
+        cutoff = date_type.today()
+        completed = 0
+        batches = 0
+        while not self._stop_event.is_set():
+            try:
+                result = complete_batch(conn, cutoff, self.batch_size)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if not result['count']:
+                break
+            batches += 1
+            completed += result['count']
+            if result['count'] < self.batch_size:
+                break
+            # Leave room for booking traffic between batches
+            self._stop_event.wait(self.batch_pause)
+
+        self.runs += 1
+        self.total_completed += completed
+        self.last_run = {
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'cutoff_date': cutoff.isoformat(),
+            'completed': completed,
+            'batches': batches,
+            'duration_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+        return self.last_run
+
+    def run(self) -> None:
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                backoff = 1.0
+                while not self._stop_event.is_set():
+                    if self.is_leader or self._try_lead(conn):
+                        self.is_leader = True
+                        self.run_once(conn)
+                        self.last_error = None
+                    self._stop_event.wait(self.interval)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Status rollover error: {e}")
+            finally:
+                # Closing the connection releases the leader lock
+                self.is_leader = False
+                if conn:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+            if not self._stop_event.is_set():
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def stats(self) -> Dict:
+        return {
+            'is_leader': self.is_leader,
+            'interval_seconds': self.interval,
+            'batch_size': self.batch_size,
+            'runs': self.runs,
+            'total_completed': self.total_completed,
+            'last_run': self.last_run,
+            'last_error': self.last_error
+        }
+
+
+def start_rollover() -> StatusRollover:
+    """Start this worker's rollover thread (idempotent)."""
+    global _rollover
+    with _rollover_lock:
+        if _rollover is None or not _rollover.is_alive():
+            _rollover = StatusRollover(
+                interval=Config.STATUS_ROLLOVER_INTERVAL_SECONDS,
+                batch_size=Config.STATUS_ROLLOVER_BATCH_SIZE
+            )
+            _rollover.start()
+        return _rollover
+
+
+def rollover_stats() -> Optional[Dict]:
+    """Return the rollover's counters, or None if it is not running."""
+    return _rollover.stats() if _rollover else None
@@ -0,0 +1,70 @@
+"""
+Streaming JSON responses
+Writes large ORM result sets as a JSON array while they are read from a
+server-side cursor, so a worker holds one batch of rows at a time instead of
+the whole list of objects, dicts and the final JSON string.
+"""
+import json
+from typing import Callable, Iterator
+
+from flask import Response, stream_with_context
+
+from database import db
+
+DEFAULT_BATCH_SIZE = 500
+
+# Body chunks are collected up to about this many characters before being written
+CHUNK_SIZE = 64 * 1024
+
+
+def _to_dict(obj):
+    return obj.to_dict()
+
+
+def stream_json_array(
+    query,
+    serialize: Callable = _to_dict,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Response:
+    """
+    Stream the rows of an ORM query as a JSON array response.
+
+    The query runs with yield_per(batch_size), which uses a server-side
+    cursor. The session only holds weak references to unmodified objects, so
+    rows are freed once written and memory stays constant. Eager loads must
+    be many-to-one (joinedload), as yield_per does not support collection
+    eager loading.
+
+    The first batch is fetched before returning, so query errors still raise
+    here and the caller can answer with an error status. Errors after that
+    can only truncate the body, which leaves invalid JSON for the client to
+    detect.
+    """
+    rows = iter(query.yield_per(batch_size))
+    first = next(rows, None)
+
+    def generate() -> Iterator[str]:
+        try:
+            if first is None:
+                yield '[]'
+                return
+            parts = ['[', json.dumps(serialize(first))]
+            size = sum(map(len, parts))
+            for obj in rows:
+                item = json.dumps(serialize(obj))
+                parts.append(',')
+                parts.append(item)
+                size += len(item) + 1
+                if size >= CHUNK_SIZE:
+                    yield ''.join(parts)
+                    parts = []
+                    size = 0
+            parts.append(']')
+            yield ''.join(parts)
+        except Exception as e:
+            # Headers are already sent, so the truncated body signals the failure
+            print(f"Error streaming JSON array: {e}")
+        finally:
+            db.session.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
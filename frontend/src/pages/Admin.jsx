@@ -4,7 +4,7 @@
 import { useState, useEffect } from "react"
 import { toast } from "react-toastify"
 import { adminService, reservationService } from "../services/api"
-import { useMutation, useQueryClient, useQuery } from "@tanstack/react-query"
+import { useMutation, useQueryClient, useInfiniteQuery } from "@tanstack/react-query"
 import AddReservationModal from "../components/AddReservationModal"
 import EditReservationModal from "../components/EditReservationModal"
 
@@ -37,14 +37,18 @@ function AdminReservations() {
     fetchLocations()
   }, [])
 
-  const reservationsQuery = useQuery({
+  // One page at a time; "Load more" follows next_cursor
+  const reservationsQuery = useInfiniteQuery({
     queryKey: ["reservations", selectedLocation, selectedDate, searchQuery],
-    queryFn: () =>
+    queryFn: ({ pageParam }) =>
       adminService.getReservations({
         location_id: selectedLocation,
         date: selectedDate,
         search: searchQuery,
+        cursor: pageParam,
       }),
+    initialPageParam: null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
     enabled: !!selectedLocation,
   })
 
@@ -99,7 +103,7 @@ function AdminReservations() {
     setRoomModalOpen(false)
   }
 
-  const reservations = reservationsQuery.data || []
+  const reservations = reservationsQuery.data?.pages.flatMap((page) => page.reservations) || []
 
   return (
     <>
@@ -282,6 +286,17 @@ function AdminReservations() {
                   )}
                 </tbody>
               </table>
+              {reservationsQuery.hasNextPage && (
+                <div className="text-center py-4 border-t border-border">
+                  <button
+                    onClick={() => reservationsQuery.fetchNextPage()}
+                    className="text-blue-600 hover:text-blue-900 text-sm font-medium"
+                    disabled={reservationsQuery.isFetchingNextPage}
+                  >
+                    {reservationsQuery.isFetchingNextPage ? "Loading..." : "Load more"}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -52,7 +52,7 @@ function Customers() {
   // Query for customer's reservation history
   const customerReservationsQuery = useQuery({
     queryKey: ["customerReservations", selectedCustomer?.email],
-    queryFn: () => adminService.getReservations({ search: selectedCustomer?.email }),
+    queryFn: () => adminService.getReservations({ search: selectedCustomer?.email }).then((page) => page.reservations),
     enabled: !!selectedCustomer,
   })
 
@@ -4,7 +4,7 @@
 import { useState, useEffect } from "react"
 import { toast } from "react-toastify"
 import { adminService, reservationService } from "../../services/api"
-import { useQuery } from "@tanstack/react-query"
+import { useQuery, useQueryClient } from "@tanstack/react-query"
 
 const RoomHeatmap = ({ roomData, timeSlots }) => {
   const getOccupancyColor = (percentage) => {
@@ -83,6 +83,34 @@ const LocationStats = ({ stats, maxGuests, maxReservations }) => {
   )
 }
 
+// Apply a "delta" event from the dashboard stream to the last payload
+const applyDashboardDelta = (data, delta) => {
+  if (!data) return data
+  const next = { ...data }
+  if (delta.location_stats) {
+    next.location_stats = { ...data.location_stats, ...delta.location_stats }
+  }
+  if (delta.room_heatmap) {
+    next.room_heatmap = data.room_heatmap.map((room) =>
+      delta.room_heatmap[room.id] ? { ...room, slots: { ...room.slots, ...delta.room_heatmap[room.id] } } : room,
+    )
+  }
+  if (delta.reservations) {
+    const { added, changed, removed } = delta.reservations
+    const replaced = new Map(changed.map((res) => [res.id, res]))
+    next.reservations = data.reservations
+      .filter((res) => !removed.includes(res.id))
+      .map((res) => replaced.get(res.id) || res)
+      .concat(added)
+      .sort((a, b) => (a.time || "").localeCompare(b.time || ""))
+  }
+  return next
+}
+
+// Without a live stream the dashboard is refetched this often
+const DASHBOARD_POLL_MS = 30000
+const DASHBOARD_STREAM_TIMEOUT_MS = 10000
+
 // Main Dashboard Component
 function Dashboard() {
   const [selectedLocation, setSelectedLocation] = useState("")
@@ -105,10 +133,56 @@ function Dashboard() {
     fetchLocations()
   }, [])
 
+  // The live stream delivers the payload ("snapshot") and its updates. The
+  // dashboard is only fetched (and then polled) when no stream can be opened,
+  // so the payload is not built twice.
+  // Past dates do not change any more (and are served from stored snapshots):
+  // they are fetched once, without a stream.
+  const queryClient = useQueryClient()
+  const isLive = selectedDate >= new Date().toISOString().split("T")[0]
+  const streamKey = `${selectedLocation}|${selectedDate}`
+  const [stream, setStream] = useState({ key: null, state: "connecting" })
+  const streamState = !isLive ? "off" : stream.key === streamKey ? stream.state : "connecting"
+
+  useEffect(() => {
+    if (!selectedLocation || !selectedDate || !isLive) return
+    const queryKey = ["dashboard", selectedLocation, selectedDate]
+    const setState = (state) => setStream({ key: streamKey, state })
+    setState("connecting")
+
+    let source = null
+    const fallBack = () => {
+      if (source) source.close()
+      setState("unavailable")
+    }
+    // Streams that never deliver a snapshot (e.g. buffered by a proxy) count as unavailable
+    const timeout = setTimeout(fallBack, DASHBOARD_STREAM_TIMEOUT_MS)
+    source = adminService.openDashboardStream(selectedLocation, selectedDate, {
+      onSnapshot: (payload) => {
+        clearTimeout(timeout)
+        queryClient.setQueryData(queryKey, payload)
+        setState("open")
+      },
+      onDelta: (delta) => queryClient.setQueryData(queryKey, (data) => applyDashboardDelta(data, delta)),
+      onError: () => {
+        // CLOSED: the server refused the stream (e.g. 503); otherwise the browser reconnects by itself
+        if (source.readyState === EventSource.CLOSED) {
+          clearTimeout(timeout)
+          fallBack()
+        }
+      },
+    })
+    return () => {
+      clearTimeout(timeout)
+      source.close()
+    }
+  }, [selectedLocation, selectedDate, isLive, streamKey, queryClient])
+
   const dashboardQuery = useQuery({
     queryKey: ["dashboard", selectedLocation, selectedDate],
     queryFn: () => adminService.getDashboardStats(selectedLocation, selectedDate),
-    enabled: !!selectedLocation && !!selectedDate,
+    enabled: !!selectedLocation && !!selectedDate && (streamState === "unavailable" || streamState === "off"),
+    refetchInterval: streamState === "unavailable" ? DASHBOARD_POLL_MS : false,
   })
 
   const dashboardData = dashboardQuery.data
@@ -145,9 +219,9 @@ function Dashboard() {
         </div>
       </div>
 
-      {dashboardQuery.isLoading ? (
+      {!dashboardData && (streamState === "connecting" || dashboardQuery.isLoading) ? (
         <div className="text-center py-8">Loading dashboard...</div>
-      ) : dashboardQuery.isError ? (
+      ) : !dashboardData && dashboardQuery.isError ? (
         <div className="text-center py-8 text-red-600">Failed to load dashboard data</div>
       ) : dashboardData ? (
         <>
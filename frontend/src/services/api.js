@@ -10,6 +10,9 @@ const getApiBaseUrl = () => {
 
 const API_BASE_URL = getApiBaseUrl()
 
+// Reservations fetched per page by adminService.getReservations
+export const RESERVATIONS_PAGE_SIZE = 50
+
 export const reservationService = {
   getLocations: async () => {
     try {
@@ -37,6 +40,25 @@ export const reservationService = {
     }
   },
 
+  getAvailabilityRange: async (locationId, startDate, endDate, includeSlots = true) => {
+    try {
+      const params = new URLSearchParams({
+        location_id: locationId,
+        start_date: startDate,
+        end_date: endDate,
+        include_slots: includeSlots ? "true" : "false",
+      })
+      const response = await fetch(`${API_BASE_URL}/reservations/availability/range?${params.toString()}`)
+      if (!response.ok) {
+        throw new Error("Failed to fetch availability")
+      }
+      return await response.json()
+    } catch (error) {
+      console.error("Reservation availability range error:", error)
+      throw error
+    }
+  },
+
   createReservation: async (reservationData) => {
     try {
       const response = await fetch(`${API_BASE_URL}/reservations/`, {
@@ -90,6 +112,14 @@ export const adminService = {
     if (filters.location_id) params.append("location_id", filters.location_id)
     if (filters.date) params.append("date", filters.date)
     if (filters.search) params.append("search", filters.search)
+    if (filters.date_from) params.append("date_from", filters.date_from)
+    if (filters.date_to) params.append("date_to", filters.date_to)
+    if (filters.status) params.append("status", filters.status)
+    if (filters.room_id) params.append("room_id", filters.room_id)
+    // Always one keyset page: { reservations, next_cursor, total? }; pass next_cursor back as cursor
+    params.append("limit", filters.limit || RESERVATIONS_PAGE_SIZE)
+    if (filters.cursor) params.append("cursor", filters.cursor)
+    if (filters.include_total) params.append("include_total", "true")
 
     const response = await fetch(`${API_BASE_URL}/admin/reservations?${params.toString()}`, {
       method: "GET",
@@ -153,6 +183,32 @@ export const adminService = {
     return response.json()
   },
 
+  // Live dashboard: a "snapshot" event with the stats payload, then "delta" events
+  openDashboardStream: (locationId, date, { onSnapshot, onDelta, onError }) => {
+    const source = new EventSource(`${API_BASE_URL}/admin/dashboard/stream?location_id=${locationId}&date=${date}`, {
+      withCredentials: true,
+    })
+    source.addEventListener("snapshot", (event) => onSnapshot(JSON.parse(event.data)))
+    source.addEventListener("delta", (event) => onDelta(JSON.parse(event.data)))
+    if (onError) {
+      source.addEventListener("error", onError)
+    }
+    return source
+  },
+
+  search: async (q, { type = "all", limit = 20 } = {}) => {
+    const params = new URLSearchParams({ q, type, limit })
+    const response = await fetch(`${API_BASE_URL}/admin/search?${params.toString()}`, {
+      method: "GET",
+      credentials: "include",
+    })
+    if (!response.ok) {
+      const data = await response.json()
+      throw new Error(data.error || "Search failed")
+    }
+    return response.json()
+  },
+
   getCustomers: async () => {
     const response = await fetch(`${API_BASE_URL}/admin/customers`, {
       method: "GET",
@@ -205,6 +261,20 @@ export const adminService = {
     }
     return data
   },
+  bulkUpdateReservationStatus: async (status, selection) => {
+    // selection: { ids } or { location_id, date, time_from, time_to, current_status }
+    const response = await fetch(`${API_BASE_URL}/admin/reservations/status`, {
+      method: "PUT",
+      headers: { "Content-Type": "application/json" },
+      credentials: "include",
+      body: JSON.stringify({ status, ...selection }),
+    })
+    const data = await response.json()
+    if (!response.ok) {
+      throw new Error(data.error || "Failed to update reservations")
+    }
+    return data
+  },
 
 
   addReservation: async (reservationData) => {
@@ -338,6 +408,23 @@ export const adminService = {
     }
     return response.json()
   },
+  queryAuditLog: async (filters = {}) => {
+    // filters: admin_id, action, entity_type, entity_id, since, until, details, limit, cursor
+    const params = new URLSearchParams({ paginate: "true" })
+    for (const [key, value] of Object.entries(filters)) {
+      if (value === undefined || value === null || value === "") continue
+      params.append(key, typeof value === "object" ? JSON.stringify(value) : value)
+    }
+    const response = await fetch(`${API_BASE_URL}/admin/audit-log?${params.toString()}`, {
+      method: "GET",
+      credentials: "include",
+    })
+    if (!response.ok) {
+      const data = await response.json()
+      throw new Error(data.error || "Failed to fetch audit log")
+    }
+    return response.json()
+  },
 }
 
 // Newsletter API services
@@ -1,6 +1,10 @@
 -- Eternal Fusion Pavilion - Enhanced Database Schema
 
 -- Drop existing tables if they exist (for clean migration)
+DROP TABLE IF EXISTS schema_migrations CASCADE;
+DROP TABLE IF EXISTS dashboard_snapshots CASCADE;
+DROP TABLE IF EXISTS slot_occupancy CASCADE;
+DROP TABLE IF EXISTS reservation_number_blocks CASCADE;
 DROP TABLE IF EXISTS audit_log CASCADE;
 DROP TABLE IF EXISTS reservation_blocks CASCADE;
 DROP TABLE IF EXISTS reservations CASCADE;
@@ -0,0 +1,92 @@
+-- Eternal Fusion Pavilion - Change notifications for cross-worker cache invalidation
+--
+-- Every write to reservations, reservation_blocks, rooms and locations emits a
+-- NOTIFY on the 'efp_changes' channel. The payload is a JSON object:
+--   {"entity": "...", "location_id": 1, "start_date": "2025-01-31", "end_date": "2025-01-31"}
+-- start_date/end_date are NULL when the change affects every date of the location.
+-- Notifications are delivered on commit, and identical payloads raised in the
+-- same transaction are collapsed into one by PostgreSQL.
+
+CREATE OR REPLACE FUNCTION efp_notify(
+    p_entity TEXT,
+    p_location_id INTEGER,
+    p_start_date DATE,
+    p_end_date DATE
+) RETURNS VOID AS $$
+BEGIN
+    PERFORM pg_notify('efp_changes', json_build_object(
+        'entity', p_entity,
+        'location_id', p_location_id,
+        'start_date', p_start_date,
+        'end_date', p_end_date
+    )::text);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_reservation_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM efp_notify('reservation', OLD.location_id, OLD.date, OLD.date);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM efp_notify('reservation', NEW.location_id, NEW.date, NEW.date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_block_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM efp_notify('reservation_block', OLD.location_id, OLD.start_date, OLD.end_date);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM efp_notify('reservation_block', NEW.location_id, NEW.start_date, NEW.end_date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_room_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM efp_notify('room', OLD.location_id, NULL, NULL);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM efp_notify('room', NEW.location_id, NULL, NULL);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_location_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM efp_notify('location', OLD.id, NULL, NULL);
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        PERFORM efp_notify('location', NEW.id, NULL, NULL);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_reservations_notify ON reservations;
+CREATE TRIGGER trg_reservations_notify
+    AFTER INSERT OR UPDATE OR DELETE ON reservations
+    FOR EACH ROW EXECUTE FUNCTION notify_reservation_change();
+
+DROP TRIGGER IF EXISTS trg_reservation_blocks_notify ON reservation_blocks;
+CREATE TRIGGER trg_reservation_blocks_notify
+    AFTER INSERT OR UPDATE OR DELETE ON reservation_blocks
+    FOR EACH ROW EXECUTE FUNCTION notify_block_change();
+
+DROP TRIGGER IF EXISTS trg_rooms_notify ON rooms;
+CREATE TRIGGER trg_rooms_notify
+    AFTER INSERT OR UPDATE OR DELETE ON rooms
+    FOR EACH ROW EXECUTE FUNCTION notify_room_change();
+
+DROP TRIGGER IF EXISTS trg_locations_notify ON locations;
+CREATE TRIGGER trg_locations_notify
+    AFTER INSERT OR UPDATE OR DELETE ON locations
+    FOR EACH ROW EXECUTE FUNCTION notify_location_change();
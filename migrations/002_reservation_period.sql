@@ -0,0 +1,27 @@
+-- Eternal Fusion Pavilion - Sargable reservation overlap checks
+--
+-- Occupancy queries used to filter on
+--   (time + (duration_minutes || ' minutes')::interval)::time > X
+-- which no index can serve and which wraps around at midnight. Each
+-- reservation now stores its period as a generated [start, end) timestamp
+-- range, and overlap checks become `period && tsrange(window_start, window_end)`,
+-- served by GiST indexes over the confirmed rows only.
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE reservations
+    ADD COLUMN IF NOT EXISTS period TSRANGE GENERATED ALWAYS AS (
+        tsrange(date + time, date + time + duration_minutes * INTERVAL '1 minute', '[)')
+    ) STORED;
+
+-- Location-wide occupancy (validation, availability)
+CREATE INDEX IF NOT EXISTS idx_reservations_location_period
+    ON reservations USING GIST (location_id, period)
+    WHERE status = 'confirmed';
+
+-- Per-room occupancy (room assignment)
+CREATE INDEX IF NOT EXISTS idx_reservations_room_period
+    ON reservations USING GIST (room_id, period)
+    WHERE status = 'confirmed';
+
+ANALYZE reservations;
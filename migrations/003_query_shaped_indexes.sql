@@ -0,0 +1,59 @@
+-- Eternal Fusion Pavilion - Composite and partial indexes matched to query shapes
+--
+-- Every hot query filters on location_id + date (+ status), room_id + date
+-- (+ status), or on blocks by room/location + block_type + a date range.
+-- The original single-column indexes could only serve one predicate each,
+-- so they are replaced by indexes that match those predicates. Overlap
+-- checks on confirmed reservations are served by the GiST period indexes
+-- from 002_reservation_period.sql.
+--
+-- Verify with: python check_query_plans.py
+
+-- Reservations ---------------------------------------------------------------
+
+-- Superseded by the composites below (and by the GiST period indexes)
+DROP INDEX IF EXISTS idx_reservations_date;
+DROP INDEX IF EXISTS idx_reservations_time;
+DROP INDEX IF EXISTS idx_reservations_location;
+DROP INDEX IF EXISTS idx_reservations_room;
+DROP INDEX IF EXISTS idx_reservations_status;
+
+-- Dashboard day view and admin list filtered by location/date, ordered by time.
+-- Also serves the ON DELETE CASCADE lookup from locations.
+CREATE INDEX IF NOT EXISTS idx_reservations_location_date_time
+    ON reservations (location_id, date, time);
+
+-- Per-room day lookups; also serves the ON DELETE SET NULL lookup from rooms
+CREATE INDEX IF NOT EXISTS idx_reservations_room_date
+    ON reservations (room_id, date);
+
+-- Customer history and the ON DELETE CASCADE lookup from customers
+CREATE INDEX IF NOT EXISTS idx_reservations_customer
+    ON reservations (customer_id);
+
+-- idx_reservations_date_time (date, time) is kept: it serves the unfiltered
+-- admin list ordered by date DESC, time DESC.
+
+-- Reservation blocks ---------------------------------------------------------
+
+DROP INDEX IF EXISTS idx_blocks_room;
+DROP INDEX IF EXISTS idx_blocks_dates;
+DROP INDEX IF EXISTS idx_blocks_location;
+
+-- Location-wide hard blocks (check_location_blocks, availability)
+CREATE INDEX IF NOT EXISTS idx_blocks_location_hard_dates
+    ON reservation_blocks (location_id, start_date, end_date)
+    WHERE room_id IS NULL AND block_type = 'hard';
+
+-- Room blocks by type (check_room_blocks, evaluate_rooms); also the
+-- ON DELETE CASCADE lookup from rooms
+CREATE INDEX IF NOT EXISTS idx_blocks_room_type_dates
+    ON reservation_blocks (room_id, block_type, start_date, end_date);
+
+-- Admin block list per location, newest first; also the ON DELETE CASCADE
+-- lookup from locations
+CREATE INDEX IF NOT EXISTS idx_blocks_location_start
+    ON reservation_blocks (location_id, start_date, start_time);
+
+ANALYZE reservations;
+ANALYZE reservation_blocks;
@@ -0,0 +1,92 @@
+-- Eternal Fusion Pavilion - Per-slot occupancy counters
+--
+-- slot_occupancy holds, for every 30-minute slot start, the guests and
+-- reservations of confirmed bookings overlapping the standard one-hour
+-- booking window [slot_start, slot_start + 60 minutes), per room.
+-- room_id 0 collects confirmed bookings without a room.
+-- Location totals are the sum over the location's rows for a slot, which is
+-- a primary-key range scan.
+--
+-- The counters are maintained by a trigger on reservations. The grid
+-- (30 minutes) and window (60 minutes) must match SLOT_INTERVAL_MINUTES and
+-- SLOT_WINDOW_MINUTES in backend/utils/slot_occupancy.py.
+--
+-- Rebuild / check for drift with: python reconcile_occupancy.py
+
+CREATE TABLE IF NOT EXISTS slot_occupancy (
+    location_id INTEGER NOT NULL REFERENCES locations(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    slot_start TIME NOT NULL,
+    room_id INTEGER NOT NULL DEFAULT 0, -- 0 = no room assigned
+    guests INTEGER NOT NULL DEFAULT 0,
+    reservations INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (location_id, date, slot_start, room_id)
+);
+
+-- Slot starts whose one-hour window overlaps a reservation period:
+-- every grid point s with lower - 60 min < s < upper.
+CREATE OR REPLACE FUNCTION reservation_slot_starts(p_period TSRANGE)
+RETURNS SETOF TIMESTAMP AS $$
+    SELECT generate_series(
+        date_trunc('hour', lower(p_period) - INTERVAL '60 minutes')
+            + floor(date_part('minute', lower(p_period) - INTERVAL '60 minutes') / 30) * INTERVAL '30 minutes'
+            + INTERVAL '30 minutes',
+        upper(p_period) - INTERVAL '1 microsecond',
+        INTERVAL '30 minutes'
+    )
+$$ LANGUAGE sql IMMUTABLE;
+
+-- What slot_occupancy should contain, computed from scratch
+CREATE OR REPLACE VIEW slot_occupancy_expected AS
+SELECT
+    r.location_id,
+    s::date AS date,
+    s::time AS slot_start,
+    COALESCE(r.room_id, 0) AS room_id,
+    SUM(r.party_size)::int AS guests,
+    COUNT(*)::int AS reservations
+FROM reservations r
+CROSS JOIN LATERAL reservation_slot_starts(r.period) s
+WHERE r.status = 'confirmed'
+GROUP BY r.location_id, s::date, s::time, COALESCE(r.room_id, 0);
+
+CREATE OR REPLACE FUNCTION slot_occupancy_apply(
+    p_location_id INTEGER,
+    p_room_id INTEGER,
+    p_period TSRANGE,
+    p_guests INTEGER,
+    p_sign INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO slot_occupancy AS so (location_id, date, slot_start, room_id, guests, reservations)
+    SELECT p_location_id, s::date, s::time, COALESCE(p_room_id, 0), p_sign * p_guests, p_sign
+    FROM reservation_slot_starts(p_period) s
+    ON CONFLICT (location_id, date, slot_start, room_id) DO UPDATE
+    SET guests = so.guests + EXCLUDED.guests,
+        reservations = so.reservations + EXCLUDED.reservations;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_slot_occupancy() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'confirmed' THEN
+        PERFORM slot_occupancy_apply(OLD.location_id, OLD.room_id, OLD.period, OLD.party_size, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'confirmed' THEN
+        PERFORM slot_occupancy_apply(NEW.location_id, NEW.room_id, NEW.period, NEW.party_size, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_reservations_slot_occupancy ON reservations;
+CREATE TRIGGER trg_reservations_slot_occupancy
+    AFTER INSERT OR DELETE OR UPDATE OF location_id, room_id, date, time, duration_minutes, party_size, status
+    ON reservations
+    FOR EACH ROW EXECUTE FUNCTION maintain_slot_occupancy();
+
+-- Backfill from existing reservations
+DELETE FROM slot_occupancy;
+INSERT INTO slot_occupancy (location_id, date, slot_start, room_id, guests, reservations)
+SELECT location_id, date, slot_start, room_id, guests, reservations
+FROM slot_occupancy_expected;
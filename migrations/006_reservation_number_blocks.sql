@@ -0,0 +1,217 @@
+-- Eternal Fusion Pavilion - Collision-free reservation numbers
+--
+-- Reservation numbers are allocated by backend/utils/reservation_numbers.py:
+-- each location has a sequence whose values are handed out to workers in
+-- blocks through reservation_number_blocks, and every value is mapped to a
+-- LOC-XXXXX suffix by a keyed permutation, so two workers can never produce
+-- the same number. next_sequence is the first value not handed out yet.
+--
+-- book_reservation() gains p_reservation_number to take the allocated
+-- number; without it the random generate_reservation_number() is used.
+
+CREATE TABLE IF NOT EXISTS reservation_number_blocks (
+    location_id INTEGER PRIMARY KEY REFERENCES locations(id) ON DELETE CASCADE,
+    next_sequence BIGINT NOT NULL DEFAULT 0
+);
+
+DROP FUNCTION IF EXISTS book_reservation(
+    INTEGER, DATE, TIME, INTEGER, INTEGER, TEXT, TEXT, TEXT, TEXT,
+    INTEGER, BOOLEAN, BOOLEAN, INTEGER
+);
+
+CREATE OR REPLACE FUNCTION book_reservation(
+    p_location_id INTEGER,
+    p_date DATE,
+    p_time TIME,
+    p_party_size INTEGER,
+    p_duration_minutes INTEGER,
+    p_name TEXT,
+    p_email TEXT,
+    p_phone TEXT,
+    p_special_requests TEXT,
+    p_room_id INTEGER DEFAULT NULL,       -- manual assignment (admin)
+    p_is_admin BOOLEAN DEFAULT false,     -- admin party size limits
+    p_allow_soft_block BOOLEAN DEFAULT true,
+    p_lock_timeout_ms INTEGER DEFAULT 2000,
+    p_reservation_number TEXT DEFAULT NULL, -- pre-allocated (utils/reservation_numbers.py)
+    OUT ok BOOLEAN,
+    OUT error TEXT,
+    OUT http_status INTEGER,
+    OUT reservation_id INTEGER,
+    OUT reservation_number TEXT,
+    OUT room_id INTEGER,
+    OUT room_code TEXT,
+    OUT room_name TEXT,
+    OUT soft_block_override BOOLEAN
+) AS $$
+DECLARE
+    v_start TIMESTAMP := p_date + p_time;
+    v_end TIMESTAMP := p_date + p_time + p_duration_minutes * INTERVAL '1 minute';
+    v_end_time TIME := p_time + p_duration_minutes * INTERVAL '1 minute';
+    v_location RECORD;
+    v_occupancy RECORD;
+    v_room RECORD;
+    v_customer_id INTEGER;
+BEGIN
+    ok := false;
+    http_status := 400;
+    soft_block_override := false;
+
+    -- Same key as utils/locking.py: (location_id, proleptic date ordinal)
+    EXECUTE format('SET LOCAL lock_timeout = %L', p_lock_timeout_ms || 'ms');
+    PERFORM pg_advisory_xact_lock(p_location_id, p_date - DATE '0001-01-01' + 1);
+    SET LOCAL lock_timeout = DEFAULT;
+
+    IF NOT p_is_admin AND NOT p_party_size BETWEEN 1 AND 12 THEN
+        error := 'Party size must be between 1 and 12 for online bookings.';
+        RETURN;
+    ELSIF p_is_admin AND NOT p_party_size BETWEEN 1 AND 30 THEN
+        error := 'Party size must be between 1 and 30 for admin bookings.';
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM reservation_blocks b
+        WHERE b.location_id = p_location_id
+        AND b.room_id IS NULL
+        AND b.block_type = 'hard'
+        AND p_date BETWEEN b.start_date AND b.end_date
+        AND b.start_time < v_end_time
+        AND b.end_time > p_time
+    ) THEN
+        error := 'This time slot is not available for reservations due to a location block.';
+        RETURN;
+    END IF;
+
+    SELECT l.code, l.max_guests_per_slot, l.max_reservations_per_slot
+    INTO v_location
+    FROM locations l
+    WHERE l.id = p_location_id;
+    IF NOT FOUND THEN
+        error := 'Invalid location.';
+        RETURN;
+    END IF;
+
+    SELECT * INTO v_occupancy FROM booking_window_occupancy(p_location_id, NULL, v_start, v_end);
+    IF v_occupancy.guests + p_party_size > v_location.max_guests_per_slot THEN
+        error := format(
+            'This time slot would exceed the maximum location capacity of %s guests (currently %s).',
+            v_location.max_guests_per_slot, v_occupancy.guests
+        );
+        RETURN;
+    END IF;
+    IF v_occupancy.reservations + 1 > v_location.max_reservations_per_slot THEN
+        error := format(
+            'This time slot has reached the maximum of %s reservations (currently %s).',
+            v_location.max_reservations_per_slot, v_occupancy.reservations
+        );
+        RETURN;
+    END IF;
+
+    IF p_room_id IS NOT NULL THEN
+        -- Manually selected room
+        SELECT
+            r.id, r.location_id, r.code, r.name, r.max_capacity,
+            COALESCE(bool_or(b.block_type = 'hard'), false) AS hard_blocked,
+            COALESCE(bool_or(b.block_type = 'soft'), false) AS soft_blocked
+        INTO v_room
+        FROM rooms r
+        LEFT JOIN reservation_blocks b
+            ON b.room_id = r.id
+            AND p_date BETWEEN b.start_date AND b.end_date
+            AND b.start_time < v_end_time
+            AND b.end_time > p_time
+        WHERE r.id = p_room_id
+        GROUP BY r.id;
+        IF NOT FOUND THEN
+            error := 'Selected room not found';
+            http_status := 404;
+            RETURN;
+        END IF;
+        IF v_room.hard_blocked THEN
+            error := 'Selected room is blocked (hard block) for this time';
+            RETURN;
+        END IF;
+        IF v_room.soft_blocked AND NOT p_allow_soft_block THEN
+            error := 'This room is soft-blocked. Only managers can override.';
+            http_status := 403;
+            RETURN;
+        END IF;
+        SELECT * INTO v_occupancy FROM booking_window_occupancy(v_room.location_id, v_room.id, v_start, v_end);
+        IF v_occupancy.guests + p_party_size > v_room.max_capacity THEN
+            error := format(
+                'Selected room (%s) exceeds capacity (%s) with %s guests (currently %s)',
+                v_room.name, v_room.max_capacity, p_party_size, v_occupancy.guests
+            );
+            RETURN;
+        END IF;
+    ELSE
+        -- Weighted-random choice among the rooms that fit the party, with
+        -- the weights of get_candidate_rooms(). Taking the smallest
+        -- -ln(u) / weight draws each room with probability weight / total.
+        SELECT c.id, c.code, c.name, c.soft_blocked
+        INTO v_room
+        FROM (
+            SELECT
+                r.id, r.code, r.name,
+                COALESCE(b.soft_blocked, false) AS soft_blocked,
+                (r.max_capacity - o.guests) * 1000 + (100 - o.reservations) AS weight
+            FROM rooms r
+            LEFT JOIN LATERAL (
+                SELECT
+                    bool_or(block_type = 'hard') AS hard_blocked,
+                    bool_or(block_type = 'soft') AS soft_blocked
+                FROM reservation_blocks
+                WHERE reservation_blocks.room_id = r.id
+                AND p_date BETWEEN start_date AND end_date
+                AND start_time < v_end_time
+                AND end_time > p_time
+            ) b ON true
+            CROSS JOIN LATERAL booking_window_occupancy(p_location_id, r.id, v_start, v_end) o
+            WHERE r.location_id = p_location_id
+            AND r.is_active = true
+            AND NOT COALESCE(b.hard_blocked, false)
+            AND r.max_capacity - o.guests >= p_party_size
+        ) c
+        ORDER BY -ln(1.0 - random()) / GREATEST(c.weight, 1)
+        LIMIT 1;
+        IF NOT FOUND THEN
+            error := 'No rooms available for this time slot';
+            RETURN;
+        END IF;
+        IF v_room.soft_blocked AND NOT p_allow_soft_block THEN
+            error := 'Auto-assignment failed. The only available room is soft-blocked and requires manager override.';
+            http_status := 403;
+            RETURN;
+        END IF;
+    END IF;
+
+    INSERT INTO customers AS c (name, email, phone, newsletter_signup)
+    VALUES (p_name, p_email, p_phone, false)
+    ON CONFLICT (email) DO UPDATE
+    SET name = EXCLUDED.name,
+        phone = EXCLUDED.phone,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING c.id INTO v_customer_id;
+
+    reservation_number := COALESCE(p_reservation_number, generate_reservation_number(v_location.code));
+
+    INSERT INTO reservations (
+        reservation_number, customer_id, location_id, room_id,
+        date, time, duration_minutes, party_size, status, special_requests
+    ) VALUES (
+        reservation_number, v_customer_id, p_location_id, v_room.id,
+        p_date, p_time, p_duration_minutes, p_party_size, 'confirmed',
+        COALESCE(p_special_requests, '')
+    )
+    RETURNING id INTO reservation_id;
+
+    ok := true;
+    error := NULL;
+    http_status := 201;
+    room_id := v_room.id;
+    room_code := v_room.code;
+    room_name := v_room.name;
+    soft_block_override := v_room.soft_blocked;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
@@ -0,0 +1,107 @@
+-- Eternal Fusion Pavilion - Dashboard snapshots for past dates
+--
+-- dashboard_snapshots keeps the zlib-compressed JSON payload of
+-- /admin/dashboard/stats for a location and a past date (see
+-- backend/utils/dashboard_snapshots.py), so browsing history does not read
+-- reservations at all.
+--
+-- A row is claimed (payload NULL) before the payload is computed, and the
+-- triggers below bump its generation whenever something shown on that
+-- dashboard changes. The computed payload is only stored if the generation
+-- is still the one seen at claim time, so a write that commits while a
+-- snapshot is being computed does not leave a stale snapshot behind (for
+-- writes whose trigger ran before the row existed, see
+-- 012_dashboard_snapshot_locks.sql).
+-- Dates nobody has viewed have no row, and the triggers cost one primary-key
+-- lookup for them.
+
+CREATE TABLE IF NOT EXISTS dashboard_snapshots (
+    location_id INTEGER NOT NULL REFERENCES locations(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 0,
+    format_version SMALLINT,
+    payload BYTEA, -- NULL until computed, and again after an invalidation
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (location_id, date)
+);
+
+CREATE OR REPLACE FUNCTION dashboard_snapshots_invalidate(
+    p_location_id INTEGER,
+    p_date DATE
+) RETURNS VOID AS $$
+BEGIN
+    -- p_date NULL: every date of the location
+    UPDATE dashboard_snapshots
+    SET generation = generation + 1, payload = NULL
+    WHERE location_id = p_location_id
+    AND (p_date IS NULL OR date = p_date);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_snapshots_reservation_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM dashboard_snapshots_invalidate(OLD.location_id, OLD.date);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND (NEW.location_id, NEW.date) IS DISTINCT FROM (OLD.location_id, OLD.date)) THEN
+        PERFORM dashboard_snapshots_invalidate(NEW.location_id, NEW.date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Room and location details are part of every dashboard of the location
+CREATE OR REPLACE FUNCTION dashboard_snapshots_room_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM dashboard_snapshots_invalidate(OLD.location_id, NULL);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM dashboard_snapshots_invalidate(NEW.location_id, NULL);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_snapshots_location_change() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM dashboard_snapshots_invalidate(NEW.id, NULL);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reservations embed their customer
+CREATE OR REPLACE FUNCTION dashboard_snapshots_customer_change() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE dashboard_snapshots s
+    SET generation = s.generation + 1, payload = NULL
+    FROM (
+        SELECT DISTINCT location_id, date FROM reservations WHERE customer_id = NEW.id
+    ) r
+    WHERE s.location_id = r.location_id AND s.date = r.date;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_reservations_dashboard_snapshots ON reservations;
+CREATE TRIGGER trg_reservations_dashboard_snapshots
+    AFTER INSERT OR UPDATE OR DELETE ON reservations
+    FOR EACH ROW EXECUTE FUNCTION dashboard_snapshots_reservation_change();
+
+DROP TRIGGER IF EXISTS trg_rooms_dashboard_snapshots ON rooms;
+CREATE TRIGGER trg_rooms_dashboard_snapshots
+    AFTER INSERT OR UPDATE OR DELETE ON rooms
+    FOR EACH ROW EXECUTE FUNCTION dashboard_snapshots_room_change();
+
+-- Deleted locations take their snapshots with them (ON DELETE CASCADE)
+DROP TRIGGER IF EXISTS trg_locations_dashboard_snapshots ON locations;
+CREATE TRIGGER trg_locations_dashboard_snapshots
+    AFTER UPDATE ON locations
+    FOR EACH ROW EXECUTE FUNCTION dashboard_snapshots_location_change();
+
+DROP TRIGGER IF EXISTS trg_customers_dashboard_snapshots ON customers;
+CREATE TRIGGER trg_customers_dashboard_snapshots
+    AFTER UPDATE ON customers
+    FOR EACH ROW
+    WHEN (OLD IS DISTINCT FROM NEW)
+    EXECUTE FUNCTION dashboard_snapshots_customer_change();
@@ -0,0 +1,26 @@
+-- Eternal Fusion Pavilion - Indexes for keyset pagination of the admin list
+--
+-- GET /admin/reservations pages through reservations ordered by
+-- (date, time, id) DESC and continues after the last row of the previous
+-- page with a row comparison on the same key. Adding id to the (date, time)
+-- indexes lets every page be a backward index range scan that stops after
+-- limit + 1 rows, however deep the page is, with or without a location or
+-- room filter.
+--
+-- Verify with: python check_query_plans.py
+
+CREATE INDEX IF NOT EXISTS idx_reservations_date_time_id
+    ON reservations (date, time, id);
+DROP INDEX IF EXISTS idx_reservations_date_time;
+
+-- Also serves everything idx_reservations_location_date_time did
+CREATE INDEX IF NOT EXISTS idx_reservations_location_date_time_id
+    ON reservations (location_id, date, time, id);
+DROP INDEX IF EXISTS idx_reservations_location_date_time;
+
+-- Also serves the per-room day lookups and the ON DELETE SET NULL lookup from rooms
+CREATE INDEX IF NOT EXISTS idx_reservations_room_date_time_id
+    ON reservations (room_id, date, time, id);
+DROP INDEX IF EXISTS idx_reservations_room_date;
+
+ANALYZE reservations;
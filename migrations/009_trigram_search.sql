@@ -0,0 +1,23 @@
+-- Eternal Fusion Pavilion - Trigram indexes for admin search
+--
+-- Admin search matches substrings of reservation numbers, customer names
+-- and customer emails (ILIKE '%term%') and ranks fuzzy word matches
+-- (term <% column). pg_trgm GIN indexes serve both predicates, so searching
+-- no longer scans reservations and customers. Terms shorter than three
+-- characters have no trigrams and still fall back to a full index scan.
+--
+-- Verify with: python check_query_plans.py
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_reservations_number_trgm
+    ON reservations USING gin (reservation_number gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_customers_name_trgm
+    ON customers USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_customers_email_trgm
+    ON customers USING gin (email gin_trgm_ops);
+
+ANALYZE reservations;
+ANALYZE customers;
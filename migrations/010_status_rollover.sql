@@ -0,0 +1,24 @@
+-- Eternal Fusion Pavilion - Indexes for the status rollover
+--
+-- utils/status_rollover.py moves confirmed reservations from past dates to
+-- 'completed', so the confirmed rows (and the partial period indexes of
+-- 002_reservation_period.sql) only hold upcoming bookings.
+--
+-- The rollover finds its batches through a partial index over the
+-- confirmed rows, which stays the size of the upcoming bookings instead of
+-- walking (date, time, id) over all of history. Dashboards of past dates
+-- count completed bookings as occupancy too; they match
+-- (status = 'confirmed' OR (status = 'completed' AND <day> < CURRENT_DATE))
+-- and combine the partial period index of each status with a BitmapOr.
+--
+-- Verify with: python check_query_plans.py
+
+CREATE INDEX IF NOT EXISTS idx_reservations_confirmed_date_time_id
+    ON reservations (date, time, id)
+    WHERE status = 'confirmed';
+
+CREATE INDEX IF NOT EXISTS idx_reservations_location_period_completed
+    ON reservations USING GIST (location_id, period)
+    WHERE status = 'completed';
+
+ANALYZE reservations;
@@ -0,0 +1,100 @@
+-- Eternal Fusion Pavilion - Partitioned and indexed audit log
+--
+-- audit_log becomes a table range-partitioned by month on created_at, so
+-- queries over a time window only touch the months in it and old months
+-- can be detached or dropped whole. The indexes serve the filters of
+-- GET /admin/audit-log, each ending in (created_at, id) for the keyset
+-- order:
+--   * newest first (the primary key)
+--   * everything that happened to one entity: (entity_type, entity_id)
+--   * one admin's actions: (admin_id)
+--   * one kind of action: (action)
+--   * details containment (details @> '{...}'): GIN over the JSONB details
+--
+-- Partitions are created ahead by audit_log_ensure_partitions(), which every
+-- app worker calls periodically (see backend/utils/audit_partitions.py).
+-- Rows outside every month partition land in audit_log_default rather than
+-- failing the insert, and are moved out when their month is created (see
+-- 013_audit_log_partition_backfill.sql). Month bounds are in UTC.
+--
+-- Existing rows are copied over; ids keep coming from the same sequence.
+
+ALTER TABLE audit_log RENAME TO audit_log_legacy;
+ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey;
+
+CREATE TABLE audit_log (
+    id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq'),
+    admin_id INTEGER REFERENCES admins(id),
+    action VARCHAR(50) NOT NULL,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id INTEGER,
+    details JSONB,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (created_at, id)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id;
+
+CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT;
+
+CREATE OR REPLACE FUNCTION audit_log_ensure_partitions(
+    p_from DATE,
+    p_months INTEGER
+) RETURNS INTEGER AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::date;
+    v_name TEXT;
+    v_created INTEGER := 0;
+BEGIN
+    -- One partition per month from p_from's month, p_months months ahead
+    FOR i IN 0..p_months LOOP
+        v_name := 'audit_log_' || to_char(v_month, 'YYYY_MM');
+        IF to_regclass(v_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                v_name,
+                v_month::timestamp AT TIME ZONE 'UTC',
+                (v_month + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            v_created := v_created + 1;
+        END IF;
+        v_month := (v_month + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Every month with legacy rows, through three months ahead
+DO $$
+DECLARE
+    v_first DATE;
+BEGIN
+    SELECT COALESCE(MIN(created_at AT TIME ZONE 'UTC')::date, CURRENT_DATE) INTO v_first
+    FROM audit_log_legacy;
+    PERFORM audit_log_ensure_partitions(
+        v_first,
+        ((date_part('year', CURRENT_DATE) - date_part('year', v_first)) * 12
+            + date_part('month', CURRENT_DATE) - date_part('month', v_first))::integer + 3
+    );
+END;
+$$;
+
+INSERT INTO audit_log (id, admin_id, action, entity_type, entity_id, details, created_at)
+SELECT id, admin_id, action, entity_type, entity_id, details::jsonb, COALESCE(created_at, CURRENT_TIMESTAMP)
+FROM audit_log_legacy;
+
+DROP TABLE audit_log_legacy;
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_entity
+    ON audit_log (entity_type, entity_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_admin
+    ON audit_log (admin_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_action
+    ON audit_log (action, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_details
+    ON audit_log USING GIN (details jsonb_path_ops);
+
+ANALYZE audit_log;
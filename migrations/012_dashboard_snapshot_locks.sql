@@ -0,0 +1,49 @@
+-- Eternal Fusion Pavilion - Close the snapshot claim race
+--
+-- 007_dashboard_snapshots.sql discards a snapshot whose generation changed
+-- between claim and store. A writer whose trigger ran before the snapshot
+-- row existed bumped nothing, though, and if it committed after the payload
+-- was read, the stale payload was stored anyway.
+--
+-- Invalidations now take a shared transaction-level advisory lock on the
+-- location, held until the writer commits, and claim_snapshot() takes the
+-- same lock exclusively before creating the row. A claim therefore waits
+-- for every in-flight writer of the location whose trigger has already run,
+-- so the payload computed after it sees their changes. Writers that come
+-- later find the row and bump its generation. Shared locks do not conflict
+-- with each other, so writers never wait on one another here.
+--
+-- Key: (location_id, 0). Booking locks use (location_id, date ordinal) and
+-- ordinals start at 1, so the two never collide.
+
+CREATE OR REPLACE FUNCTION dashboard_snapshots_invalidate(
+    p_location_id INTEGER,
+    p_date DATE
+) RETURNS VOID AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock_shared(p_location_id, 0);
+    -- p_date NULL: every date of the location
+    UPDATE dashboard_snapshots
+    SET generation = generation + 1, payload = NULL
+    WHERE location_id = p_location_id
+    AND (p_date IS NULL OR date = p_date);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reservations embed their customer
+CREATE OR REPLACE FUNCTION dashboard_snapshots_customer_change() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock_shared(l.location_id, 0)
+    FROM (
+        SELECT DISTINCT location_id FROM reservations WHERE customer_id = NEW.id
+    ) l;
+
+    UPDATE dashboard_snapshots s
+    SET generation = s.generation + 1, payload = NULL
+    FROM (
+        SELECT DISTINCT location_id, date FROM reservations WHERE customer_id = NEW.id
+    ) r
+    WHERE s.location_id = r.location_id AND s.date = r.date;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,84 @@
+-- Eternal Fusion Pavilion - Audit log partitions for months already in default
+--
+-- 011_audit_log_partitioning.sql sends rows for months without a partition
+-- to audit_log_default. Creating that month's partition afterwards failed
+-- ("updated partition constraint for default partition would be violated"),
+-- so a month that had missed its partition could never get one.
+--
+-- audit_log_ensure_partitions() now detaches the default partition when
+-- it holds rows of the month being created, creates the month, moves the
+-- rows over and attaches default again, all in the caller's transaction.
+-- DETACH locks audit_log exclusively until commit, so concurrent inserts
+-- wait and then land in the new partition.
+--
+-- Every app worker calls the function (see backend/utils/audit_partitions.py);
+-- a transaction-level advisory lock on the single bigint key 7301002 lets
+-- one caller at a time through. The status rollover leader lock is 7301001.
+
+CREATE OR REPLACE FUNCTION audit_log_ensure_partitions(
+    p_from DATE,
+    p_months INTEGER
+) RETURNS INTEGER AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::date;
+    v_name TEXT;
+    v_lower TIMESTAMP WITH TIME ZONE;
+    v_upper TIMESTAMP WITH TIME ZONE;
+    v_created INTEGER := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(7301002);
+
+    -- One partition per month from p_from's month, p_months months ahead
+    FOR i IN 0..p_months LOOP
+        v_name := 'audit_log_' || to_char(v_month, 'YYYY_MM');
+        IF to_regclass(v_name) IS NULL THEN
+            v_lower := v_month::timestamp AT TIME ZONE 'UTC';
+            v_upper := (v_month + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC';
+
+            IF EXISTS (
+                SELECT 1 FROM audit_log_default
+                WHERE created_at >= v_lower AND created_at < v_upper
+            ) THEN
+                ALTER TABLE audit_log DETACH PARTITION audit_log_default;
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                    v_name, v_lower, v_upper
+                );
+                EXECUTE format(
+                    'INSERT INTO %I (id, admin_id, action, entity_type, entity_id, details, created_at)
+                     SELECT id, admin_id, action, entity_type, entity_id, details, created_at
+                     FROM audit_log_default
+                     WHERE created_at >= %L AND created_at < %L',
+                    v_name, v_lower, v_upper
+                );
+                DELETE FROM audit_log_default
+                WHERE created_at >= v_lower AND created_at < v_upper;
+                ALTER TABLE audit_log ATTACH PARTITION audit_log_default DEFAULT;
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                    v_name, v_lower, v_upper
+                );
+            END IF;
+            v_created := v_created + 1;
+        END IF;
+        v_month := (v_month + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Months that went to default while nobody was creating partitions
+DO $$
+DECLARE
+    v_first DATE;
+BEGIN
+    SELECT COALESCE(MIN(created_at AT TIME ZONE 'UTC')::date, CURRENT_DATE) INTO v_first
+    FROM audit_log_default;
+    PERFORM audit_log_ensure_partitions(
+        LEAST(v_first, CURRENT_DATE),
+        ((date_part('year', CURRENT_DATE) - date_part('year', LEAST(v_first, CURRENT_DATE))) * 12
+            + date_part('month', CURRENT_DATE) - date_part('month', LEAST(v_first, CURRENT_DATE)))::integer + 3
+    );
+END;
+$$;